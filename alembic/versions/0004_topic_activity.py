@@ -0,0 +1,38 @@
+"""Store topic-list activity per machine so incremental scrapes can skip topics.
+
+Revision ID: 0004_topic_activity
+Revises: 0003_ai_address_low
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004_topic_activity"
+down_revision: str | None = "0003_ai_address_low"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Nullable: existing rows have never been seen with activity data, so the
+    # first incremental run after this migration fetches every topic once.
+    op.add_column(
+        "machines",
+        sa.Column("topic_last_activity_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column("machines", sa.Column("topic_reply_count", sa.Integer(), nullable=True))
+    op.add_column(
+        "scrape_runs",
+        sa.Column("topics_skipped", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("scrape_runs", "topics_skipped")
+    op.drop_column("machines", "topic_reply_count")
+    op.drop_column("machines", "topic_last_activity_at")
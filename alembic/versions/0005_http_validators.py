@@ -0,0 +1,42 @@
+"""Conditional-GET validator cache for forum pages and its scrape-run counters.
+
+Revision ID: 0005_http_validators
+Revises: 0004_topic_activity
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0005_http_validators"
+down_revision: str | None = "0004_topic_activity"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+_COUNTERS = ("http_cache_hits", "http_cache_misses", "http_not_modified")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "http_validators",
+        sa.Column("url", sa.String(1024), primary_key=True),
+        sa.Column("etag", sa.String(256), nullable=True),
+        sa.Column("last_modified", sa.String(64), nullable=True),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()
+        ),
+    )
+    for name in _COUNTERS:
+        op.add_column(
+            "scrape_runs", sa.Column(name, sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade() -> None:
+    for name in reversed(_COUNTERS):
+        op.drop_column("scrape_runs", name)
+    op.drop_table("http_validators")
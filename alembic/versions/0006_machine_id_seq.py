@@ -0,0 +1,32 @@
+"""Allocate new machine ids from a sequence instead of ``max(id) + 1``.
+
+The sequence continues the legacy loc_ID range (first id 1000, or the current
+maximum + 1), so ids stay compatible while concurrent and batched inserts can
+allocate without racing.
+
+Revision ID: 0006_machine_id_seq
+Revises: 0005_http_validators
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "0006_machine_id_seq"
+down_revision: str | None = "0005_http_validators"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE machine_id_seq START WITH 1000 MINVALUE 1 OWNED BY machines.id")
+    op.execute("SELECT setval('machine_id_seq', GREATEST((SELECT max(id) FROM machines), 999))")
+    op.execute("ALTER TABLE machines ALTER COLUMN id SET DEFAULT nextval('machine_id_seq')")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE machines ALTER COLUMN id DROP DEFAULT")
+    op.execute("DROP SEQUENCE machine_id_seq")
@@ -0,0 +1,41 @@
+"""Stored geography copies of machine and watch points, with GiST indexes.
+
+Radius and distance queries cast ``geometry`` to ``geography`` per row, which
+no index covers. Generated columns keep the geography next to the geometry so
+``ST_DWithin``/``<->`` can be answered from an index.
+
+Revision ID: 0007_geography_columns
+Revises: 0006_machine_id_seq
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "0007_geography_columns"
+down_revision: str | None = "0006_machine_id_seq"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE machines ADD COLUMN geog geography(Point, 4326) "
+        "GENERATED ALWAYS AS (geom::geography) STORED"
+    )
+    op.create_index("idx_machines_geog", "machines", ["geog"], postgresql_using="gist")
+    op.execute(
+        "ALTER TABLE watches ADD COLUMN center_geog geography(Point, 4326) NOT NULL "
+        "GENERATED ALWAYS AS (center_geom::geography) STORED"
+    )
+    op.create_index("idx_watches_center_geog", "watches", ["center_geog"], postgresql_using="gist")
+
+
+def downgrade() -> None:
+    op.drop_index("idx_watches_center_geog", table_name="watches")
+    op.execute("ALTER TABLE watches DROP COLUMN center_geog")
+    op.drop_index("idx_machines_geog", table_name="machines")
+    op.execute("ALTER TABLE machines DROP COLUMN geog")
@@ -0,0 +1,53 @@
+"""Notification outbox drained by the notify-worker role.
+
+The scraper used to send watch notifications itself after its last commit; a
+crash in between lost them. New machines are now queued here in the same
+transaction that inserts them.
+
+Revision ID: 0008_notification_outbox
+Revises: 0007_geography_columns
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0008_notification_outbox"
+down_revision: str | None = "0007_geography_columns"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "machine_id",
+            sa.Integer(),
+            sa.ForeignKey("machines.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("kind", sa.String(32), nullable=False),
+        sa.Column(
+            "scrape_run_id",
+            sa.Integer(),
+            sa.ForeignKey("scrape_runs.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index(
+        "ix_notification_outbox_scrape_run_id", "notification_outbox", ["scrape_run_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notification_outbox_scrape_run_id", table_name="notification_outbox")
+    op.drop_table("notification_outbox")
@@ -0,0 +1,39 @@
+"""Record when each geocode_cache entry was last answered by the provider.
+
+Cached misses used to be final. ``checked_at`` lets the geocoder ask Nominatim
+again once a miss is older than ``GEOCODE_NEGATIVE_TTL_DAYS``. Existing rows
+start from their ``created_at``.
+
+Revision ID: 0009_geocode_checked_at
+Revises: 0008_notification_outbox
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0009_geocode_checked_at"
+down_revision: str | None = "0008_notification_outbox"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "geocode_cache",
+        sa.Column(
+            "checked_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.execute("UPDATE geocode_cache SET checked_at = created_at")
+
+
+def downgrade() -> None:
+    op.drop_column("geocode_cache", "checked_at")
@@ -0,0 +1,32 @@
+"""Rate limits shared by every process (the Nominatim 1 req/s budget).
+
+Revision ID: 0010_rate_limit_slots
+Revises: 0009_geocode_checked_at
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0010_rate_limit_slots"
+down_revision: str | None = "0009_geocode_checked_at"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rate_limit_slots",
+        sa.Column("name", sa.String(64), primary_key=True),
+        sa.Column(
+            "next_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rate_limit_slots")
@@ -0,0 +1,57 @@
+"""Offline gazetteer (GeoNames dump) for geocoding place names.
+
+Loaded by ``scripts/import_gazetteer.py``. Name lookups use a trigram index for
+fuzzy matches and a ``text_pattern_ops`` index for prefix matches.
+
+Revision ID: 0011_gazetteer
+Revises: 0010_rate_limit_slots
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import geoalchemy2
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0011_gazetteer"
+down_revision: str | None = "0010_rate_limit_slots"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_table(
+        "gazetteer_places",
+        sa.Column("geonameid", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("name_key", sa.String(200), nullable=False),
+        sa.Column("feature_class", sa.String(1), nullable=False),
+        sa.Column("country_code", sa.String(2), nullable=False),
+        sa.Column("population", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column(
+            "geom",
+            geoalchemy2.Geometry(geometry_type="POINT", srid=4326, spatial_index=False),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "idx_gazetteer_name_trgm",
+        "gazetteer_places",
+        ["name_key"],
+        postgresql_using="gin",
+        postgresql_ops={"name_key": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "idx_gazetteer_name_prefix",
+        "gazetteer_places",
+        ["name_key"],
+        postgresql_ops={"name_key": "text_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("gazetteer_places")
@@ -0,0 +1,161 @@
+"""Re-key geocode_cache by geocode_key() and merge rows that now collide.
+
+Rows whose queries differ only in case, Unicode form, quotes, punctuation or
+umlaut spelling become one row per key. Of each group the row kept is a found
+place over a miss, then the most recently checked, then the oldest. The
+gazetteer's ``name_key`` moves to the same key.
+
+Before and after, the migration logs how many of the current machines' name
+queries the cache can answer (its hit rate for a full re-scrape).
+
+The key and name-query functions are copied as they stood at this revision,
+so later changes to the application code do not change what this migration
+does.
+
+Downgrade keeps the merged rows: the original spellings are not recoverable.
+
+Revision ID: 0012_geocode_cache_keys
+Revises: 0011_gazetteer
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import unicodedata
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import ARRAY
+
+revision: str = "0012_geocode_cache_keys"
+down_revision: str | None = "0011_gazetteer"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+log = logging.getLogger("alembic.runtime.migration")
+
+_CHUNK = 1000
+_EPOCH = datetime.min.replace(tzinfo=UTC)
+
+# Frozen copy of pressmuenzen.domain.geocode_key at this revision.
+_UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue"})
+_APOSTROPHES = str.maketrans(dict.fromkeys("'’‘`´", None))
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+
+# Frozen copy of pressmuenzen.domain.name_geocode at this revision.
+_AUTOMAT_SUFFIX = re.compile(
+    r"\[Automat\s*\d+\]"
+    r"|\(Automat\s*\d+\)"
+    r'|"Automat\s*\d+"'
+    r"|Automat\s*\d+",
+    re.IGNORECASE,
+)
+_QUOTED = re.compile(r'["„].*["“]')
+_PARENS = re.compile(r"\(.*\)")
+
+
+def geocode_key(query: str) -> str:
+    """The cache key of ``query``, as defined at this revision."""
+    text = unicodedata.normalize("NFKC", unicodedata.normalize("NFKC", query).casefold())
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    text = text.translate(_UMLAUTS).translate(_APOSTROPHES)
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+
+def _name_queries(name: str) -> list[str]:
+    """The full-name query of ``name`` followed by its stripped fallbacks."""
+    cleaned = _AUTOMAT_SUFFIX.sub("", name).strip()
+    quoted = _QUOTED.search(cleaned)
+    parens = _PARENS.search(cleaned)
+    queries = [cleaned]
+
+    def add(candidate: str) -> None:
+        candidate = candidate.strip()
+        if candidate and candidate not in queries:
+            queries.append(candidate)
+
+    if quoted:
+        add(cleaned.replace(quoted.group(0), ""))
+    if parens:
+        without_parens = cleaned.replace(parens.group(0), "")
+        add(without_parens)
+        if quoted:
+            add(without_parens.replace(quoted.group(0), ""))
+    return queries
+
+
+def _hit_rate(bind: sa.Connection, keyed: bool) -> tuple[int, int]:
+    """``(answered, asked)`` over the name queries of every machine."""
+    stored = set(bind.execute(sa.text("SELECT query FROM geocode_cache")).scalars())
+    asked = answered = 0
+    for (name,) in bind.execute(sa.text("SELECT name FROM machines")):
+        for query in _name_queries(name):
+            query = " ".join(query.split())
+            asked += 1
+            answered += (geocode_key(query) if keyed else query) in stored
+    return answered, asked
+
+
+def _report(when: str, answered: int, asked: int, rows: int) -> None:
+    rate = answered / asked if asked else 0.0
+    log.info(
+        "geocode_cache %s re-keying: %d rows, %d/%d machine name queries cached (%.1f%%)",
+        when,
+        rows,
+        answered,
+        asked,
+        rate * 100,
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text("SELECT id, query, geom IS NOT NULL, checked_at FROM geocode_cache")
+    ).all()
+    _report("before", *_hit_rate(bind, keyed=False), rows=len(rows))
+
+    groups: dict[str, list[tuple[int, str, bool, datetime | None]]] = {}
+    for row_id, query, found, checked_at in rows:
+        groups.setdefault(geocode_key(query), []).append((row_id, query, found, checked_at))
+
+    drop: list[int] = []
+    rekey: list[dict[str, object]] = []
+    for key, group in groups.items():
+        keep = min(group, key=lambda r: (not r[2], -(r[3] or _EPOCH).timestamp(), r[0]))
+        drop += [r[0] for r in group if r is not keep]
+        if keep[1] != key:
+            rekey.append({"id": keep[0], "key": key})
+
+    ids = sa.bindparam("ids", type_=ARRAY(sa.Integer))
+    for start in range(0, len(drop), _CHUNK):
+        bind.execute(
+            sa.text("DELETE FROM geocode_cache WHERE id = ANY(:ids)").bindparams(ids),
+            {"ids": drop[start : start + _CHUNK]},
+        )
+    if rekey:
+        bind.execute(sa.text("UPDATE geocode_cache SET query = :key WHERE id = :id"), rekey)
+
+    renamed = [
+        {"id": geonameid, "key": geocode_key(name)}
+        for geonameid, name, name_key in bind.execute(
+            sa.text("SELECT geonameid, name, name_key FROM gazetteer_places")
+        )
+        if geocode_key(name) != name_key
+    ]
+    for start in range(0, len(renamed), _CHUNK):
+        bind.execute(
+            sa.text("UPDATE gazetteer_places SET name_key = :key WHERE geonameid = :id"),
+            renamed[start : start + _CHUNK],
+        )
+
+    _report("after", *_hit_rate(bind, keyed=True), rows=len(rows) - len(drop))
+
+
+def downgrade() -> None:
+    # The merged spellings are gone; the re-keyed rows stay valid cache entries.
+    pass
@@ -0,0 +1,31 @@
+"""Record the forum request rate the adaptive limiter allowed per scrape run.
+
+Revision ID: 0013_scrape_request_rate
+Revises: 0012_geocode_cache_keys
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0013_scrape_request_rate"
+down_revision: str | None = "0012_geocode_cache_keys"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("scrape_runs", sa.Column("request_rate", sa.Float(), nullable=True))
+    op.add_column(
+        "scrape_runs",
+        sa.Column("rate_backoffs", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("scrape_runs", "rate_backoffs")
+    op.drop_column("scrape_runs", "request_rate")
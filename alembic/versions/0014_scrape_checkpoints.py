@@ -0,0 +1,47 @@
+"""Checkpoints of scrape progress, for resuming a run that died halfway.
+
+Revision ID: 0014_scrape_checkpoints
+Revises: 0013_scrape_request_rate
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0014_scrape_checkpoints"
+down_revision: str | None = "0013_scrape_request_rate"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scrape_checkpoints",
+        sa.Column(
+            "run_id",
+            sa.Integer(),
+            sa.ForeignKey("scrape_runs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("kind", sa.String(16), primary_key=True),
+        sa.Column("key", sa.String(1024), primary_key=True),
+        sa.Column("payload_json", sa.Text(), nullable=True),
+    )
+    op.add_column(
+        "scrape_runs",
+        sa.Column(
+            "resumed_from",
+            sa.Integer(),
+            sa.ForeignKey("scrape_runs.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("scrape_runs", "resumed_from")
+    op.drop_table("scrape_checkpoints")
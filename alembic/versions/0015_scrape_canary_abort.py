@@ -0,0 +1,28 @@
+"""Record where the rolling canary stopped a scrape run, and why.
+
+Revision ID: 0015_scrape_canary_abort
+Revises: 0014_scrape_checkpoints
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0015_scrape_canary_abort"
+down_revision: str | None = "0014_scrape_checkpoints"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("scrape_runs", sa.Column("aborted_after_topics", sa.Integer(), nullable=True))
+    op.add_column("scrape_runs", sa.Column("abort_reason", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("scrape_runs", "abort_reason")
+    op.drop_column("scrape_runs", "aborted_after_topics")
@@ -0,0 +1,47 @@
+"""Track delivery of each recorded notification.
+
+The notify-worker used to hold its outbox rows locked, and its transaction open,
+across every Telegram send of a batch; a failure halfway re-sent the whole
+batch. It now records the (user, machine) pairs and commits before sending.
+``sent_at`` stays NULL until the message went out, and ``claimed_at`` tells a
+later worker when a pending row was abandoned by a crashed one.
+
+Revision ID: 0016_notification_delivery
+Revises: 0015_scrape_canary_abort
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0016_notification_delivery"
+down_revision: str | None = "0015_scrape_canary_abort"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "notifications_sent",
+        sa.Column(
+            "claimed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.alter_column("notifications_sent", "sent_at", nullable=True, server_default=None)
+    op.create_index(
+        "ix_notifications_sent_pending",
+        "notifications_sent",
+        ["claimed_at"],
+        postgresql_where=sa.text("sent_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_sent_pending", table_name="notifications_sent")
+    op.execute("UPDATE notifications_sent SET sent_at = claimed_at WHERE sent_at IS NULL")
+    op.alter_column("notifications_sent", "sent_at", nullable=False, server_default=sa.func.now())
+    op.drop_column("notifications_sent", "claimed_at")
@@ -0,0 +1,36 @@
+"""Number the notification batches, so a digest's map link can name its batch.
+
+Digest map tokens used to carry every machine id of the digest, which pushed
+large digests past Telegram's message limit. The token now carries the user and
+the batch; the hosted map looks the machines up in ``notifications_sent``.
+
+Revision ID: 0017_notification_batches
+Revises: 0016_notification_delivery
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0017_notification_batches"
+down_revision: str | None = "0016_notification_delivery"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE notification_batch_seq")
+    op.add_column("notifications_sent", sa.Column("batch_id", sa.Integer(), nullable=True))
+    op.create_index(
+        "ix_notifications_sent_user_batch", "notifications_sent", ["user_id", "batch_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_sent_user_batch", table_name="notifications_sent")
+    op.drop_column("notifications_sent", "batch_id")
+    op.execute("DROP SEQUENCE notification_batch_seq")
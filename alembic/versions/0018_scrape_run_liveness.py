@@ -0,0 +1,37 @@
+"""Mark replay runs and record when a scrape run last showed progress.
+
+``scrape --resume`` only adopts a run whose heartbeat is older than
+``SCRAPER_STALE_RUN_SECONDS``, and never a replay. Existing rows keep a NULL
+heartbeat and are judged by their start time.
+
+Revision ID: 0018_scrape_run_liveness
+Revises: 0017_notification_batches
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0018_scrape_run_liveness"
+down_revision: str | None = "0017_notification_batches"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "scrape_runs",
+        sa.Column("replay", sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+    op.add_column(
+        "scrape_runs", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("scrape_runs", "heartbeat_at")
+    op.drop_column("scrape_runs", "replay")
@@ -0,0 +1,74 @@
+"""Benchmark the HTML parser backends on a page archive and check they agree.
+
+Parses every archived page with each backend the way the scraper does
+(``viewtopic`` pages as topic pages, everything else as topic lists) and reports
+pages/sec. Any page where a backend's extraction differs from the reference
+``html.parser`` backend is listed and the script exits non-zero.
+
+Run:  python scripts/bench_parsers.py /path/to/SCRAPER_ARCHIVE_DIR [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from pressmuenzen.scraper.archive import PageArchive
+from pressmuenzen.scraper.elongated_coin import ElongatedCoinSource
+from pressmuenzen.scraper.html import PARSER_BACKENDS, ParserBackend
+from pressmuenzen.scraper.source import ScrapedRegion, TopicRef
+
+_REGION = ScrapedRegion(forum_url="", name="bench", is_limited_section=False)
+
+
+async def _extract(source: ElongatedCoinSource, url: str, page: bytes) -> Any:
+    if "viewtopic" in url:
+        return await source.parse_machine(page, TopicRef(url=url, name=url), _REGION)
+    return source.parse_topic_list(page)
+
+
+async def _run(backend: ParserBackend, pages: list[tuple[str, bytes]], repeat: int) -> list[Any]:
+    source = ElongatedCoinSource(parser=backend)
+    results: list[Any] = []
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [await _extract(source, url, page) for url, page in pages]
+        best = min(best, time.perf_counter() - started)
+    print(f"{backend:12} {len(pages) / best:10.1f} pages/sec  ({best:.2f}s best of {repeat})")
+    return results
+
+
+async def main(archive_dir: Path, repeat: int) -> int:
+    archive = PageArchive(archive_dir)
+    pages = [(url, archive.get(url) or b"") for url in archive.index()]
+    if not pages:
+        print(f"no pages in {archive_dir}", file=sys.stderr)
+        return 2
+    print(f"{len(pages)} pages, {sum(len(p) for _, p in pages) / 1e6:.1f} MB")
+
+    reference = await _run("html.parser", pages, repeat)
+    failed = False
+    for backend in PARSER_BACKENDS:
+        if backend == "html.parser":
+            continue
+        results = await _run(backend, pages, repeat)
+        mismatches = [
+            url for (url, _), a, b in zip(pages, reference, results, strict=True) if a != b
+        ]
+        for url in mismatches[:20]:
+            print(f"  MISMATCH {backend}: {url}")
+        failed = failed or bool(mismatches)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archive", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.archive, args.repeat)))
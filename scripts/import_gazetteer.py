@@ -0,0 +1,85 @@
+"""Load a GeoNames dump into the offline gazetteer (``gazetteer_places``).
+
+Takes one or more GeoNames tab-separated files, e.g. ``DE.txt``, ``AT.txt`` and
+``cities500.txt`` from https://download.geonames.org/export/dump/. Replaces the
+table's content in one transaction, so re-running with a newer dump is safe.
+Bare place names the scraper geocodes are then resolved from this table first,
+without a Nominatim request.
+
+Run:  python -m scripts.import_gazetteer data/geonames/DE.txt [--min-population N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+from pressmuenzen.db.engine import session_scope
+from pressmuenzen.db.repositories.gazetteer import GazetteerRepository
+from pressmuenzen.domain.models import Coordinate
+from pressmuenzen.logging import configure_logging, get_logger
+
+log = get_logger("import_gazetteer")
+
+# GeoNames column positions (see the dump's readme.txt).
+_ID, _NAME, _LAT, _LON, _CLASS, _COUNTRY, _POPULATION = 0, 1, 4, 5, 6, 8, 14
+
+# Administrative areas, populated places, spots/buildings, landmarks (parks,
+# mountains, water); roads and undersea features are left out.
+DEFAULT_FEATURE_CLASSES = "A,P,S,L,T,H,V"
+
+
+def read_places(
+    path: Path, feature_classes: set[str], min_population: int
+) -> Iterator[tuple[int, str, str, str, int, Coordinate]]:
+    with path.open(encoding="utf-8", newline="") as fh:
+        for row in csv.reader(fh, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if len(row) <= _POPULATION or row[_CLASS] not in feature_classes:
+                continue
+            population = int(row[_POPULATION] or 0)
+            if population < min_population and row[_CLASS] == "P":
+                continue
+            yield (
+                int(row[_ID]),
+                row[_NAME][:200],
+                row[_CLASS],
+                row[_COUNTRY],
+                population,
+                Coordinate(lat=float(row[_LAT]), lon=float(row[_LON])),
+            )
+
+
+async def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog="import_gazetteer")
+    parser.add_argument("dumps", nargs="+", type=Path, help="GeoNames .txt files")
+    parser.add_argument(
+        "--feature-classes",
+        default=DEFAULT_FEATURE_CLASSES,
+        help=f"Comma-separated GeoNames feature classes (default {DEFAULT_FEATURE_CLASSES})",
+    )
+    parser.add_argument(
+        "--min-population",
+        type=int,
+        default=0,
+        help="Skip populated places (class P) smaller than this",
+    )
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    classes = {c.strip().upper() for c in args.feature_classes.split(",") if c.strip()}
+    places = {
+        place[0]: place
+        for path in args.dumps
+        for place in read_places(path, classes, args.min_population)
+    }
+    async with session_scope() as session:
+        loaded = await GazetteerRepository(session).replace_all(list(places.values()))
+    log.info("gazetteer loaded", places=loaded, files=[str(p) for p in args.dumps])
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -13,6 +13,10 @@ Guarantees:
     candidates.
   - a final parity check asserts the new computed geom/gps_source equals the
     legacy clean_database value for every machine.
+  - the legacy name-geocoding results seed geocode_cache under the same
+    queries the scraper derives, so the first full scrape re-geocodes nothing
+    the legacy bot already resolved. Legacy misses are due for a recheck at
+    once. Existing cache entries are never replaced.
 
 Run:  python -m scripts.import_legacy_json   (or python scripts/import_legacy_json.py)
 """
@@ -21,25 +25,34 @@ from __future__ import annotations
 
 import asyncio
 import json
+from collections import Counter
+from datetime import UTC, datetime
 from pathlib import Path
+from typing import Any
 
 from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from pressmuenzen.db.bulk import chunked
 from pressmuenzen.db.engine import session_scope
-from pressmuenzen.db.geo import lat_expr, lon_expr
+from pressmuenzen.db.geo import lat_expr, lon_expr, point_wkt
 from pressmuenzen.db.models import (
     CoordinateCandidate,
     Correction,
+    GeocodeCache,
     Machine,
 )
 from pressmuenzen.db.repositories.machines import MachineRepository
 from pressmuenzen.db.repositories.users import UserRepository
+from pressmuenzen.domain.geocode_key import geocode_key
 from pressmuenzen.domain.models import (
     Coordinate,
     CorrectionStatus,
     CorrectionType,
     GpsSource,
 )
+from pressmuenzen.domain.name_geocode import name_geocode_queries
 from pressmuenzen.logging import configure_logging, get_logger
 
 log = get_logger("import_legacy")
@@ -48,6 +61,8 @@ ROOT = Path(__file__).resolve().parent.parent
 URL_DB = ROOT / "data" / "url_database.json"
 CLEAN_DB = ROOT / "data" / "clean_database.json"
 USER_DB = ROOT / "private" / "user_data.json"
+# Seeded misses count as checked at the epoch, i.e. due for a recheck.
+_LEGACY_MISS_CHECKED_AT = datetime(1970, 1, 1, tzinfo=UTC)
 
 LIMITED_SECTION_NAME = "Zeitlich begrenzte Standorte"
 
@@ -133,7 +148,100 @@ async def _import_machines(repo: MachineRepository) -> None:
                         )
                     )
 
-            await repo.recompute_geom(loc_id)
+    # One set-based pass once every candidate is in, instead of one per machine.
+    await repo.recompute_all_geoms()
+
+
+def legacy_geocode_seeds(db: dict[str, Any]) -> dict[str, Coordinate | None]:
+    """geocode_cache entries (key -> coordinate, None = miss) implied by the legacy results.
+
+    The legacy bot ran the same cascade as the scraper for every machine: the
+    full name, then each partial until one resolved. So:
+
+    - ``full_name_gps`` is the full name's answer;
+    - ``partial_name_gps`` means the full name was a miss and some partial hit.
+      With a single partial that is the answer. With several, the answering
+      partial is the first one another machine's unambiguous result puts at
+      the same coordinate, and the partials tried before it were misses; if
+      none matches, the partials are left out;
+    - neither means every query of the name was a miss.
+
+    Where machines disagree on a query's answer, the most common one wins;
+    a found place always beats a miss.
+    """
+    answers: dict[str, Counter[Coordinate | None]] = {}
+    ambiguous: list[tuple[list[str], Coordinate]] = []
+
+    def seen(query: str, coord: Coordinate | None) -> None:
+        key = geocode_key(query)
+        if key:
+            answers.setdefault(key, Counter())[coord] += 1
+
+    for region in db.values():
+        if not isinstance(region, dict) or "location_list" not in region:
+            continue
+        for loc in region["location_list"]:
+            queries = name_geocode_queries(loc.get("name", ""))
+            full = _parse_coord(loc["full_name_gps"]) if loc.get("full_name_gps") else None
+            partial = _parse_coord(loc["partial_name_gps"]) if loc.get("partial_name_gps") else None
+            if full is not None:
+                seen(queries.full, full)
+                continue
+            seen(queries.full, None)
+            if partial is None:
+                for query in queries.partials:
+                    seen(query, None)
+            elif len(queries.partials) == 1:
+                seen(queries.partials[0], partial)
+            elif queries.partials:
+                ambiguous.append((queries.partials, partial))
+
+    known = {key: set(counts) for key, counts in answers.items()}
+    for partials, coord in ambiguous:
+        for i, query in enumerate(partials):
+            if coord in known.get(geocode_key(query), ()):
+                for missed in partials[:i]:
+                    seen(missed, None)
+                seen(query, coord)
+                break
+
+    seeds: dict[str, Coordinate | None] = {}
+    for key, counts in answers.items():
+        found = [(n, c) for c, n in counts.items() if c is not None]
+        seeds[key] = max(found, key=lambda nc: nc[0])[1] if found else None
+    return seeds
+
+
+async def _seed_geocode_cache(session: AsyncSession) -> tuple[int, int]:
+    """Insert the legacy seeds missing from geocode_cache; returns (found, misses) inserted.
+
+    When the legacy bot got a miss is unknown, so misses are stored as checked
+    long ago: the first lookup after the import asks Nominatim again instead of
+    trusting them for a further GEOCODE_NEGATIVE_TTL_DAYS.
+    """
+    seeds = legacy_geocode_seeds(json.loads(URL_DB.read_text(encoding="utf-8")))
+    now = datetime.now(UTC)
+    inserted: list[str] = []
+    for chunk in chunked(list(seeds.items())):
+        result = await session.execute(
+            insert(GeocodeCache)
+            .values(
+                [
+                    {
+                        "query": key,
+                        "geom": point_wkt(coord) if coord is not None else None,
+                        "provider": "legacy",
+                        "checked_at": now if coord is not None else _LEGACY_MISS_CHECKED_AT,
+                    }
+                    for key, coord in chunk
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[GeocodeCache.query])
+            .returning(GeocodeCache.query)
+        )
+        inserted += result.scalars().all()
+    found = sum(1 for key in inserted if seeds[key] is not None)
+    return found, len(inserted) - found
 
 
 async def _import_users(repo: UserRepository) -> None:
@@ -154,7 +262,7 @@ async def _import_users(repo: UserRepository) -> None:
                 continue
 
 
-async def _parity_check(session) -> tuple[int, int]:  # type: ignore[no-untyped-def]
+async def _parity_check(session: AsyncSession) -> tuple[int, int]:
     """Assert each machine's computed geom/source matches the legacy clean db."""
     clean = json.loads(CLEAN_DB.read_text(encoding="utf-8"))
 
@@ -218,7 +326,11 @@ async def main() -> None:
         machine_repo = MachineRepository(session)
         user_repo = UserRepository(session)
         await _import_machines(machine_repo)
+        # Legacy loc_IDs were inserted explicitly; new machines continue after them.
+        await machine_repo.sync_id_sequence()
         await _import_users(user_repo)
+        seeded_found, seeded_misses = await _seed_geocode_cache(session)
+        log.info("geocode cache seeded", found=seeded_found, misses=seeded_misses)
 
     async with session_scope() as session:
         checked, mismatches = await _parity_check(session)
@@ -2,8 +2,10 @@
 
 python -m pressmuenzen bot
 python -m pressmuenzen web
-python -m pressmuenzen scrape [--mode incremental|full]
+python -m pressmuenzen scrape [--mode incremental|full] [--replay ARCHIVE_DIR | --resume]
 python -m pressmuenzen ai-extract [--budget N]
+python -m pressmuenzen notify-worker [--once]
+python -m pressmuenzen recompute (--all | --ids ID [ID ...]) [--check]
 python -m pressmuenzen migrate
 """
 
@@ -11,10 +13,27 @@ from __future__ import annotations
 
 import argparse
 import sys
+from collections.abc import Coroutine
+from typing import Any
 
 from pressmuenzen.logging import configure_logging, get_logger
 
 
+def _run_async[T](main: Coroutine[Any, Any, T]) -> T:
+    """``asyncio.run(main)``, then drain the process-wide Telegram dispatcher."""
+    import asyncio
+
+    from pressmuenzen.services.dispatch import close_dispatcher
+
+    async def run() -> T:
+        try:
+            return await main
+        finally:
+            await close_dispatcher()
+
+    return asyncio.run(run())
+
+
 def _run_migrate() -> None:
     from alembic import command
     from alembic.config import Config
@@ -44,19 +63,32 @@ def _run_web() -> None:
 
 
 def _run_scrape(argv: list[str]) -> None:
-    import asyncio
+    from pathlib import Path
 
     from pressmuenzen.scraper.pipeline import run_scrape
 
     parser = argparse.ArgumentParser(prog="pressmuenzen scrape")
     parser.add_argument("--mode", choices=["incremental", "full"], default="incremental")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last unfinished run from its checkpoints (in that run's mode)",
+    )
+    source.add_argument(
+        "--replay",
+        type=Path,
+        default=None,
+        metavar="ARCHIVE_DIR",
+        help="Serve forum pages from a SCRAPER_ARCHIVE_DIR archive, rate limiter off",
+    )
     args = parser.parse_args(argv)
-    asyncio.run(run_scrape(mode=args.mode))
+    if args.replay is not None and not args.replay.is_dir():
+        parser.error(f"no archive at {args.replay}")
+    _run_async(run_scrape(mode=args.mode, replay=args.replay, resume=args.resume))
 
 
 def _run_ai_extract(argv: list[str]) -> None:
-    import asyncio
-
     from pressmuenzen.ai.job import run_ai_extract
 
     parser = argparse.ArgumentParser(prog="pressmuenzen ai-extract")
@@ -67,7 +99,40 @@ def _run_ai_extract(argv: list[str]) -> None:
         help="Max LLM calls to make (default: AI_EXTRACT_NIGHTLY_BUDGET env var or 30)",
     )
     args = parser.parse_args(argv)
-    asyncio.run(run_ai_extract(budget=args.budget))
+    _run_async(run_ai_extract(budget=args.budget))
+
+
+def _run_notify_worker(argv: list[str]) -> None:
+    from pressmuenzen.services.notifications import run_notify_worker
+
+    parser = argparse.ArgumentParser(prog="pressmuenzen notify-worker")
+    parser.add_argument("--once", action="store_true", help="Exit once the outbox is empty")
+    args = parser.parse_args(argv)
+    _run_async(run_notify_worker(once=args.once))
+
+
+def _run_recompute(argv: list[str]) -> None:
+    import asyncio
+
+    from pressmuenzen.services.recompute import run_check, run_recompute
+
+    parser = argparse.ArgumentParser(prog="pressmuenzen recompute")
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument("--all", action="store_true", help="Every machine in the catalogue")
+    scope.add_argument("--ids", type=int, nargs="+", metavar="ID", help="Only these machines")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Compare the SQL resolver with resolve() instead of writing; exit 1 on mismatch",
+    )
+    args = parser.parse_args(argv)
+    machine_ids = None if args.all else args.ids
+    if args.check:
+        mismatches = asyncio.run(run_check(machine_ids))
+        print(f"{len(mismatches)} mismatches" + (f": {mismatches[:20]}" if mismatches else ""))
+        raise SystemExit(1 if mismatches else 0)
+    changed = asyncio.run(run_recompute(machine_ids))
+    print(f"{changed} machines changed")
 
 
 def main() -> None:
@@ -75,7 +140,10 @@ def main() -> None:
     log = get_logger("pressmuenzen")
 
     if len(sys.argv) < 2:
-        print("usage: pressmuenzen {bot|web|scrape|ai-extract|migrate}", file=sys.stderr)
+        print(
+            "usage: pressmuenzen {bot|web|scrape|ai-extract|notify-worker|recompute|migrate}",
+            file=sys.stderr,
+        )
         raise SystemExit(2)
 
     role, rest = sys.argv[1], sys.argv[2:]
@@ -90,6 +158,10 @@ def main() -> None:
             _run_scrape(rest)
         case "ai-extract":
             _run_ai_extract(rest)
+        case "notify-worker":
+            _run_notify_worker(rest)
+        case "recompute":
+            _run_recompute(rest)
         case "migrate":
             _run_migrate()
         case _:
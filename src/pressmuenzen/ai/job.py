@@ -16,7 +16,6 @@ import hashlib
 import json
 from datetime import UTC, datetime
 
-import httpx
 from aiolimiter import AsyncLimiter
 from sqlalchemy import asc, case, nulls_first, select
 
@@ -27,9 +26,12 @@ from pressmuenzen.db.models import AiExtractRun, Machine
 from pressmuenzen.db.repositories.corrections import CorrectionRepository
 from pressmuenzen.db.repositories.machines import MachineRepository
 from pressmuenzen.domain.models import CorrectionType, GpsSource
+from pressmuenzen.http_clients import http_clients
 from pressmuenzen.logging import configure_logging, get_logger
-from pressmuenzen.scraper.elongated_coin import ElongatedCoinSource
-from pressmuenzen.scraper.geocoding import Geocoder
+from pressmuenzen.scraper.archive import PageArchive
+from pressmuenzen.scraper.elongated_coin import ElongatedCoinSource, join_thread
+from pressmuenzen.scraper.geocoding import Geocoder, memory_cache
+from pressmuenzen.scraper.html import parse_pool
 
 log = get_logger("ai.job")
 
@@ -54,62 +56,69 @@ async def run_ai_extract(budget: int | None = None) -> None:
     candidates_added = 0
     corrections_enqueued = 0
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        source = ElongatedCoinSource(client=client)
-
-        async with session_scope() as session:
-            machines = await _pick_machines(session, effective_budget)
+    # Thread pages can run to dozens of pages; parse them off the event loop.
+    with parse_pool(settings.scraper_parse_workers) as pool:
+        async with http_clients():
+            archive = (
+                PageArchive(settings.scraper_archive_dir) if settings.scraper_archive_dir else None
+            )
+            source = ElongatedCoinSource(archive=archive, executor=pool)
+
+            async with session_scope() as session:
+                machines = await _pick_machines(session, effective_budget)
+
+            for machine in machines:
+                if llm_calls >= effective_budget:
+                    break
+                try:
+                    thread_text, msg_count = await join_thread(
+                        source.fetch_thread_text(machine.source_url)
+                    )
+                    threads_fetched += 1
+                    thread_hash = _sha256(thread_text)
+
+                    if machine.thread_content_hash == thread_hash:
+                        log.debug("thread unchanged, skipping llm", machine_id=machine.id)
+                        # Still update the hash fields in case this is the first check.
+                        async with session_scope() as session:
+                            m = await session.get(Machine, machine.id)
+                            if m is not None:
+                                m.last_message_count = msg_count
+                                m.thread_content_hash = thread_hash
+                        continue
 
-        for machine in machines:
-            if llm_calls >= effective_budget:
-                break
-            try:
-                thread_text, msg_count = await source.fetch_thread_text(machine.source_url)
-                threads_fetched += 1
-                thread_hash = _sha256(thread_text)
+                    async with llm_limiter:
+                        result = extract_from_thread(thread_text)
+                    llm_calls += 1
+                    log.info(
+                        "llm extraction done",
+                        machine_id=machine.id,
+                        address_found=result.address_found,
+                        moved=result.moved_detected,
+                        opening_hours=result.opening_hours is not None,
+                    )
 
-                if machine.thread_content_hash == thread_hash:
-                    log.debug("thread unchanged, skipping llm", machine_id=machine.id)
-                    # Still update the hash fields in case this is the first check.
                     async with session_scope() as session:
+                        repo = MachineRepository(session)
+                        corr_repo = CorrectionRepository(session)
                         m = await session.get(Machine, machine.id)
-                        if m is not None:
-                            m.last_message_count = msg_count
-                            m.thread_content_hash = thread_hash
-                    continue
-
-                async with llm_limiter:
-                    result = extract_from_thread(thread_text)
-                llm_calls += 1
-                log.info(
-                    "llm extraction done",
-                    machine_id=machine.id,
-                    address_found=result.address_found,
-                    moved=result.moved_detected,
-                    opening_hours=result.opening_hours is not None,
-                )
-
-                async with session_scope() as session:
-                    repo = MachineRepository(session)
-                    corr_repo = CorrectionRepository(session)
-                    m = await session.get(Machine, machine.id)
-                    if m is None:
-                        continue
+                        if m is None:
+                            continue
 
-                    _persist_thread_meta(m, thread_hash, msg_count)
-                    if result.summary:
-                        m.ai_summary = result.summary
-                    if result.opening_hours is not None:
-                        m.opening_hours = result.opening_hours.to_json()
+                        _persist_thread_meta(m, thread_hash, msg_count)
+                        if result.summary:
+                            m.ai_summary = result.summary
+                        if result.opening_hours is not None:
+                            m.opening_hours = result.opening_hours.to_json()
 
-                    added, enqueued = await _process_location(repo, corr_repo, m, result)
-                    candidates_added += added
-                    corrections_enqueued += enqueued
+                        added, enqueued = await _process_location(repo, corr_repo, m, result)
+                        candidates_added += added
+                        corrections_enqueued += enqueued
 
-            except Exception as exc:  # noqa: BLE001 - per-machine isolation
-                msg = f"machine {machine.id} ({machine.source_url}): {exc}"
-                errors.append(msg)
-                log.warning("ai-extract error", machine_id=machine.id, error=str(exc))
+                except Exception as exc:  # noqa: BLE001 - per-machine isolation
+                    msg = f"machine {machine.id} ({machine.source_url}): {exc}"
+                    errors.append(msg)
+                    log.warning("ai-extract error", machine_id=machine.id, error=str(exc))
 
     status = "ok" if not errors else "partial"
     async with session_scope() as session:
@@ -131,6 +140,7 @@ async def run_ai_extract(budget: int | None = None) -> None:
         candidates_added=candidates_added,
         corrections_enqueued=corrections_enqueued,
         errors=len(errors),
+        geocode_cache=memory_cache().stats.as_log(),
     )
 
     await _notify_admins(
@@ -204,7 +214,7 @@ async def _process_location(
             if result.address_confidence in ("medium", "high")
             else GpsSource.AI_ADDRESS_GEOCODE_LOW
         )
-        geocoder = Geocoder(repo.session)
+        geocoder = Geocoder(repo.session, batch=True)
         coord = await geocoder.geocode(result.address_value)
         if coord is not None:
             await repo.clear_candidates_of_source(machine.id, GpsSource.AI_ADDRESS_GEOCODE)
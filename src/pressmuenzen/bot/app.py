@@ -26,7 +26,9 @@ from pressmuenzen.bot.handlers import (
     watches,
 )
 from pressmuenzen.config import get_settings
+from pressmuenzen.http_clients import close_clients
 from pressmuenzen.logging import configure_logging, get_logger
+from pressmuenzen.services.dispatch import close_dispatcher
 
 log = get_logger("bot")
 
@@ -55,12 +57,24 @@ async def _setup_commands(app: _Application) -> None:
             )
 
 
+async def _shutdown(app: _Application) -> None:
+    """Send what admin alerts are still queued, then close the pooled HTTP clients."""
+    await close_dispatcher()
+    await close_clients()
+
+
 def build_application() -> _Application:
     settings = get_settings()
     if not settings.telegram_token:
         raise RuntimeError("TELEGRAM_TOKEN is not set")
 
-    app = ApplicationBuilder().token(settings.telegram_token).post_init(_setup_commands).build()
+    app = (
+        ApplicationBuilder()
+        .token(settings.telegram_token)
+        .post_init(_setup_commands)
+        .post_shutdown(_shutdown)
+        .build()
+    )
 
     # Simple commands.
     app.add_handler(CommandHandler("start", details.start))
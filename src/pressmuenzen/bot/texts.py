@@ -86,6 +86,10 @@ WATCH_REMOVED = "Beobachtung {id} entfernt."
 MUTED = "Benachrichtigungen sind jetzt stummgeschaltet. /stumm hebt das wieder auf."
 UNMUTED = "Benachrichtigungen sind wieder aktiv."
 NOTIFY_NEW_MACHINE = "Neuer Automat in deiner Nähe ({distance} km): {name}\n{url}"
+NOTIFY_DIGEST_HEADER = "{count} neue Automaten in deiner Nähe:"
+NOTIFY_DIGEST_ITEM = "{distance} km: {name}\n{url}"
+NOTIFY_DIGEST_MORE = "… und {count} weitere."
+NOTIFY_DIGEST_MAP = "Alle auf der Karte: {url}"
 
 REPORT_DEEPLINK_INVALID = "Dieser Link ist ungültig oder abgelaufen."
 REPORT_DEEPLINK_THANKS = (
@@ -8,6 +8,7 @@ container, in CI, or on a laptop given the right environment.
 from __future__ import annotations
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -29,6 +30,22 @@ class Settings(BaseSettings):
     admin_chat_ids_raw: str = Field(default="", alias="ADMIN_CHAT_IDS")
     # Bot username without @, e.g. "PressmünzenBot". Used to build t.me deep-links on the map.
     telegram_bot_username: str = Field(default="", alias="TELEGRAM_BOT_USERNAME")
+    # Outgoing notification pacing (Telegram allows ~30 msgs/s overall, ~1/s per chat).
+    telegram_send_rate: float = Field(default=25.0, alias="TELEGRAM_SEND_RATE")
+    telegram_per_chat_interval_seconds: float = Field(
+        default=1.0, alias="TELEGRAM_PER_CHAT_INTERVAL_SECONDS"
+    )
+    telegram_senders: int = Field(default=4, alias="TELEGRAM_SENDERS")
+    telegram_send_retries: int = Field(default=3, alias="TELEGRAM_SEND_RETRIES")
+    # notify-worker: outbox rows (new machines) claimed per transaction, and the
+    # pause between polls once the outbox is empty.
+    notify_batch_size: int = Field(default=500, alias="NOTIFY_BATCH_SIZE")
+    notify_poll_seconds: float = Field(default=10.0, alias="NOTIFY_POLL_SECONDS")
+    # A recorded notification still unsent after this long was left behind by a
+    # crashed worker and is sent again.
+    notify_redeliver_seconds: float = Field(default=1800.0, alias="NOTIFY_REDELIVER_SECONDS")
+    # Outbox rows of a scrape run still unfinished after this long are dropped.
+    notify_dead_run_hours: float = Field(default=48.0, alias="NOTIFY_DEAD_RUN_HOURS")
 
     # Database
     database_url: str = Field(
@@ -47,6 +64,22 @@ class Settings(BaseSettings):
         default="pressmuenzen-bot (set NOMINATIM_USER_AGENT)",
         alias="NOMINATIM_USER_AGENT",
     )
+    # Minimum gap between two Nominatim requests, over all processes together.
+    nominatim_min_interval_seconds: float = Field(
+        default=1.0, alias="NOMINATIM_MIN_INTERVAL_SECONDS"
+    )
+    # Offline GeoNames gazetteer tried before Nominatim for bare place names.
+    gazetteer_enabled: bool = Field(default=True, alias="GAZETTEER_ENABLED")
+    gazetteer_min_similarity: float = Field(default=0.6, alias="GAZETTEER_MIN_SIMILARITY")
+    # In-process LRU in front of geocode_cache (per process; 0 disables it),
+    # with a shorter lifetime for misses than for found places.
+    geocode_memory_size: int = Field(default=4096, alias="GEOCODE_MEMORY_SIZE")
+    geocode_memory_ttl_seconds: float = Field(default=86400.0, alias="GEOCODE_MEMORY_TTL_SECONDS")
+    geocode_memory_negative_ttl_seconds: float = Field(
+        default=3600.0, alias="GEOCODE_MEMORY_NEGATIVE_TTL_SECONDS"
+    )
+    # Cached misses in geocode_cache are asked again once older than this.
+    geocode_negative_ttl_days: float = Field(default=30.0, alias="GEOCODE_NEGATIVE_TTL_DAYS")
 
     # Scraper
     scraper_base_url: str = Field(
@@ -59,6 +92,55 @@ class Settings(BaseSettings):
     scraper_canary_min_parse_rate: float = Field(
         default=0.85, alias="SCRAPER_CANARY_MIN_PARSE_RATE"
     )
+    # Rolling canary: parse rate over the last N fetched topics, judged once at
+    # least MIN_SAMPLE of them are in; a failing window stops the crawl early.
+    scraper_canary_window: int = Field(default=100, alias="SCRAPER_CANARY_WINDOW")
+    scraper_canary_min_sample: int = Field(default=50, alias="SCRAPER_CANARY_MIN_SAMPLE")
+    # Staged pipeline: workers per stage and the bound on each hand-off queue.
+    # A few fetch workers keep the 1 req/s forum budget busy while a response is
+    # still in flight. Persist stays at 1 by default: it geocodes against
+    # Nominatim's 1 req/s anyway, and a single writer classifies a topic listed
+    # under two regions against the already-committed first listing.
+    scraper_fetch_concurrency: int = Field(default=3, alias="SCRAPER_FETCH_CONCURRENCY")
+    scraper_parse_concurrency: int = Field(default=2, alias="SCRAPER_PARSE_CONCURRENCY")
+    scraper_persist_concurrency: int = Field(default=1, alias="SCRAPER_PERSIST_CONCURRENCY")
+    # Persist writes machines set-based in batches of up to this many, waiting at
+    # most the linger time for a batch to fill.
+    scraper_persist_batch_size: int = Field(default=200, alias="SCRAPER_PERSIST_BATCH_SIZE")
+    scraper_persist_linger_seconds: float = Field(
+        default=2.0, alias="SCRAPER_PERSIST_LINGER_SECONDS"
+    )
+    scraper_queue_size: int = Field(default=32, alias="SCRAPER_QUEUE_SIZE")
+    # Processes parsing HTML off the event loop (scraper and ai-extract); 0 parses
+    # inline. The parse stage runs at least this many workers to keep them busy.
+    scraper_parse_workers: int = Field(default=0, alias="SCRAPER_PARSE_WORKERS")
+    # Directory for the raw page archive (replayable with `scrape --replay`).
+    # Empty disables archiving.
+    scraper_archive_dir: str = Field(default="", alias="SCRAPER_ARCHIVE_DIR")
+    # Forum request rate (req/s): adapts between floor and ceiling, starting at
+    # 1 req/s. Errors, 429/503 and responses slower than SCRAPER_SLOW_RESPONSE_SECONDS
+    # halve it; healthy responses raise it slowly. Raise the ceiling only if the
+    # forum operator agrees.
+    scraper_rate_floor: float = Field(default=0.2, alias="SCRAPER_RATE_FLOOR")
+    scraper_rate_ceiling: float = Field(default=1.0, alias="SCRAPER_RATE_CEILING")
+    scraper_slow_response_seconds: float = Field(default=5.0, alias="SCRAPER_SLOW_RESPONSE_SECONDS")
+    # How often a scrape writes its progress for `scrape --resume`.
+    scraper_checkpoint_seconds: float = Field(default=30.0, alias="SCRAPER_CHECKPOINT_SECONDS")
+    # `scrape --resume` only adopts an unfinished run that wrote no checkpoint for
+    # this long: a run still checkpointing is alive and is left alone.
+    scraper_stale_run_seconds: float = Field(default=600.0, alias="SCRAPER_STALE_RUN_SECONDS")
+    # HTML parser backend: "lxml" (fast, subtree parsing) or "html.parser" (reference).
+    scraper_html_parser: Literal["html.parser", "lxml"] = Field(
+        default="lxml", alias="SCRAPER_HTML_PARSER"
+    )
+
+    # Shared HTTP clients (Nominatim, forum): connections kept per host and how
+    # long an idle one stays open. HTTP/2 needs the optional `h2` package, brotli
+    # responses the `brotli` package (`httpx[http2,brotli]`); without them the
+    # clients fall back to HTTP/1.1 and gzip.
+    http_max_connections: int = Field(default=10, alias="HTTP_MAX_CONNECTIONS")
+    http_keepalive_seconds: float = Field(default=30.0, alias="HTTP_KEEPALIVE_SECONDS")
+    http_http2: bool = Field(default=False, alias="HTTP_HTTP2")
 
     # AI extraction
     gemini_api_key: str = Field(default="", alias="GEMINI_API_KEY")
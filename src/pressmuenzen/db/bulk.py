@@ -0,0 +1,15 @@
+"""Chunking for multi-row statements."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+
+# Rows per multi-row statement; keeps the bind-parameter count well under
+# asyncpg's 32767 limit for the widest row we write.
+CHUNK_ROWS = 1000
+
+
+def chunked[T](rows: Sequence[T], size: int = CHUNK_ROWS) -> Iterator[Sequence[T]]:
+    """Consecutive slices of ``rows``, each at most ``size`` long."""
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
@@ -30,12 +30,18 @@ def lat_expr(geom: _GeomExpr) -> ColumnElement[float]:
     return func.ST_Y(geom)
 
 
-def distance_m(geom: _GeomExpr, coord: Coordinate) -> ColumnElement[float]:
-    """Great-circle distance in metres between a geometry column and a point.
+def geog_point(coord: Coordinate) -> ColumnElement[Any]:
+    """:func:`point_wkt` as ``geography``, to compare against geography columns."""
+    return func.cast(point_wkt(coord), geography())
 
-    Casts both to ``geography`` so the result is in metres on the spheroid.
+
+def distance_m(geog: _GeomExpr, coord: Coordinate) -> ColumnElement[float]:
+    """Distance in metres on the spheroid between a geography column and a point.
+
+    Pass the stored geography columns (``Machine.geog``, ``Watch.center_geog``):
+    casting a geometry column here would cast every row and defeat the index.
     """
-    return func.ST_Distance(func.cast(geom, geography()), func.cast(point_wkt(coord), geography()))
+    return func.ST_Distance(geog, geog_point(coord))
 
 
 def geography() -> Any:
@@ -1,7 +1,9 @@
 """SQLAlchemy ORM models -- the PostGIS schema from the rewrite plan (section 2.2).
 
-Geometry is stored as ``geometry(Point, 4326)``; distance queries cast to
-``geography`` so we get metres without projection headaches. Alembic owns the
+Geometry is stored as ``geometry(Point, 4326)``. Distance queries run on stored
+generated ``geography`` twins of those columns (``machines.geog``,
+``watches.center_geog``), so we get metres without projection headaches and a
+GiST index instead of a per-row cast. Alembic owns the
 schema; this module is the single source of truth the migrations track.
 """
 
@@ -9,19 +11,23 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from geoalchemy2 import Geometry
+from geoalchemy2 import Geography, Geometry
 from sqlalchemy import (
     BigInteger,
     Boolean,
+    Computed,
     DateTime,
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    Sequence,
     String,
     Text,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -60,6 +66,11 @@ def _point() -> Geometry:
     return Geometry(geometry_type="POINT", srid=4326, spatial_index=False)
 
 
+def _geography() -> Geography:
+    """A fresh PostGIS geography POINT type, for the same reason as ``_point``."""
+    return Geography(geometry_type="POINT", srid=4326, spatial_index=False)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -84,11 +95,22 @@ class Region(Base, TimestampMixin):
     machines: Mapped[list[Machine]] = relationship(back_populates="region")
 
 
+machine_id_seq = Sequence("machine_id_seq", start=1000, minvalue=1)
+
+
 class Machine(Base):
     __tablename__ = "machines"
+    __table_args__ = (Index("idx_machines_geog", "geog", postgresql_using="gist"),)
 
     # NB: id reuses the legacy loc_ID so existing /details <id> keeps working.
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    # New machines continue that range from machine_id_seq (see next_id()).
+    id: Mapped[int] = mapped_column(
+        Integer,
+        machine_id_seq,
+        server_default=machine_id_seq.next_value(),
+        primary_key=True,
+        autoincrement=False,
+    )
     source: Mapped[str] = mapped_column(String(64), default="elongated_coin", nullable=False)
     # Not unique: the legacy data lists the same forum topic under two regions
     # (e.g. a machine in both its region and the time-limited section), and we
@@ -103,6 +125,10 @@ class Machine(Base):
     )
     is_limited: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     geom: Mapped[str | None] = mapped_column(_point(), nullable=True)
+    # geom as geography, maintained by Postgres; indexed for radius and KNN queries.
+    geog: Mapped[str | None] = mapped_column(
+        _geography(), Computed("geom::geography", persisted=True), nullable=True, deferred=True
+    )
     gps_source: Mapped[GpsSource] = mapped_column(
         _gps_source_enum, default=GpsSource.NONE, nullable=False
     )
@@ -113,6 +139,11 @@ class Machine(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Topic-list activity seen when the topic was last fetched (incremental scrapes).
+    topic_last_activity_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    topic_reply_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     # AI extraction fields (populated by the nightly ai-extract job)
     ai_summary: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -184,12 +215,16 @@ class Visited(Base):
 
 class Watch(Base, TimestampMixin):
     __tablename__ = "watches"
+    __table_args__ = (Index("idx_watches_center_geog", "center_geog", postgresql_using="gist"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     center_geom: Mapped[str] = mapped_column(_point(), nullable=False)
+    center_geog: Mapped[str] = mapped_column(
+        _geography(), Computed("center_geom::geography", persisted=True), deferred=True
+    )
     radius_km: Mapped[float] = mapped_column(Float, nullable=False)
     active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
@@ -229,22 +264,136 @@ class ScrapeRun(Base):
     machines_added: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     machines_updated: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     machines_unchanged: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    topics_skipped: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    http_cache_hits: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    http_cache_misses: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    http_not_modified: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Forum requests/s the adaptive limiter actually allowed, and how often it backed off.
+    request_rate: Mapped[float | None] = mapped_column(Float, nullable=True)
+    rate_backoffs: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     errors_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Set when the rolling canary stopped the crawl: topics fetched until then, and why.
+    aborted_after_topics: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    abort_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Replays (``scrape --replay``) parse archived pages; resume and canary ignore them.
+    replay: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Last checkpoint write; ``scrape --resume`` only adopts runs quiet for a while.
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # The unfinished run this one picked up (``scrape --resume``).
+    resumed_from: Mapped[int | None] = mapped_column(
+        ForeignKey("scrape_runs.id", ondelete="SET NULL"), nullable=True
+    )
+
+
+class ScrapeCheckpoint(Base):
+    """Progress of a scrape run, so ``scrape --resume`` can continue it after a crash.
+
+    ``kind`` is "regions" (the discovered regions), "region" (one region's topic
+    listing), "topic" (a topic that reached its final outcome) or "stats" (the
+    run's counters); ``payload_json`` holds what a resumed run needs of it.
+    """
+
+    __tablename__ = "scrape_checkpoints"
+
+    run_id: Mapped[int] = mapped_column(
+        ForeignKey("scrape_runs.id", ondelete="CASCADE"), primary_key=True
+    )
+    kind: Mapped[str] = mapped_column(String(16), primary_key=True)
+    key: Mapped[str] = mapped_column(String(1024), primary_key=True)
+    payload_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class HttpValidator(Base):
+    """ETag/Last-Modified of a forum page as of the last healthy scrape."""
+
+    __tablename__ = "http_validators"
+
+    url: Mapped[str] = mapped_column(String(1024), primary_key=True)
+    etag: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
 
 
 class GeocodeCache(Base, TimestampMixin):
     __tablename__ = "geocode_cache"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # The query's geocode_key(), not the spelling that was sent to the provider.
     query: Mapped[str] = mapped_column(String(512), unique=True, nullable=False)
     geom: Mapped[str | None] = mapped_column(_point(), nullable=True)
     provider: Mapped[str] = mapped_column(String(64), default="nominatim", nullable=False)
+    # When the provider last answered this query; cached misses are asked again
+    # once this is older than GEOCODE_NEGATIVE_TTL_DAYS.
+    checked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class GazetteerPlace(Base):
+    """A place from a GeoNames dump, for geocoding place names without the network.
+
+    ``name_key`` is the name folded by :func:`pressmuenzen.db.repositories.gazetteer.place_key`;
+    it carries a trigram index (fuzzy matches) and a ``text_pattern_ops`` index
+    (prefix matches).
+    """
+
+    __tablename__ = "gazetteer_places"
+    __table_args__ = (
+        Index(
+            "idx_gazetteer_name_trgm",
+            "name_key",
+            postgresql_using="gin",
+            postgresql_ops={"name_key": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_gazetteer_name_prefix",
+            "name_key",
+            postgresql_ops={"name_key": "text_pattern_ops"},
+        ),
+    )
+
+    geonameid: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    name_key: Mapped[str] = mapped_column(String(200), nullable=False)
+    feature_class: Mapped[str] = mapped_column(String(1), nullable=False)
+    country_code: Mapped[str] = mapped_column(String(2), nullable=False)
+    population: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    geom: Mapped[str] = mapped_column(_point(), nullable=False)
+
+
+class RateLimitSlot(Base):
+    """A rate limit shared by all processes: the earliest start of its next request."""
+
+    __tablename__ = "rate_limit_slots"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    next_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+# Numbers each batch of notifications sent together; a digest's map link names it.
+notification_batch_seq = Sequence("notification_batch_seq")
 
 
 class NotificationSent(Base):
+    """A (user, machine) notification, recorded before it is sent.
+
+    ``sent_at`` is NULL until Telegram accepted the message; a pending row whose
+    ``claimed_at`` is old was left behind by a crashed worker and is sent again.
+    """
+
     __tablename__ = "notifications_sent"
     __table_args__ = (
         UniqueConstraint("user_id", "machine_id", "kind", name="uq_notification_idem"),
+        Index(
+            "ix_notifications_sent_pending",
+            "claimed_at",
+            postgresql_where=text("sent_at IS NULL"),
+        ),
+        Index("ix_notifications_sent_user_batch", "user_id", "batch_id"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -253,7 +402,32 @@ class NotificationSent(Base):
         ForeignKey("machines.id", ondelete="CASCADE"), nullable=False
     )
     kind: Mapped[str] = mapped_column(String(32), nullable=False)
-    sent_at: Mapped[datetime] = mapped_column(
+    claimed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # From notification_batch_seq; the digest map of a user's batch lists its machines.
+    batch_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+
+class NotificationOutbox(Base):
+    """A new machine whose watch notifications the notify-worker has yet to send.
+
+    Written in the transaction that inserts the machine. Rows of a scrape run
+    are only drained once that run finished ``ok`` (the canary passed).
+    """
+
+    __tablename__ = "notification_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    machine_id: Mapped[int] = mapped_column(
+        ForeignKey("machines.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    scrape_run_id: Mapped[int | None] = mapped_column(
+        ForeignKey("scrape_runs.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
@@ -0,0 +1,90 @@
+"""Rate limits shared by every process through the database.
+
+Nominatim allows one request per second from the whole deployment, and bot,
+web, scraper and ai-extract each used to pace themselves alone. A
+:class:`SharedRateLimiter` keeps one row in ``rate_limit_slots`` holding the
+earliest time its next request may start. Taking a slot moves that time one
+interval on in a single statement, so no two requests get the same slot. The
+statement runs on its own autocommitted connection: inside the caller's
+transaction the row lock would be held until that transaction ends.
+
+Interactive callers always take the next free slot, even one in the future.
+Batch callers only take a slot that is free right now; otherwise they wait and
+try again. A user's lookup therefore waits behind at most one batch request,
+and batch work fills the slots nobody else wants. A batch request a user ends
+up waiting for (a shared geocode lookup) is promoted through its ``urgent``
+event and from then on queues like an interactive one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+from datetime import timedelta
+
+from sqlalchemy import Interval, bindparam, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from pressmuenzen.db.engine import get_engine
+from pressmuenzen.db.models import RateLimitSlot
+
+
+class SharedRateLimiter:
+    def __init__(self, name: str, interval: float, *, engine: AsyncEngine | None = None) -> None:
+        self.name = name
+        self.interval = interval
+        self._engine = engine
+
+    async def acquire(self, *, batch: bool = False, urgent: asyncio.Event | None = None) -> float:
+        """Wait for a slot; returns the seconds waited.
+
+        Once ``urgent`` is set, a batch caller stops yielding to interactive ones.
+        """
+        loop = asyncio.get_running_loop()
+        waited = 0.0
+        while True:
+            if urgent is not None and urgent.is_set():
+                batch = False
+            wait, taken = await self._take(batch=batch)
+            if wait > 0:
+                started = loop.time()
+                if taken or urgent is None:
+                    await asyncio.sleep(wait)
+                else:
+                    # Retry as soon as the caller is promoted, not after the wait.
+                    with suppress(TimeoutError):
+                        await asyncio.wait_for(urgent.wait(), wait)
+                waited += loop.time() - started
+            if taken:
+                return waited
+
+    async def _take(self, *, batch: bool) -> tuple[float, bool]:
+        """``(seconds until the slot, whether it is ours)`` for one attempt."""
+        step = bindparam("step", timedelta(seconds=self.interval), type_=Interval)
+        now = func.clock_timestamp()
+        stmt = (
+            insert(RateLimitSlot)
+            .values(name=self.name, next_at=now + step)
+            .on_conflict_do_update(
+                index_elements=[RateLimitSlot.name],
+                set_={"next_at": func.greatest(RateLimitSlot.next_at, now) + step},
+                # Batch callers never queue up ahead of interactive ones.
+                where=(RateLimitSlot.next_at <= now) if batch else None,
+            )
+            .returning(func.extract("epoch", RateLimitSlot.next_at - step - now))
+        )
+        engine = self._engine or get_engine()
+        async with engine.connect() as conn:
+            wait = (await conn.execute(stmt)).scalar_one_or_none()
+            taken = wait is not None
+            if wait is None:  # a batch caller found the next slot already taken
+                wait = (
+                    await conn.execute(
+                        select(func.extract("epoch", RateLimitSlot.next_at - now)).where(
+                            RateLimitSlot.name == self.name
+                        )
+                    )
+                ).scalar_one()
+            await conn.commit()
+        return max(float(wait), 0.0), taken
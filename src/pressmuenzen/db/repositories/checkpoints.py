@@ -0,0 +1,78 @@
+"""Scrape checkpoints: the progress ``scrape --resume`` continues from."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import UTC, datetime
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pressmuenzen.db.bulk import chunked
+from pressmuenzen.db.models import NotificationOutbox, ScrapeCheckpoint, ScrapeRun
+
+
+class ScrapeCheckpointRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def save(self, run_id: int, entries: Mapping[tuple[str, str], str | None]) -> None:
+        """Upsert ``(kind, key) -> payload_json`` checkpoints of ``run_id``.
+
+        Also the run's heartbeat: a run that keeps checkpointing is alive.
+        """
+        await self.session.execute(
+            update(ScrapeRun).where(ScrapeRun.id == run_id).values(heartbeat_at=func.now())
+        )
+        rows = [
+            {"run_id": run_id, "kind": kind, "key": key, "payload_json": payload}
+            for (kind, key), payload in entries.items()
+        ]
+        for chunk in chunked(rows):
+            stmt = insert(ScrapeCheckpoint).values(chunk)
+            await self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[
+                        ScrapeCheckpoint.run_id,
+                        ScrapeCheckpoint.kind,
+                        ScrapeCheckpoint.key,
+                    ],
+                    set_={"payload_json": stmt.excluded.payload_json},
+                )
+            )
+
+    async def load(self, run_id: int) -> dict[tuple[str, str], str | None]:
+        rows = await self.session.execute(
+            select(
+                ScrapeCheckpoint.kind, ScrapeCheckpoint.key, ScrapeCheckpoint.payload_json
+            ).where(ScrapeCheckpoint.run_id == run_id)
+        )
+        return {(kind, key): payload for kind, key, payload in rows.all()}
+
+    async def clear(self, run_id: int) -> None:
+        await self.session.execute(
+            delete(ScrapeCheckpoint).where(ScrapeCheckpoint.run_id == run_id)
+        )
+
+    async def adopt(self, old_run_id: int, new_run_id: int) -> None:
+        """Move an unfinished run's progress and pending notifications to its successor.
+
+        The old run is closed as "resumed"; its new machines are notified once
+        the new run passes the canary.
+        """
+        await self.session.execute(
+            update(ScrapeCheckpoint)
+            .where(ScrapeCheckpoint.run_id == old_run_id)
+            .values(run_id=new_run_id)
+        )
+        await self.session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.scrape_run_id == old_run_id)
+            .values(scrape_run_id=new_run_id)
+        )
+        await self.session.execute(
+            update(ScrapeRun)
+            .where(ScrapeRun.id == old_run_id)
+            .values(status="resumed", finished_at=datetime.now(UTC))
+        )
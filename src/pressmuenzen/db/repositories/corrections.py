@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
+
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -84,17 +86,49 @@ class ScrapeRunRepository:
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    async def start(self, mode: str) -> ScrapeRun:
-        run = ScrapeRun(mode=mode, status="running")
+    async def start(
+        self, mode: str, resumed_from: int | None = None, *, replay: bool = False
+    ) -> ScrapeRun:
+        run = ScrapeRun(mode=mode, status="running", resumed_from=resumed_from, replay=replay)
         self.session.add(run)
         await self.session.flush()
         return run
 
+    async def last_unfinished(self, stale_after: timedelta) -> ScrapeRun | None:
+        """The most recent run that never finished and has been quiet for ``stale_after``.
+
+        A run still checkpointing (or started only just now) is alive in some
+        other process and is not returned; neither are replays. The row stays
+        locked until the caller's transaction ends, so two resumes never adopt
+        the same run.
+        """
+        rows = await self.session.execute(
+            select(ScrapeRun)
+            .where(
+                ScrapeRun.status == "running",
+                ScrapeRun.finished_at.is_(None),
+                ScrapeRun.replay.is_(False),
+                func.coalesce(ScrapeRun.heartbeat_at, ScrapeRun.started_at)
+                < func.now() - stale_after,
+            )
+            .order_by(ScrapeRun.started_at.desc(), ScrapeRun.id.desc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        return rows.scalar_one_or_none()
+
     async def trailing_parse_rate(self, limit: int = 5) -> float | None:
-        """Average parse-success-rate over the last successful runs (for the canary)."""
+        """Average parse-success-rate over the last successful runs (for the canary).
+
+        Replays are left out: they parse archived pages, not today's forum.
+        """
         rows = await self.session.execute(
             select(ScrapeRun.parse_success_rate)
-            .where(ScrapeRun.parse_success_rate.isnot(None), ScrapeRun.status == "ok")
+            .where(
+                ScrapeRun.parse_success_rate.isnot(None),
+                ScrapeRun.status == "ok",
+                ScrapeRun.replay.is_(False),
+            )
             .order_by(ScrapeRun.started_at.desc())
             .limit(limit)
         )
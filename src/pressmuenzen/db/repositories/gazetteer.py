@@ -0,0 +1,93 @@
+"""Offline place-name lookups against a GeoNames dump loaded into PostGIS."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pressmuenzen.db.bulk import chunked
+from pressmuenzen.db.geo import lat_expr, lon_expr, point_wkt
+from pressmuenzen.db.models import GazetteerPlace
+from pressmuenzen.domain.geocode_key import geocode_key
+from pressmuenzen.domain.models import Coordinate
+
+
+def place_key(name: str) -> str:
+    """The form place names are stored and looked up in (the geocode cache key)."""
+    return geocode_key(name)
+
+
+class GazetteerRepository:
+    """Exact, then word-prefix, then trigram-similar name matches.
+
+    Populated places come before other features of the same name, and larger
+    places before smaller ones, so ``Bonn`` is the city and not a street.
+    """
+
+    name = "gazetteer"
+
+    def __init__(self, session: AsyncSession, *, min_similarity: float = 0.6) -> None:
+        self.session = session
+        self.min_similarity = min_similarity
+
+    async def lookup(self, query: str) -> Coordinate | None:
+        key = place_key(query)
+        if not key:
+            return None
+        rank = (
+            case((GazetteerPlace.feature_class == "P", 0), else_=1),
+            GazetteerPlace.population.desc(),
+            GazetteerPlace.geonameid,
+        )
+        escaped = key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        similarity = func.similarity(GazetteerPlace.name_key, key)
+        for condition, order in (
+            (GazetteerPlace.name_key == key, rank),
+            # "frankfurt" -> "frankfurt am main"; a literal pattern keeps the
+            # text_pattern_ops index usable.
+            (GazetteerPlace.name_key.like(f"{escaped} %", escape="\\"), rank),
+            (
+                GazetteerPlace.name_key.op("%")(key) & (similarity >= self.min_similarity),
+                (similarity.desc(), *rank),
+            ),
+        ):
+            row = (
+                await self.session.execute(
+                    select(lat_expr(GazetteerPlace.geom), lon_expr(GazetteerPlace.geom))
+                    .where(condition)
+                    .order_by(*order)
+                    .limit(1)
+                )
+            ).first()
+            if row is not None:
+                return Coordinate(lat=row[0], lon=row[1])
+        return None
+
+    async def replace_all(
+        self, places: Sequence[tuple[int, str, str, str, int, Coordinate]]
+    ) -> int:
+        """Swap the table's content for ``(geonameid, name, feature_class, country, population, coord)``."""
+        await self.session.execute(delete(GazetteerPlace))
+        for chunk in chunked(places):
+            await self.session.execute(
+                insert(GazetteerPlace)
+                .values(
+                    [
+                        {
+                            "geonameid": geonameid,
+                            "name": name,
+                            "name_key": place_key(name),
+                            "feature_class": feature_class,
+                            "country_code": country,
+                            "population": population,
+                            "geom": point_wkt(coord),
+                        }
+                        for geonameid, name, feature_class, country, population, coord in chunk
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=[GazetteerPlace.geonameid])
+            )
+        return len(places)
@@ -0,0 +1,44 @@
+"""HTTP validator (ETag / Last-Modified) persistence for conditional forum GETs."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pressmuenzen.db.bulk import chunked
+from pressmuenzen.db.models import HttpValidator
+
+
+class HttpValidatorRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def load_all(self) -> dict[str, tuple[str | None, str | None]]:
+        """``url -> (etag, last_modified)`` for every stored page, in one query."""
+        rows = await self.session.execute(
+            select(HttpValidator.url, HttpValidator.etag, HttpValidator.last_modified)
+        )
+        return {url: (etag, last_modified) for url, etag, last_modified in rows.all()}
+
+    async def store(self, validators: Mapping[str, tuple[str | None, str | None]]) -> None:
+        """Upsert validators in bulk. Pages without any validator are dropped."""
+        values = [
+            {"url": url, "etag": etag, "last_modified": last_modified}
+            for url, (etag, last_modified) in validators.items()
+            if etag or last_modified
+        ]
+        for chunk in chunked(values):
+            stmt = insert(HttpValidator).values(chunk)
+            await self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[HttpValidator.url],
+                    set_={
+                        "etag": stmt.excluded.etag,
+                        "last_modified": stmt.excluded.last_modified,
+                        "updated_at": func.now(),
+                    },
+                )
+            )
@@ -2,15 +2,38 @@
 
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 from datetime import UTC, datetime, timedelta
-from typing import Any
+from typing import Any, cast
 
-from sqlalchemy import delete, func, select
+from sqlalchemy import (
+    ColumnElement,
+    CursorResult,
+    Integer,
+    Select,
+    String,
+    Subquery,
+    any_,
+    bindparam,
+    case,
+    column,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy import cast as sql_cast
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from pressmuenzen.db.geo import distance_m, geography, lat_expr, lon_expr, point_wkt
-from pressmuenzen.db.models import CoordinateCandidate, Machine, Region
+from pressmuenzen.db.bulk import chunked
+from pressmuenzen.db.geo import distance_m, geog_point, lat_expr, lon_expr, point_wkt
+from pressmuenzen.db.models import CoordinateCandidate, Machine, Region, machine_id_seq
 from pressmuenzen.domain.models import (
     CandidateInput,
     Coordinate,
@@ -38,6 +61,79 @@ def _row_to_hit(row: Sequence[Any], distance_m_value: float | None = None) -> Ma
     )
 
 
+def _hits_query(origin: Coordinate) -> Select[Machine, str, float, float, float]:
+    return (
+        select(
+            Machine,
+            Region.name,
+            lat_expr(Machine.geom),
+            lon_expr(Machine.geom),
+            distance_m(Machine.geog, origin),
+        )
+        .outerjoin(Region, Machine.region_id == Region.id)
+        .where(Machine.geog.isnot(None), Machine.status != MachineStatus.GONE)
+    )
+
+
+def _nearest_stmt(origin: Coordinate, n: int) -> Select[Machine, str, float, float, float]:
+    """The :meth:`MachineRepository.nearest_n` query: a KNN scan of ``idx_machines_geog``."""
+    return _hits_query(origin).order_by(Machine.geog.op("<->")(geog_point(origin))).limit(n)
+
+
+def _within_radius_stmt(
+    origin: Coordinate, radius_km: float
+) -> Select[Machine, str, float, float, float]:
+    """The :meth:`MachineRepository.within_radius_km` query.
+
+    ``ST_DWithin`` on the stored geography column with a constant radius is
+    answered from ``idx_machines_geog``; the exact distance check follows.
+    """
+    return (
+        _hits_query(origin)
+        .where(func.ST_DWithin(Machine.geog, geog_point(origin), radius_km * 1000.0))
+        .order_by(distance_m(Machine.geog, origin))
+    )
+
+
+def _precedence() -> ColumnElement[int]:
+    """``GpsSource.precedence`` of a candidate's source, as SQL."""
+    return case(
+        *((CoordinateCandidate.source == source, source.precedence) for source in GpsSource),
+        else_=GpsSource.NONE.precedence,
+    )
+
+
+def _resolved_geoms(machine_ids: Sequence[int] | None) -> Subquery:
+    """``(id, gps_source, geom)`` per machine: :func:`resolve` as one SQL query.
+
+    ``DISTINCT ON (machine_id)`` keeps each machine's first candidate in
+    precedence order; equal precedence goes to the oldest candidate, the one
+    ``resolve`` keeps. Machines without a usable candidate get ``(none, NULL)``.
+    ``None`` covers the whole catalogue.
+    """
+    best = select(
+        CoordinateCandidate.machine_id, CoordinateCandidate.source, CoordinateCandidate.geom
+    ).where(CoordinateCandidate.source != GpsSource.NONE)
+    if machine_ids is not None:
+        ids = bindparam("ids", list(machine_ids), type_=ARRAY(Integer))
+        best = best.where(CoordinateCandidate.machine_id == any_(ids))
+    best_sq = (
+        best.distinct(CoordinateCandidate.machine_id)
+        .order_by(CoordinateCandidate.machine_id, _precedence(), CoordinateCandidate.id)
+        .subquery("best")
+    )
+    machines = Machine.__table__.alias("m")
+    none = literal(GpsSource.NONE, machines.c.gps_source.type)
+    resolved = select(
+        machines.c.id,
+        func.coalesce(best_sq.c.source, none).label("gps_source"),
+        best_sq.c.geom,
+    ).select_from(machines.outerjoin(best_sq, best_sq.c.machine_id == machines.c.id))
+    if machine_ids is not None:
+        resolved = resolved.where(machines.c.id == any_(ids))
+    return resolved.subquery("resolved")
+
+
 class MachineRepository:
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
@@ -64,10 +160,50 @@ class MachineRepository:
             .first()
         )
 
+    async def topic_activity(self) -> dict[str, tuple[datetime | None, int | None]]:
+        """``source_url -> (topic_last_activity_at, topic_reply_count)`` for every machine.
+
+        One query, loaded up front by an incremental scrape to decide which
+        topics need fetching. Duplicate URLs resolve to the lowest id, matching
+        :meth:`get_by_url`.
+        """
+        rows = await self.session.execute(
+            select(
+                Machine.source_url, Machine.topic_last_activity_at, Machine.topic_reply_count
+            ).order_by(Machine.id.desc())
+        )
+        return {url: (activity, replies) for url, activity, replies in rows.all()}
+
+    async def url_index(self) -> dict[str, tuple[int, str | None]]:
+        """``source_url -> (id, content_hash)`` for every machine, in one query.
+
+        Preloaded by the scraper so the batched persist stage can classify scraped
+        topics as new/changed/unchanged without a lookup per topic. Duplicate
+        URLs resolve to the lowest id, matching :meth:`get_by_url`.
+        """
+        rows = await self.session.execute(
+            select(Machine.source_url, Machine.id, Machine.content_hash).order_by(Machine.id.desc())
+        )
+        return {url: (machine_id, content_hash) for url, machine_id, content_hash in rows.all()}
+
     async def next_id(self) -> int:
         """Allocate the next machine id, continuing the legacy loc_ID sequence."""
-        max_id = (await self.session.execute(select(func.max(Machine.id)))).scalar()
-        return (max_id or 999) + 1
+        return (await self.allocate_ids(1))[0]
+
+    async def allocate_ids(self, count: int) -> list[int]:
+        """Allocate ``count`` machine ids from ``machine_id_seq`` in one round trip."""
+        if count < 1:
+            return []
+        rows = await self.session.execute(
+            select(machine_id_seq.next_value()).select_from(func.generate_series(1, count))
+        )
+        return sorted(rows.scalars().all())
+
+    async def sync_id_sequence(self) -> None:
+        """Move ``machine_id_seq`` past the highest id (after explicit-id inserts)."""
+        await self.session.execute(
+            text("SELECT setval('machine_id_seq', GREATEST((SELECT max(id) FROM machines), 999))")
+        )
 
     async def get_hit(self, machine_id: int) -> MachineHit | None:
         stmt = (
@@ -87,6 +223,22 @@ class MachineRepository:
         rows = (await self.session.execute(stmt)).all()
         return [_row_to_hit(r) for r in rows]
 
+    async def hits_by_ids(self, machine_ids: Sequence[int]) -> list[MachineHit]:
+        """The given machines as map hits, in id order; GONE and unplaced ones are left out."""
+        ids = bindparam("ids", list(machine_ids), type_=ARRAY(Integer))
+        stmt = (
+            select(Machine, Region.name, lat_expr(Machine.geom), lon_expr(Machine.geom))
+            .outerjoin(Region, Machine.region_id == Region.id)
+            .where(
+                Machine.id == any_(ids),
+                Machine.geom.isnot(None),
+                Machine.status != MachineStatus.GONE,
+            )
+            .order_by(Machine.id)
+        )
+        rows = (await self.session.execute(stmt)).all()
+        return [_row_to_hit(r) for r in rows]
+
     async def search_by_name(self, query: str, limit: int = 25) -> list[MachineTextMatch]:
         """Case-insensitive substring search over machine names (titles).
 
@@ -116,35 +268,12 @@ class MachineRepository:
 
     async def nearest_n(self, origin: Coordinate, n: int) -> list[MachineHit]:
         """N nearest machines, ordered by distance, using the KNN (<->) operator."""
-        dist = distance_m(Machine.geom, origin)
-        stmt = (
-            select(Machine, Region.name, lat_expr(Machine.geom), lon_expr(Machine.geom), dist)
-            .outerjoin(Region, Machine.region_id == Region.id)
-            .where(Machine.geom.isnot(None), Machine.status != MachineStatus.GONE)
-            .order_by(Machine.geom.op("<->")(point_wkt(origin)))
-            .limit(n)
-        )
-        rows = (await self.session.execute(stmt)).all()
+        rows = (await self.session.execute(_nearest_stmt(origin, n))).all()
         return [_row_to_hit(r[:4], r[4]) for r in rows]
 
     async def within_radius_km(self, origin: Coordinate, radius_km: float) -> list[MachineHit]:
         """All machines within ``radius_km``, ordered by distance (ST_DWithin)."""
-        dist = distance_m(Machine.geom, origin)
-        stmt = (
-            select(Machine, Region.name, lat_expr(Machine.geom), lon_expr(Machine.geom), dist)
-            .outerjoin(Region, Machine.region_id == Region.id)
-            .where(
-                Machine.geom.isnot(None),
-                Machine.status != MachineStatus.GONE,
-                func.ST_DWithin(
-                    func.cast(Machine.geom, geography()),
-                    func.cast(point_wkt(origin), geography()),
-                    radius_km * 1000.0,
-                ),
-            )
-            .order_by(dist)
-        )
-        rows = (await self.session.execute(stmt)).all()
+        rows = (await self.session.execute(_within_radius_stmt(origin, radius_km))).all()
         return [_row_to_hit(r[:4], r[4]) for r in rows]
 
     async def stale(self, threshold_days: int) -> list[Machine]:
@@ -177,6 +306,78 @@ class MachineRepository:
         await self.session.flush()
         return machine
 
+    async def touch_seen(self, source_urls: Sequence[str]) -> int:
+        """Refresh ``last_seen_at`` for every machine listed under ``source_urls``.
+
+        One ``UPDATE ... WHERE source_url = ANY(:urls)`` with the URLs bound as a
+        single array, however many there are.
+        """
+        if not source_urls:
+            return 0
+        urls = bindparam("urls", list(dict.fromkeys(source_urls)), type_=ARRAY(String))
+        result = cast(
+            "CursorResult[Any]",
+            await self.session.execute(
+                update(Machine)
+                .where(Machine.source_url == any_(urls))
+                .values(last_seen_at=func.now())
+                .execution_options(synchronize_session=False)
+            ),
+        )
+        return result.rowcount
+
+    async def insert_many(self, rows: Sequence[Mapping[str, Any]]) -> None:
+        """Multi-row INSERT of new machines; ids must already be allocated."""
+        for chunk in chunked(rows):
+            await self.session.execute(insert(Machine).values(list(chunk)))
+
+    async def update_many(self, rows: Sequence[Mapping[str, Any]]) -> None:
+        """Set-based ``UPDATE machines ... FROM (VALUES ...)`` keyed by ``id``.
+
+        Every row must carry the same keys: ``id`` plus the columns to set.
+        ``last_seen_at`` is left alone: the scrape refreshes it for every seen
+        topic at once via :meth:`touch_seen`.
+        Bulk path: ORM objects already loaded in the session are not refreshed.
+        """
+        if not rows:
+            return
+        names = list(rows[0])
+        table = Machine.__table__
+        for chunk in chunked(rows):
+            data = values(*(column(n, table.c[n].type) for n in names), name="v").data(
+                [tuple(row[n] for n in names) for row in chunk]
+            )
+            # Explicit casts: a VALUES column that is NULL in every row is typed
+            # text by Postgres, which would not assign to e.g. a timestamptz.
+            assignments = {n: sql_cast(data.c[n], table.c[n].type) for n in names if n != "id"}
+            await self.session.execute(
+                update(Machine)
+                .where(Machine.id == data.c.id)
+                .values(**assignments)
+                .execution_options(synchronize_session=False)
+            )
+
+    async def region_ids(self, regions: Sequence[tuple[str, str, bool]]) -> dict[str, int]:
+        """``forum_url -> region id`` for ``(forum_url, name, is_limited)``, creating missing ones."""
+        if not regions:
+            return {}
+        await self.session.execute(
+            insert(Region)
+            .values(
+                [
+                    {"source_forum_url": url, "name": name, "is_limited_section": limited}
+                    for url, name, limited in regions
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[Region.source_forum_url])
+        )
+        rows = await self.session.execute(
+            select(Region.source_forum_url, Region.id).where(
+                Region.source_forum_url.in_([url for url, _, _ in regions])
+            )
+        )
+        return dict(rows.all())
+
     async def upsert_region(
         self, source_forum_url: str, name: str, is_limited_section: bool
     ) -> Region:
@@ -208,13 +409,48 @@ class MachineRepository:
         )
         await self.session.flush()
 
+    async def add_candidates(
+        self, rows: Sequence[tuple[int, GpsSource, Coordinate, str | None]]
+    ) -> None:
+        """Multi-row insert of ``(machine_id, source, coordinate, raw_text)`` candidates."""
+        for chunk in chunked(rows):
+            await self.session.execute(
+                insert(CoordinateCandidate).values(
+                    [
+                        {
+                            "machine_id": machine_id,
+                            "source": source,
+                            "geom": point_wkt(coord),
+                            "raw_text": raw_text,
+                        }
+                        for machine_id, source, coord, raw_text in chunk
+                    ]
+                )
+            )
+
+    async def machines_with_source(self, machine_ids: Sequence[int], source: GpsSource) -> set[int]:
+        """The subset of ``machine_ids`` holding at least one ``source`` candidate."""
+        if not machine_ids:
+            return set()
+        rows = await self.session.execute(
+            select(CoordinateCandidate.machine_id)
+            .where(
+                CoordinateCandidate.machine_id.in_(list(machine_ids)),
+                CoordinateCandidate.source == source,
+            )
+            .distinct()
+        )
+        return set(rows.scalars().all())
+
     async def list_candidates(self, machine_id: int) -> list[CandidateInput]:
         stmt = select(
             CoordinateCandidate.source,
             lat_expr(CoordinateCandidate.geom),
             lon_expr(CoordinateCandidate.geom),
         ).where(CoordinateCandidate.machine_id == machine_id)
-        rows = (await self.session.execute(stmt)).all()
+        # Oldest first: resolve() keeps the first of equal-precedence candidates,
+        # and the set-based recompute breaks ties the same way.
+        rows = (await self.session.execute(stmt.order_by(CoordinateCandidate.id))).all()
         return [
             CandidateInput(source=source, coordinate=Coordinate(lat=lat, lon=lon))
             for source, lat, lon in rows
@@ -223,7 +459,8 @@ class MachineRepository:
     async def recompute_geom(self, machine_id: int) -> None:
         """Recompute and persist the chosen geom/gps_source from all candidates.
 
-        This is the only writer of ``machines.geom``/``machines.gps_source``.
+        This and :meth:`recompute_geoms` are the only writers of
+        ``machines.geom``/``machines.gps_source``.
         """
         candidates = await self.list_candidates(machine_id)
         coord, source = resolve(candidates)
@@ -234,6 +471,76 @@ class MachineRepository:
         machine.geom = point_wkt(coord) if coord is not None else None
         await self.session.flush()
 
+    async def recompute_geoms(self, machine_ids: Sequence[int]) -> int:
+        """:meth:`recompute_geom` for many machines in one set-based statement.
+
+        Returns the number of machines whose geom/gps_source actually changed.
+        """
+        if not machine_ids:
+            return 0
+        return await self._write_resolved(machine_ids)
+
+    async def recompute_all_geoms(self) -> int:
+        """:meth:`recompute_geoms` over the whole catalogue."""
+        return await self._write_resolved(None)
+
+    async def _write_resolved(self, machine_ids: Sequence[int] | None) -> int:
+        resolved = _resolved_geoms(machine_ids)
+        result = cast(
+            "CursorResult[Any]",
+            await self.session.execute(
+                update(Machine)
+                .where(
+                    Machine.id == resolved.c.id,
+                    # Rows already holding their resolved coordinate are not rewritten.
+                    or_(
+                        Machine.gps_source != resolved.c.gps_source,
+                        Machine.geom.is_distinct_from(resolved.c.geom),
+                    ),
+                )
+                .values(geom=resolved.c.geom, gps_source=resolved.c.gps_source)
+                .execution_options(synchronize_session=False)
+            ),
+        )
+        return result.rowcount
+
+    async def resolved_geoms(
+        self, machine_ids: Sequence[int] | None = None
+    ) -> dict[int, tuple[Coordinate | None, GpsSource]]:
+        """What :meth:`recompute_geoms` would write, read without writing it."""
+        resolved = _resolved_geoms(machine_ids)
+        rows = await self.session.execute(
+            select(
+                resolved.c.id,
+                resolved.c.gps_source,
+                lat_expr(resolved.c.geom),
+                lon_expr(resolved.c.geom),
+            )
+        )
+        return {
+            machine_id: (Coordinate(lat=lat, lon=lon) if lat is not None else None, source)
+            for machine_id, source, lat, lon in rows.all()
+        }
+
+    async def candidates_by_machine(
+        self, machine_ids: Sequence[int] | None = None
+    ) -> dict[int, list[CandidateInput]]:
+        """:meth:`list_candidates` for many machines (all of them by default), one read."""
+        stmt = select(
+            CoordinateCandidate.machine_id,
+            CoordinateCandidate.source,
+            lat_expr(CoordinateCandidate.geom),
+            lon_expr(CoordinateCandidate.geom),
+        ).order_by(CoordinateCandidate.machine_id, CoordinateCandidate.id)
+        if machine_ids is not None:
+            stmt = stmt.where(CoordinateCandidate.machine_id.in_(list(machine_ids)))
+        by_machine: dict[int, list[CandidateInput]] = {}
+        for machine_id, source, lat, lon in (await self.session.execute(stmt)).all():
+            by_machine.setdefault(machine_id, []).append(
+                CandidateInput(source=source, coordinate=Coordinate(lat=lat, lon=lon))
+            )
+        return by_machine
+
     async def clear_candidates_of_source(self, machine_id: int, source: GpsSource) -> None:
         await self.session.execute(
             delete(CoordinateCandidate).where(
@@ -242,6 +549,17 @@ class MachineRepository:
             )
         )
 
+    async def clear_candidates_many(self, pairs: Sequence[tuple[int, GpsSource]]) -> None:
+        """:meth:`clear_candidates_of_source` for many ``(machine_id, source)`` pairs."""
+        for chunk in chunked(pairs):
+            await self.session.execute(
+                delete(CoordinateCandidate).where(
+                    tuple_(CoordinateCandidate.machine_id, CoordinateCandidate.source).in_(
+                        list(chunk)
+                    )
+                )
+            )
+
     async def ungeocoded(self, limit: int) -> list[Machine]:
         """Return up to ``limit`` active machines with no geometry, in random order."""
         rows = await self.session.execute(
@@ -0,0 +1,84 @@
+"""Notification outbox: pending notifications written alongside the machines."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import timedelta
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pressmuenzen.db.bulk import chunked
+from pressmuenzen.db.models import NotificationOutbox, ScrapeRun
+
+
+class NotificationOutboxRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def enqueue(
+        self, machine_ids: Sequence[int], kind: str, scrape_run_id: int | None = None
+    ) -> None:
+        """Queue notifications for ``machine_ids``; call in the transaction that adds them."""
+        for chunk in chunked(machine_ids):
+            await self.session.execute(
+                insert(NotificationOutbox).values(
+                    [
+                        {"machine_id": mid, "kind": kind, "scrape_run_id": scrape_run_id}
+                        for mid in chunk
+                    ]
+                )
+            )
+
+    async def claim(self, limit: int) -> list[tuple[int, int, str]]:
+        """Lock up to ``limit`` releasable rows as ``(id, machine_id, kind)``, oldest first.
+
+        ``FOR UPDATE SKIP LOCKED``: rows another worker holds are passed over, so
+        workers run side by side without ever claiming the same row. The locks
+        last until the caller's transaction ends: keep that transaction short.
+        """
+        rows = await self.session.execute(
+            select(NotificationOutbox.id, NotificationOutbox.machine_id, NotificationOutbox.kind)
+            .outerjoin(ScrapeRun, ScrapeRun.id == NotificationOutbox.scrape_run_id)
+            .where(or_(NotificationOutbox.scrape_run_id.is_(None), ScrapeRun.status == "ok"))
+            .order_by(NotificationOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=NotificationOutbox)
+        )
+        return [(row_id, machine_id, kind) for row_id, machine_id, kind in rows.all()]
+
+    async def remove(self, ids: Sequence[int]) -> None:
+        if ids:
+            await self.session.execute(
+                delete(NotificationOutbox).where(NotificationOutbox.id.in_(list(ids)))
+            )
+
+    async def discard_run(self, scrape_run_id: int) -> int:
+        """Drop the pending notifications of a scrape run the canary rejected."""
+        result = cast(
+            "CursorResult[Any]",
+            await self.session.execute(
+                delete(NotificationOutbox).where(NotificationOutbox.scrape_run_id == scrape_run_id)
+            ),
+        )
+        return result.rowcount
+
+    async def expire_dead_runs(self, max_age: timedelta) -> int:
+        """Drop the pending notifications of runs unfinished after ``max_age``.
+
+        A scrape that crashed and was never resumed never reaches "ok", so its
+        rows would wait forever. The canary never judged that run either, so the
+        rows are dropped rather than released.
+        """
+        dead = select(ScrapeRun.id).where(
+            ScrapeRun.finished_at.is_(None), ScrapeRun.started_at < func.now() - max_age
+        )
+        result = cast(
+            "CursorResult[Any]",
+            await self.session.execute(
+                delete(NotificationOutbox).where(NotificationOutbox.scrape_run_id.in_(dead))
+            ),
+        )
+        return result.rowcount
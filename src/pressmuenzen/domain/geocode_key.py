@@ -0,0 +1,38 @@
+"""Canonical geocode cache keys.
+
+``Bonn``, ``bonn `` and ``„Bonn“`` are one place to Nominatim, but as raw
+strings they are three cache entries and three requests. The key folds the
+spelling differences a geocoder ignores anyway:
+
+- Unicode NFKC (composed umlauts, full-width forms, ligatures) and case folding,
+  which also turns ``ß`` into ``ss``;
+- German umlauts to their two-letter spelling (``Köln`` = ``Koeln``), the way
+  the forum's own titles spell them without an umlaut keyboard;
+- apostrophes dropped, every other quote and punctuation mark a word break;
+- runs of whitespace collapsed.
+
+Words are never dropped or reordered: ``Bonn`` and ``Bonn, Germany`` stay two
+keys, as do ``Köln Hbf`` and ``Hbf Köln``.
+
+Applying the key twice changes nothing, so keys can be re-keyed safely. The
+query sent to Nominatim stays the caller's spelling; only the cache is keyed.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+
+_UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue"})
+_APOSTROPHES = str.maketrans(dict.fromkeys("'’‘`´", None))
+# Whatever is neither a word character nor whitespace separates words.
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+
+
+def geocode_key(query: str) -> str:
+    """The cache key of ``query``: equal for queries differing only in spelling."""
+    text = unicodedata.normalize("NFKC", unicodedata.normalize("NFKC", query).casefold())
+    # Combining marks without a precomposed form (the dot of a folded "İ").
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    text = text.translate(_UMLAUTS).translate(_APOSTROPHES)
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
@@ -0,0 +1,132 @@
+"""Process-wide pooled HTTP clients for Nominatim, the forum and other hosts.
+
+Opening an ``httpx.AsyncClient`` per request pays DNS, TCP and TLS setup every
+time. :func:`get_client` hands out one long-lived client per profile instead,
+each with its own connection pool and keep-alive. Compressed responses are
+requested (``br`` only when the ``brotli`` package is installed, since httpx
+cannot decode it otherwise) and HTTP/2 is used when ``HTTP_HTTP2`` is set and
+the ``h2`` package is installed.
+
+Every response is counted per host (:class:`HostStats`: requests, errors,
+compressed bytes on the wire, latency). :func:`http_clients` is the
+startup/shutdown bracket for a role: it closes the pools and logs the counters.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from importlib.util import find_spec
+
+import httpx
+
+from pressmuenzen.config import get_settings
+from pressmuenzen.logging import get_logger
+
+log = get_logger("http")
+
+# Profile -> request timeout in seconds.
+_TIMEOUTS: dict[str, float] = {"nominatim": 10.0, "forum": 20.0}
+_DEFAULT_TIMEOUT = 30.0
+
+
+@dataclass(slots=True)
+class HostStats:
+    requests: int = 0
+    errors: int = 0
+    bytes_received: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    @property
+    def latency_avg(self) -> float:
+        return self.latency_total / self.requests if self.requests else 0.0
+
+    def as_log(self) -> dict[str, float | int]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes_received": self.bytes_received,
+            "latency_avg_s": round(self.latency_avg, 3),
+            "latency_max_s": round(self.latency_max, 3),
+        }
+
+
+host_stats: dict[str, HostStats] = {}
+
+# Profile -> (event loop it was opened on, client). A client is bound to its
+# loop; a different loop (a fresh asyncio.run) gets a fresh client.
+_clients: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def _accept_encoding() -> str:
+    return "gzip, deflate, br" if find_spec("brotli") is not None else "gzip, deflate"
+
+
+async def _on_request(request: httpx.Request) -> None:
+    request.extensions["started_at"] = time.monotonic()
+
+
+async def _on_response(response: httpx.Response) -> None:
+    # Reading here lets the latency include the body; callers read it anyway.
+    await response.aread()
+    request = response.request
+    stats = host_stats.setdefault(request.url.host, HostStats())
+    latency = time.monotonic() - request.extensions.get("started_at", time.monotonic())
+    stats.requests += 1
+    stats.errors += response.status_code >= 400
+    stats.bytes_received += response.num_bytes_downloaded
+    stats.latency_total += latency
+    stats.latency_max = max(stats.latency_max, latency)
+
+
+def _open(profile: str) -> httpx.AsyncClient:
+    settings = get_settings()
+    return httpx.AsyncClient(
+        timeout=_TIMEOUTS.get(profile, _DEFAULT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_connections,
+            keepalive_expiry=settings.http_keepalive_seconds,
+        ),
+        http2=settings.http_http2 and find_spec("h2") is not None,
+        headers={"Accept-Encoding": _accept_encoding()},
+        event_hooks={"request": [_on_request], "response": [_on_response]},
+    )
+
+
+def get_client(profile: str) -> httpx.AsyncClient:
+    """The shared client for ``profile`` ("nominatim", "forum", ...), opened on first use."""
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(profile)
+    if entry is None or entry[0] is not loop or entry[1].is_closed:
+        entry = _clients[profile] = (loop, _open(profile))
+    return entry[1]
+
+
+async def close_clients() -> None:
+    """Close every pool opened on this loop and log the per-host counters."""
+    loop = asyncio.get_running_loop()
+    for profile, (owner, client) in list(_clients.items()):
+        if owner is loop:
+            await client.aclose()
+            del _clients[profile]
+    for host, stats in sorted(host_stats.items()):
+        log.info("http host stats", host=host, **stats.as_log())
+
+
+@asynccontextmanager
+async def http_clients() -> AsyncIterator[None]:
+    """Startup/shutdown bracket for a role's shared HTTP clients."""
+    log.info(
+        "http clients ready",
+        http2=get_settings().http_http2 and find_spec("h2") is not None,
+        accept_encoding=_accept_encoding(),
+    )
+    try:
+        yield
+    finally:
+        await close_clients()
@@ -0,0 +1,121 @@
+"""Content-addressed archive of raw forum pages, and offline replay from it.
+
+Every page body is stored once, gzip-compressed, under its SHA-256::
+
+    <root>/objects/ab/abcdef....html.gz
+    <root>/index.jsonl          {"url": ..., "sha256": ..., "fetched_at": ...}
+
+The index is append-only, one line per fetch; the last line for a URL wins on
+replay. Identical pages (a topic re-fetched unchanged, or the same list page on
+consecutive nights) cost one index line and no extra object.
+
+:class:`ArchiveTransport` serves an archive through httpx, so replay drives the
+real :class:`~pressmuenzen.scraper.elongated_coin.ElongatedCoinSource` -- URL
+building, pagination and parsing included -- without touching the network.
+
+The archive itself is synchronous; async callers run :meth:`PageArchive.put`
+and :meth:`PageArchive.get` in a worker thread (``asyncio.to_thread``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from hashlib import sha256
+from pathlib import Path
+
+import httpx
+
+from pressmuenzen.logging import get_logger
+
+log = get_logger("scraper.archive")
+
+
+@dataclass(frozen=True, slots=True)
+class ArchivedPage:
+    url: str
+    sha256: str
+    fetched_at: datetime
+
+
+class PageArchive:
+    def __init__(self, root: Path | str) -> None:
+        self.root = Path(root)
+        self._objects = self.root / "objects"
+        self._index_path = self.root / "index.jsonl"
+        self._index: dict[str, ArchivedPage] | None = None
+
+    def _object_path(self, digest: str) -> Path:
+        return self._objects / digest[:2] / f"{digest}.html.gz"
+
+    def put(self, url: str, content: bytes) -> str:
+        """Archive one fetched page body; returns its content hash."""
+        digest = sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so a crash never leaves a truncated object behind;
+            # puts run in worker threads, so the temp name is per thread.
+            tmp = path.with_suffix(f".tmp{os.getpid()}-{threading.get_ident()}")
+            tmp.write_bytes(gzip.compress(content, compresslevel=6))
+            tmp.replace(path)
+        page = ArchivedPage(url=url, sha256=digest, fetched_at=datetime.now(UTC))
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._index_path.open("a", encoding="utf-8") as fh:
+            record = {"url": url, "sha256": digest, "fetched_at": page.fetched_at.isoformat()}
+            fh.write(json.dumps(record) + "\n")
+        if self._index is not None:
+            self._index[url] = page
+        return digest
+
+    def index(self) -> dict[str, ArchivedPage]:
+        """``url -> latest archived page``, read once from ``index.jsonl``."""
+        if self._index is None:
+            self._index = {}
+            if self._index_path.exists():
+                with self._index_path.open(encoding="utf-8") as fh:
+                    for line in fh:
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        self._index[record["url"]] = ArchivedPage(
+                            url=record["url"],
+                            sha256=record["sha256"],
+                            fetched_at=datetime.fromisoformat(record["fetched_at"]),
+                        )
+        return self._index
+
+    def get(self, url: str) -> bytes | None:
+        """Latest archived body for ``url``, or ``None`` if it was never fetched."""
+        page = self.index().get(url)
+        if page is None:
+            return None
+        return gzip.decompress(self._object_path(page.sha256).read_bytes())
+
+
+class ArchiveTransport(httpx.AsyncBaseTransport):
+    """httpx transport answering every GET from a :class:`PageArchive`.
+
+    Unknown URLs get a 404, which the source surfaces as a per-topic fetch error
+    exactly like a page that vanished from the forum.
+    """
+
+    def __init__(self, archive: PageArchive) -> None:
+        self.archive = archive
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        content = await asyncio.to_thread(self.archive.get, str(request.url))
+        if content is None:
+            log.debug("replay miss", url=str(request.url))
+            return httpx.Response(404, request=request)
+        return httpx.Response(
+            200,
+            content=content,
+            headers={"Content-Type": "text/html; charset=UTF-8"},
+            request=request,
+        )
@@ -3,10 +3,15 @@
 If the share of topics that parse cleanly drops below a threshold (vs the
 trailing average of past runs), we abort the run, keep the previous data, and
 alert the admin. This converts silent breakage into a notification.
+
+:class:`RollingCanary` applies the same check during the run to the last few
+topics only, so a drifted template stops the crawl within minutes instead of
+after hours of fetching pages that no longer parse.
 """
 
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass
 
 from pressmuenzen.config import get_settings
@@ -47,3 +52,56 @@ def check(
         )
 
     return CanaryVerdict(ok=True, reason="parse rate healthy")
+
+
+class RollingCanary:
+    """:func:`check` over a sliding window of the last ``window`` fetched topics.
+
+    Each fetched topic is recorded as parsed or not, exactly as the run's
+    ``topics_parsed``/``topics_seen`` count it. The first failing window trips
+    the canary for good; ``verdict`` and ``tripped_after`` (topics recorded so
+    far) then say why and where.
+    """
+
+    def __init__(self, trailing_rate: float | None, *, window: int, min_topics: int) -> None:
+        self._trailing_rate = trailing_rate
+        self._min_topics = min_topics
+        self._outcomes: deque[bool] = deque(maxlen=max(1, window))
+        self._parsed = 0
+        self.recorded = 0
+        self.verdict: CanaryVerdict | None = None
+        self.tripped_after: int | None = None
+
+    @classmethod
+    def from_settings(cls, trailing_rate: float | None) -> RollingCanary:
+        settings = get_settings()
+        return cls(
+            trailing_rate,
+            window=settings.scraper_canary_window,
+            min_topics=settings.scraper_canary_min_sample,
+        )
+
+    @property
+    def tripped(self) -> bool:
+        return self.verdict is not None
+
+    @property
+    def rate(self) -> float | None:
+        return self._parsed / len(self._outcomes) if self._outcomes else None
+
+    def record(self, parsed: bool) -> None:
+        if self.verdict is not None:
+            return
+        if len(self._outcomes) == self._outcomes.maxlen:
+            self._parsed -= self._outcomes[0]
+        self._outcomes.append(parsed)
+        self._parsed += parsed
+        self.recorded += 1
+        verdict = check(
+            self.rate, self._trailing_rate, len(self._outcomes), min_topics=self._min_topics
+        )
+        if not verdict.ok:
+            self.verdict = CanaryVerdict(
+                ok=False, reason=f"{verdict.reason} over the last {len(self._outcomes)} topics"
+            )
+            self.tripped_after = self.recorded
@@ -0,0 +1,190 @@
+"""Checkpointed scrape progress, so a run that died can be resumed.
+
+A full crawl at the forum's request rate takes hours; a container restart or an
+OOM halfway used to throw all of it away. :class:`RunCheckpoint` records, per
+``scrape_runs.id``:
+
+- the discovered regions and each region's topic listing, so a resumed run
+  fetches no topic-list page twice;
+- every topic that reached its final outcome (persisted, unchanged, 304, not a
+  location entry, or failed), with the validators and ``last_seen_at`` vote a
+  finished run would have stored for it;
+- the run's counters and new machine ids, so the canary judges the combined
+  run and admins hear about every new machine.
+
+Progress is buffered and written every ``SCRAPER_CHECKPOINT_SECONDS``; each
+write is also the run's heartbeat, which ``scrape --resume`` checks before it
+takes a run over. A new machine's id and topic are saved in the transaction
+that inserts it (:meth:`RunCheckpoint.inserted`), so a resumed run neither
+counts it as unchanged nor leaves it out of the admins' summary. Other topics
+that were in flight when the process died are fetched again; their fetch is
+then counted twice, at most a few queue lengths on a crawl of thousands.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any
+
+from pressmuenzen.db.engine import session_scope
+from pressmuenzen.db.repositories.checkpoints import ScrapeCheckpointRepository
+from pressmuenzen.logging import get_logger
+from pressmuenzen.scraper.source import ScrapedRegion, ScrapeStats, TopicRef
+
+log = get_logger("scraper.checkpoint")
+
+_REGIONS = "regions"
+_REGION = "region"
+_TOPIC = "topic"
+_STATS = "stats"
+_ADDED = "added"
+
+
+def _topic_json(topic: TopicRef) -> dict[str, Any]:
+    return {
+        "url": topic.url,
+        "name": topic.name,
+        "last_activity": topic.last_activity.isoformat() if topic.last_activity else None,
+        "reply_count": topic.reply_count,
+    }
+
+
+def _topic_from_json(data: dict[str, Any]) -> TopicRef:
+    last_activity = data.get("last_activity")
+    return TopicRef(
+        url=data["url"],
+        name=data["name"],
+        last_activity=datetime.fromisoformat(last_activity) if last_activity else None,
+        reply_count=data.get("reply_count"),
+    )
+
+
+class RunCheckpoint:
+    def __init__(
+        self,
+        run_id: int,
+        *,
+        interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.run_id = run_id
+        self.stats = ScrapeStats()
+        self.new_machine_ids: list[int] = []
+        self.regions: list[ScrapedRegion] | None = None
+        self.listed: dict[str, list[TopicRef]] = {}
+        # Topics the resumed run already finished: skipped without being counted.
+        self.resumed: frozenset[str] = frozenset()
+        self.validators: dict[str, tuple[str | None, str | None]] = {}
+        self.seen_urls: list[str] = []
+        self._interval = interval
+        self._clock = clock
+        self._flushed_at = clock()
+        self._dirty: dict[tuple[str, str], str | None] = {}
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def restore(
+        cls,
+        run_id: int,
+        rows: Mapping[tuple[str, str], str | None],
+        *,
+        interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> RunCheckpoint:
+        """Rebuild the progress of a run from its ``scrape_checkpoints`` rows."""
+        checkpoint = cls(run_id, interval=interval, clock=clock)
+        done: set[str] = set()
+        added: list[int] = []
+        for (kind, key), payload in rows.items():
+            data = json.loads(payload) if payload else None
+            if kind == _REGIONS and data is not None:
+                checkpoint.regions = [ScrapedRegion(**region) for region in data]
+            elif kind == _REGION and data is not None:
+                checkpoint.listed[key] = [_topic_from_json(topic) for topic in data]
+            elif kind == _TOPIC:
+                done.add(key)
+                if data and data.get("seen"):
+                    checkpoint.seen_urls.append(key)
+                if data and data.get("validator") is not None:
+                    etag, last_modified = data["validator"]
+                    checkpoint.validators[key] = (etag, last_modified)
+            elif kind == _STATS and data is not None:
+                checkpoint.stats = ScrapeStats(**data["stats"])
+                checkpoint.new_machine_ids = list(data["new_machine_ids"])
+            elif kind == _ADDED:
+                added.append(int(key))
+        # Machines inserted after the last full write are not in its counters yet.
+        counted = set(checkpoint.new_machine_ids)
+        late = sorted(machine_id for machine_id in added if machine_id not in counted)
+        checkpoint.new_machine_ids.extend(late)
+        checkpoint.stats.machines_added += len(late)
+        checkpoint.resumed = frozenset(done)
+        log.info(
+            "scrape resumed",
+            run_id=run_id,
+            regions_listed=len(checkpoint.listed),
+            topics_done=len(done),
+        )
+        return checkpoint
+
+    def found_regions(self, regions: list[ScrapedRegion]) -> None:
+        self.regions = regions
+        self._dirty[(_REGIONS, "")] = json.dumps([asdict(region) for region in regions])
+
+    def listed_region(self, region: ScrapedRegion, topics: list[TopicRef]) -> None:
+        self.listed[region.forum_url] = topics
+        self._dirty[(_REGION, region.forum_url)] = json.dumps(
+            [_topic_json(topic) for topic in topics]
+        )
+
+    def topic_done(
+        self,
+        url: str,
+        *,
+        seen: bool = False,
+        validator: tuple[str | None, str | None] | None = None,
+    ) -> None:
+        self._dirty[(_TOPIC, url)] = json.dumps({"seen": seen, "validator": validator})
+
+    def inserted(
+        self, machines: Iterable[tuple[int, str, tuple[str | None, str | None] | None]]
+    ) -> dict[tuple[str, str], str | None]:
+        """Entries for newly inserted ``(machine id, topic url, validator)``.
+
+        The caller saves them in the transaction that inserts the machines.
+        """
+        entries: dict[tuple[str, str], str | None] = {}
+        for machine_id, url, validator in machines:
+            entries[(_TOPIC, url)] = json.dumps({"seen": True, "validator": validator})
+            entries[(_ADDED, str(machine_id))] = None
+        return entries
+
+    async def keep_alive(self) -> None:
+        """Write at least every ``interval``, so a slow crawl still looks alive."""
+        while True:
+            await asyncio.sleep(self._interval)
+            await self.maybe_flush()
+
+    async def maybe_flush(self) -> None:
+        """Write the buffered progress if the last write is ``interval`` seconds old."""
+        if self._clock() - self._flushed_at >= self._interval and not self._lock.locked():
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            self._flushed_at = self._clock()
+            entries, self._dirty = self._dirty, {}
+            entries[(_STATS, "")] = json.dumps(
+                {"stats": asdict(self.stats), "new_machine_ids": self.new_machine_ids}
+            )
+            try:
+                async with session_scope() as session:
+                    await ScrapeCheckpointRepository(session).save(self.run_id, entries)
+            except Exception as exc:  # noqa: BLE001 - a lost checkpoint only costs a resume
+                log.warning("checkpoint write failed", run_id=self.run_id, error=str(exc))
+                self._dirty = {**entries, **self._dirty}
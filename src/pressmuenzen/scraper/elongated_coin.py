@@ -8,49 +8,147 @@ pipeline is the early-warning system for when this template drifts.
 
 from __future__ import annotations
 
+import asyncio
 import re
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Mapping
+from concurrent.futures import Executor
+from datetime import datetime
+from zoneinfo import ZoneInfo
 
 import httpx
-from aiolimiter import AsyncLimiter
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 
 from pressmuenzen.config import get_settings
+from pressmuenzen.http_clients import get_client
 from pressmuenzen.logging import get_logger
-from pressmuenzen.scraper.source import ScrapedMachine, ScrapedRegion, TopicRef
+from pressmuenzen.scraper.archive import PageArchive
+from pressmuenzen.scraper.html import THREAD_ONLY, TOPIC_LIST_ONLY, ParserBackend, parse_html
+from pressmuenzen.scraper.source import FetchedPage, ScrapedMachine, ScrapedRegion, TopicRef
+from pressmuenzen.scraper.throttle import THROTTLE_STATUSES, AdaptiveLimiter
 
 log = get_logger("scraper.elongated_coin")
 
 LIMITED_SECTION_NAME = "Zeitlich begrenzte Standorte"
 _PAGE_SIZE = 30
-# 1 request/second to the forum, as the legacy code did. Be a polite guest.
-_limiter = AsyncLimiter(max_rate=1, time_period=1.0)
+# The forum renders guest-visible timestamps in board time.
+_FORUM_TZ = ZoneInfo("Europe/Berlin")
+# "Mo 1. Jan 2024, 12:00" / "Sa 13. Juli 2024, 10:15" (phpBB German language pack).
+_FORUM_DATE_RE = re.compile(r"(\d{1,2})\.\s*([^\W\d_]+)\.?\s+(\d{4}),?\s+(\d{1,2}):(\d{2})")
+_MONTHS: dict[str, int] = {
+    "jan": 1,
+    "feb": 2,
+    "mär": 3,
+    "mar": 3,
+    "apr": 4,
+    "mai": 5,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "okt": 10,
+    "oct": 10,
+    "nov": 11,
+    "dez": 12,
+    "dec": 12,
+}
+# Separates posts in the thread text, so the LLM can tell them apart.
+_POST_DELIMITER = "\n\n---\n\n"
+# Attempts per page when the forum answers 429/503 (after its Retry-After).
+_THROTTLED_ATTEMPTS = 3
 
 
 class ElongatedCoinSource:
     source_id = "elongated_coin"
 
-    def __init__(self, client: httpx.AsyncClient | None = None) -> None:
+    def __init__(
+        self,
+        client: httpx.AsyncClient | None = None,
+        validators: Mapping[str, tuple[str | None, str | None]] | None = None,
+        *,
+        archive: PageArchive | None = None,
+        rate_limited: bool = True,
+        limiter: AdaptiveLimiter | None = None,
+        parser: ParserBackend | None = None,
+        executor: Executor | None = None,
+    ) -> None:
         settings = get_settings()
+        self._parser: ParserBackend = parser or settings.scraper_html_parser
         self._base_url = settings.scraper_base_url
         self._main_url = settings.scraper_main_forum_url
         self._ua = settings.nominatim_user_agent
         self._client = client
+        # url -> (ETag, Last-Modified) from the previous successful run; topic
+        # pages listed here are requested conditionally.
+        self._validators = validators or {}
+        # Every 200 body is archived here when set (see scraper.archive).
+        self._archive = archive
+        # Parse pool (see html.parse_pool); None parses on the event loop.
+        self._executor = executor
+        # Only replay from a local archive may switch the forum limiter off.
+        self.limiter = (limiter or AdaptiveLimiter.from_settings()) if rate_limited else None
 
-    async def _soup(self, url: str) -> BeautifulSoup:
-        async with _limiter:
-            client = self._client or httpx.AsyncClient(timeout=20.0)
+    async def _get(self, url: str, headers: dict[str, str] | None = None) -> httpx.Response:
+        """GET one forum page under the adaptive forum limiter.
+
+        A ``304 Not Modified`` is returned as-is for conditional requests; 429
+        and 503 are retried after the forum's ``Retry-After``; any other non-2xx
+        status raises.
+        """
+        client = self._client or get_client("forum")
+        for attempt in range(1, _THROTTLED_ATTEMPTS + 1):
+            if self.limiter is not None:
+                await self.limiter.wait()
+            started = time.monotonic()
             try:
-                resp = await client.get(url, headers={"User-Agent": self._ua})
-                resp.raise_for_status()
-                return BeautifulSoup(resp.content, "html.parser")
-            finally:
-                if self._client is None:
-                    await client.aclose()
+                resp = await client.get(url, headers={"User-Agent": self._ua, **(headers or {})})
+            except httpx.TransportError:
+                if self.limiter is not None:
+                    self.limiter.on_error()
+                raise
+            if self.limiter is not None:
+                self.limiter.on_response(
+                    resp.status_code, time.monotonic() - started, resp.headers.get("Retry-After")
+                )
+            if resp.status_code not in THROTTLE_STATUSES or attempt == _THROTTLED_ATTEMPTS:
+                break
+            log.info("forum throttled, retrying", url=url, status=resp.status_code)
+        if resp.status_code != httpx.codes.NOT_MODIFIED:
+            resp.raise_for_status()
+        if self._archive is not None and resp.status_code == httpx.codes.OK:
+            # Keyed by what was asked for, not where a redirect ended up: replay
+            # looks pages up by the request URL. Gzip and file I/O run off the loop.
+            await asyncio.to_thread(self._archive.put, str(httpx.URL(url)), resp.content)
+        return resp
+
+    async def _fetch(self, url: str) -> bytes:
+        """Download one forum page under the forum limiter."""
+        return (await self._get(url)).content
+
+    async def _soup(self, url: str, only: SoupStrainer | None = None) -> BeautifulSoup:
+        return parse_html(await self._fetch(url), self._parser, only)
 
     def _complete_link(self, link: Tag) -> str:
-        href = str(link["href"]).replace("./", self._base_url)
+        return self._absolute_link(self._base_url, link)
+
+    @staticmethod
+    def _absolute_link(base_url: str, link: Tag) -> str:
+        href = str(link["href"]).replace("./", base_url)
         return re.sub("sid=.*", "start=0", href)
 
+    async def _offload[*Ts, R](self, parse: Callable[[*Ts], R], *args: *Ts) -> R:
+        """Run a pure parse function in the process pool, or inline without one.
+
+        ``parse`` must be a module-level function or staticmethod and its
+        arguments and result plain picklable data: raw page bytes in, dataclasses
+        out. Inline parsing blocks the event loop for the duration of the parse.
+        """
+        if self._executor is None:
+            return parse(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, parse, *args)
+
     # --- regions -------------------------------------------------------------
 
     async def discover_regions(self) -> list[ScrapedRegion]:
@@ -76,20 +174,91 @@ class ElongatedCoinSource:
 
     # --- topic lists ---------------------------------------------------------
 
-    async def list_topics(self, region: ScrapedRegion) -> list[TopicRef]:
-        topics: list[TopicRef] = []
-        await self._collect_topics(region.forum_url, topics)
-        return topics
+    async def list_topics(self, region: ScrapedRegion) -> AsyncIterator[TopicRef]:
+        """Topics of a region, yielded page by page as the topic list is read."""
+        page_url = region.forum_url
+        while True:
+            page = await self._fetch(page_url)
+            topics, is_last = await self._offload(
+                self._topics_on_page, page, self._parser, self._base_url
+            )
+            for topic in topics:
+                yield topic
+            if is_last:
+                return
+            page_url = self._next_page(page_url)
+
+    def parse_topic_list(self, page: bytes) -> tuple[list[TopicRef], bool]:
+        """Topics on one topic-list page, and whether it is the last page."""
+        return self._topics_on_page(page, self._parser, self._base_url)
 
-    async def _collect_topics(self, page_url: str, acc: list[TopicRef]) -> None:
-        soup = await self._soup(page_url)
+    @classmethod
+    def _topics_on_page(
+        cls, page: bytes, backend: ParserBackend, base_url: str
+    ) -> tuple[list[TopicRef], bool]:
+        soup = parse_html(page, backend, TOPIC_LIST_ONLY)
         container = soup.find(lambda tag: tag.name == "div" and tag.get("class") == ["forumbg"])
         if not isinstance(container, Tag):
-            return
+            # The legacy scraper stopped paginating when the container vanished.
+            return [], True
+        topics = []
         for link in container.find_all("a", class_="topictitle", href=True):
-            acc.append(TopicRef(url=self._complete_link(link), name=link.text.strip()))
-        if not self._is_last_page(soup):
-            await self._collect_topics(self._next_page(page_url), acc)
+            last_activity, reply_count = cls._row_activity(link)
+            topics.append(
+                TopicRef(
+                    url=cls._absolute_link(base_url, link),
+                    name=link.text.strip(),
+                    last_activity=last_activity,
+                    reply_count=reply_count,
+                )
+            )
+        return topics, cls._is_last_page(soup)
+
+    @classmethod
+    def _row_activity(cls, link: Tag) -> tuple[datetime | None, int | None]:
+        """Last-post time and reply count from the topic-list row holding ``link``."""
+        row = link.find_parent("li", class_="row") or link.find_parent("dl")
+        if not isinstance(row, Tag):
+            return None, None
+
+        reply_count = None
+        posts = row.find("dd", class_="posts")
+        if isinstance(posts, Tag):
+            match = re.search(r"\d+", posts.get_text(" ", strip=True).replace(".", ""))
+            if match:
+                reply_count = int(match.group(0))
+
+        last_activity = None
+        lastpost = row.find("dd", class_="lastpost")
+        if isinstance(lastpost, Tag):
+            stamp = lastpost.find("time", datetime=True)
+            if isinstance(stamp, Tag):
+                try:
+                    last_activity = datetime.fromisoformat(str(stamp["datetime"]))
+                except ValueError:
+                    last_activity = None
+            if last_activity is None:
+                last_activity = cls._parse_forum_datetime(lastpost.get_text(" ", strip=True))
+        return last_activity, reply_count
+
+    @staticmethod
+    def _parse_forum_datetime(text: str) -> datetime | None:
+        """Parse a phpBB German date like ``Di 2. Jan 2024, 13:14`` (board time).
+
+        Relative forms ("Heute", "Gestern") are not resolved: they return ``None``
+        and the topic is simply fetched, which is always safe.
+        """
+        match = _FORUM_DATE_RE.search(text)
+        if match is None:
+            return None
+        day, month_name, year, hour, minute = match.groups()
+        month = _MONTHS.get(month_name[:3].lower())
+        if month is None:
+            return None
+        try:
+            return datetime(int(year), month, int(day), int(hour), int(minute), tzinfo=_FORUM_TZ)
+        except ValueError:
+            return None
 
     @staticmethod
     def _next_page(link: str) -> str:
@@ -113,19 +282,31 @@ class ElongatedCoinSource:
 
     # --- full thread ---------------------------------------------------------
 
-    async def fetch_thread_text(self, topic_url: str) -> tuple[str, int]:
-        """Fetch all posts from a topic URL, including paginated replies.
+    async def fetch_thread_text(self, topic_url: str) -> AsyncIterator[str]:
+        """Yield the formatted posts of a topic URL, following reply pagination.
 
-        Returns (concatenated_text, post_count). Posts are separated by a
-        delimiter line so the LLM can distinguish boundaries. The same 1 req/s
-        limiter applies — callers must budget time accordingly.
+        Posts arrive page by page; :func:`join_thread` builds the text the LLM
+        gets. The adaptive forum limiter applies — callers must budget time
+        accordingly.
         """
-        posts: list[str] = []
-        await self._collect_posts(topic_url, posts)
-        return "\n\n---\n\n".join(posts), len(posts)
+        page_url = topic_url
+        while True:
+            page = await self._fetch(page_url)
+            posts, is_last = await self._offload(self._posts_on_page, page, self._parser)
+            for post in posts:
+                yield post
+            if is_last:
+                return
+            page_url = self._next_page(page_url)
 
-    async def _collect_posts(self, page_url: str, acc: list[str]) -> None:
-        soup = await self._soup(page_url)
+    def parse_thread_page(self, page: bytes) -> tuple[list[str], bool]:
+        """Formatted posts on one thread page, and whether it is the last page."""
+        return self._posts_on_page(page, self._parser)
+
+    @classmethod
+    def _posts_on_page(cls, page: bytes, backend: ParserBackend) -> tuple[list[str], bool]:
+        soup = parse_html(page, backend, THREAD_ONLY)
+        posts = []
         for post in soup.find_all("div", class_=re.compile(r"post bg[12].*")):
             if not isinstance(post, Tag):
                 continue
@@ -134,14 +315,58 @@ class ElongatedCoinSource:
             content_tag = post.find("div", class_="content")
             if isinstance(content_tag, Tag):
                 body = content_tag.get_text(separator="\n", strip=True)
-                acc.append(f"[{author}]\n{body}")
-        if not self._is_last_page(soup):
-            await self._collect_posts(self._next_page(page_url), acc)
+                posts.append(f"[{author}]\n{body}")
+        return posts, cls._is_last_page(soup)
 
     # --- single machine ------------------------------------------------------
 
     async def fetch_machine(self, topic: TopicRef, region: ScrapedRegion) -> ScrapedMachine | None:
-        soup = await self._soup(topic.url)
+        page = await self.fetch_topic_page(topic)
+        if page.not_modified:
+            return None
+        return await self.parse_machine(page.content, topic, region)
+
+    async def fetch_topic_page(self, topic: TopicRef) -> FetchedPage:
+        """Network half of :meth:`fetch_machine`: the raw topic page.
+
+        Sends ``If-None-Match``/``If-Modified-Since`` when validators for the URL
+        are known; a 304 comes back as ``not_modified`` with no content.
+        """
+        headers: dict[str, str] = {}
+        etag, last_modified = self._validators.get(topic.url, (None, None))
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        resp = await self._get(topic.url, headers)
+        if resp.status_code == httpx.codes.NOT_MODIFIED:
+            return FetchedPage(
+                url=topic.url,
+                content=b"",
+                etag=etag,
+                last_modified=last_modified,
+                conditional=True,
+                not_modified=True,
+            )
+        return FetchedPage(
+            url=topic.url,
+            content=resp.content,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            conditional=bool(headers),
+        )
+
+    async def parse_machine(
+        self, page: bytes, topic: TopicRef, region: ScrapedRegion
+    ) -> ScrapedMachine | None:
+        """CPU half of :meth:`fetch_machine`: extract the machine from a topic page."""
+        return await self._offload(self._machine_on_page, page, topic, region, self._parser)
+
+    @classmethod
+    def _machine_on_page(
+        cls, page: bytes, topic: TopicRef, region: ScrapedRegion, backend: ParserBackend
+    ) -> ScrapedMachine | None:
+        soup = parse_html(page, backend)
         first_post = soup.find("div", class_=re.compile(r"post bg[12].*"))
         if not isinstance(first_post, Tag):
             return None
@@ -155,8 +380,8 @@ class ElongatedCoinSource:
                 is_location_entry=False,
             )
 
-        description = self._location_description(first_post)
-        gps_text = self._gps_text(first_post)
+        description = cls._location_description(first_post)
+        gps_text = cls._gps_text(first_post)
         entry_date = None
         author = first_post.find("p", class_="author")
         if isinstance(author, Tag) and "»" in author.text:
@@ -169,6 +394,8 @@ class ElongatedCoinSource:
             description=description,
             gps_text=gps_text or None,
             entry_date_text=entry_date,
+            topic_last_activity=topic.last_activity,
+            topic_reply_count=topic.reply_count,
         )
 
     @staticmethod
@@ -206,3 +433,9 @@ class ElongatedCoinSource:
             if not str(node).startswith("<"):
                 text += " " + str(node)
         return text.strip()
+
+
+async def join_thread(posts: AsyncIterable[str]) -> tuple[str, int]:
+    """Concatenate streamed posts into ``(thread_text, post_count)``."""
+    collected = [post async for post in posts]
+    return _POST_DELIMITER.join(collected), len(collected)
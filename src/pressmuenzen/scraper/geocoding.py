@@ -1,32 +1,63 @@
 """Nominatim geocoding client: async, rate-limited, and DB-cached.
 
-Respects the Nominatim usage policy: max 1 request/second, a real identifying
+Respects the Nominatim usage policy: max 1 request/second across all processes
+(:mod:`pressmuenzen.db.rate_limit`), a real identifying
 User-Agent (with contact) from settings, and a persistent cache so we never
 re-hit the API for a query we have already resolved. Used by the scraper (name
 geocoding) and by the bot (resolving a user-typed address).
+
+Two cache tiers sit in front of Nominatim: a bounded in-process LRU
+(:class:`MemoryCache`, one per process) and the ``geocode_cache`` table. Found
+places are kept in the table for good; misses are re-checked against Nominatim
+once they are older than ``GEOCODE_NEGATIVE_TTL_DAYS``, so places OSM learns
+about later are picked up. The LRU uses a shorter TTL for misses than for hits.
+Both tiers are keyed by :func:`geocode_key`, so spellings that differ only in
+case, Unicode form, quotes or punctuation share one entry. Concurrent callers
+asking for the same key share one lookup (single flight).
+
+Bare place names (the partial-name fallbacks) are first looked up offline in a
+GeoNames gazetteer loaded into PostGIS (``scripts/import_gazetteer.py``).
 """
 
 from __future__ import annotations
 
+import asyncio
 import re
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Protocol
 
-import httpx
-from aiolimiter import AsyncLimiter
-from sqlalchemy import select
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from pressmuenzen.config import get_settings
 from pressmuenzen.db.geo import lat_expr, lon_expr, point_wkt
 from pressmuenzen.db.models import GeocodeCache
+from pressmuenzen.db.rate_limit import SharedRateLimiter
+from pressmuenzen.db.repositories.gazetteer import GazetteerRepository
+from pressmuenzen.domain.geocode_key import geocode_key
 from pressmuenzen.domain.models import Coordinate
+from pressmuenzen.http_clients import get_client
 from pressmuenzen.logging import get_logger
 
 log = get_logger("geocoding")
 
 _NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
-# Process-wide 1 req/s limiter, shared across all callers in this process.
-_limiter = AsyncLimiter(max_rate=1, time_period=1.0)
+_limiter: SharedRateLimiter | None = None
+
+
+def nominatim_limiter() -> SharedRateLimiter:
+    """The 1 req/s Nominatim budget, shared by every process on the database."""
+    global _limiter
+    if _limiter is None:
+        _limiter = SharedRateLimiter("nominatim", get_settings().nominatim_min_interval_seconds)
+    return _limiter
+
 
 # Strip "Automat N" disambiguators (with any bracket style, or bare) before
 # sending to Nominatim -- they are never part of a place name.
@@ -43,22 +74,197 @@ def _strip_automat(query: str) -> str:
     return " ".join(_AUTOMAT_RE.sub("", query).split())
 
 
+class PlaceBackend(Protocol):
+    """A network-free place-name lookup tried before Nominatim."""
+
+    async def lookup(self, query: str) -> Coordinate | None: ...
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    db_hits: int = 0
+    db_misses: int = 0
+    negatives_rechecked: int = 0
+    # Place names answered by the local backend (gazetteer), or passed on.
+    local_hits: int = 0
+    local_misses: int = 0
+    # Lookups started, and callers that joined one already in flight.
+    flights: int = 0
+    coalesced: int = 0
+
+    def as_log(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class MemoryCache:
+    """Bounded LRU of geocode results; hits and misses expire after their own TTL."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        negative_ttl: float,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._clock = clock
+        # query -> (expires_at, coordinate); most recently used last.
+        self._entries: OrderedDict[str, tuple[float, Coordinate | None]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: str) -> _CacheHit | None:
+        entry = self._entries.get(query)
+        if entry is not None and entry[0] <= self._clock():
+            del self._entries[query]
+            self.stats.expirations += 1
+            entry = None
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(query)
+        self.stats.hits += 1
+        return _CacheHit(coordinate=entry[1])
+
+    def put(self, query: str, coord: Coordinate | None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self._ttl if coord is not None else self._negative_ttl
+        self._entries[query] = (self._clock() + ttl, coord)
+        self._entries.move_to_end(query)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_memory: MemoryCache | None = None
+
+# Single flight: cache key -> the lookup currently resolving it. Callers
+# asking for a query already in flight await that lookup instead of starting
+# their own, so concurrent identical queries cost one Nominatim request and one
+# geocode_cache write.
+_in_flight: dict[str, _Flight] = {}
+
+
+class _Flight:
+    """A lookup in flight: its result, and whether an interactive caller waits on it.
+
+    A batch leader's Nominatim request is promoted (``urgent`` set) as soon as
+    an interactive caller joins, so a user's query never queues at batch
+    priority behind the scraper it happens to share a lookup with.
+    """
+
+    __slots__ = ("result", "urgent")
+
+    def __init__(self, *, batch: bool) -> None:
+        self.result: asyncio.Future[Coordinate | None] = asyncio.get_running_loop().create_future()
+        self.urgent = asyncio.Event()
+        if not batch:
+            self.urgent.set()
+
+
+def memory_cache() -> MemoryCache:
+    """This process's geocode LRU, sized from settings on first use."""
+    global _memory
+    if _memory is None:
+        settings = get_settings()
+        _memory = MemoryCache(
+            settings.geocode_memory_size,
+            settings.geocode_memory_ttl_seconds,
+            settings.geocode_memory_negative_ttl_seconds,
+        )
+    return _memory
+
+
 class Geocoder:
-    def __init__(self, session: AsyncSession) -> None:
+    """Geocode through the cache tiers, then Nominatim.
+
+    ``batch=True`` marks background work (scraper, ai-extract): it only gets
+    Nominatim slots that no interactive caller (bot, web) is waiting for.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        *,
+        batch: bool = False,
+        local: PlaceBackend | None = None,
+    ) -> None:
         self.session = session
-        self._ua = get_settings().nominatim_user_agent
+        self.batch = batch
+        settings = get_settings()
+        if local is None and settings.gazetteer_enabled:
+            local = GazetteerRepository(session, min_similarity=settings.gazetteer_min_similarity)
+        self._local = local
+        self._ua = settings.nominatim_user_agent
+        self._negative_ttl = timedelta(days=settings.geocode_negative_ttl_days)
+
+    async def geocode(self, query: str, *, place_name: bool = False) -> Coordinate | None:
+        """Resolve ``query``; ``place_name`` marks a bare place name (a partial-name query).
 
-    async def geocode(self, query: str) -> Coordinate | None:
+        Place names are tried against the in-process cache, then the local backend
+        (the gazetteer), and only go to Nominatim when neither has a match.
+        """
         query = _strip_automat(query.strip())
         if not query:
             return None
 
-        cached = await self._from_cache(query)
-        if cached is not None:
-            return cached.coordinate
+        key = geocode_key(query)
+        if not key:
+            return None
+        memory = memory_cache()
+        remembered = memory.get(key)
+        if remembered is not None:
+            return remembered.coordinate
+
+        if place_name and self._local is not None:
+            local = await self._local.lookup(query)
+            if local is not None:
+                memory.stats.local_hits += 1
+                memory.put(key, local)
+                return local
+            memory.stats.local_misses += 1
+
+        flight = _in_flight.get(key)
+        if flight is not None:
+            memory.stats.coalesced += 1
+            if not self.batch:
+                flight.urgent.set()
+            try:
+                return await asyncio.shield(flight.result)
+            except asyncio.CancelledError:
+                if not flight.result.cancelled():
+                    raise  # this caller was cancelled, not the shared lookup
+                # The leader gave up; take over.
+                return await self.geocode(query, place_name=place_name)
 
-        coord = await self._fetch(query)
-        await self._store(query, coord)
+        flight = _Flight(batch=self.batch)
+        _in_flight[key] = flight
+        memory.stats.flights += 1
+        try:
+            coord = await self._resolve(key, query, memory, flight.urgent)
+        except asyncio.CancelledError:
+            flight.result.cancel()
+            raise
+        except Exception as exc:
+            flight.result.set_exception(exc)
+            flight.result.exception()  # followers re-raise it; nobody else has to
+            raise
+        finally:
+            del _in_flight[key]
+        flight.result.set_result(coord)
         return coord
 
     async def reverse_to_coordinate(self, lat: float, lon: float) -> Coordinate:
@@ -67,43 +273,85 @@ class Geocoder:
 
     # --- internals -----------------------------------------------------------
 
-    async def _from_cache(self, query: str) -> _CacheHit | None:
+    async def _resolve(
+        self, key: str, query: str, memory: MemoryCache, urgent: asyncio.Event
+    ) -> Coordinate | None:
+        """The shared lookup behind a flight: geocode_cache by ``key``, then Nominatim."""
+        cached = await self._from_cache(key)
+        if cached is not None and not self._needs_recheck(cached):
+            memory.stats.db_hits += 1
+            memory.put(key, cached.coordinate)
+            return cached.coordinate
+
+        if cached is None:
+            memory.stats.db_misses += 1
+        else:
+            memory.stats.negatives_rechecked += 1
+        coord = await self._fetch(query, urgent)
+        if cached is None:
+            await self._store(key, coord)
+        else:
+            await self._recheck(key, coord)
+        memory.put(key, coord)
+        return coord
+
+    async def _from_cache(self, key: str) -> _CacheHit | None:
         row = (
             await self.session.execute(
                 select(
-                    GeocodeCache.id,
                     lat_expr(GeocodeCache.geom),
                     lon_expr(GeocodeCache.geom),
-                ).where(GeocodeCache.query == query)
+                    GeocodeCache.checked_at,
+                ).where(GeocodeCache.query == key)
             )
         ).first()
         if row is None:
             return None
-        _id, lat, lon = row
+        lat, lon, checked_at = row
         coord = Coordinate(lat=lat, lon=lon) if lat is not None else None
-        return _CacheHit(coordinate=coord)
+        return _CacheHit(coordinate=coord, checked_at=checked_at)
 
-    async def _store(self, query: str, coord: Coordinate | None) -> None:
-        entry = GeocodeCache(
-            query=query,
-            geom=point_wkt(coord) if coord is not None else None,
-            provider="nominatim",
+    def _needs_recheck(self, cached: _CacheHit) -> bool:
+        """A cached miss is asked again once it is older than the negative TTL."""
+        return (
+            cached.coordinate is None
+            and cached.checked_at is not None
+            and cached.checked_at < datetime.now(UTC) - self._negative_ttl
         )
-        self.session.add(entry)
-        await self.session.flush()
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10), reraise=True)
-    async def _fetch(self, query: str) -> Coordinate | None:
-        async with (
-            _limiter,
-            httpx.AsyncClient(timeout=10.0, headers={"User-Agent": self._ua}) as client,
-        ):
-            resp = await client.get(
-                _NOMINATIM_URL,
-                params={"q": query, "format": "jsonv2", "limit": 1},
+    async def _store(self, key: str, coord: Coordinate | None) -> None:
+        # Another process may have stored the key since our lookup.
+        await self.session.execute(
+            insert(GeocodeCache)
+            .values(
+                query=key,
+                geom=point_wkt(coord) if coord is not None else None,
+                provider="nominatim",
+            )
+            .on_conflict_do_nothing(index_elements=[GeocodeCache.query])
+        )
+
+    async def _recheck(self, key: str, coord: Coordinate | None) -> None:
+        await self.session.execute(
+            update(GeocodeCache)
+            .where(GeocodeCache.query == key)
+            .values(
+                geom=point_wkt(coord) if coord is not None else None,
+                checked_at=func.now(),
             )
-            resp.raise_for_status()
-            data = resp.json()
+            .execution_options(synchronize_session=False)
+        )
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10), reraise=True)
+    async def _fetch(self, query: str, urgent: asyncio.Event | None = None) -> Coordinate | None:
+        await nominatim_limiter().acquire(batch=self.batch, urgent=urgent)
+        resp = await get_client("nominatim").get(
+            _NOMINATIM_URL,
+            params={"q": query, "format": "jsonv2", "limit": 1},
+            headers={"User-Agent": self._ua},
+        )
+        resp.raise_for_status()
+        data = resp.json()
         if not data:
             log.info("geocode miss", query=query)
             return None
@@ -111,7 +359,8 @@ class Geocoder:
 
 
 class _CacheHit:
-    __slots__ = ("coordinate",)
+    __slots__ = ("checked_at", "coordinate")
 
-    def __init__(self, coordinate: Coordinate | None) -> None:
+    def __init__(self, coordinate: Coordinate | None, checked_at: datetime | None = None) -> None:
         self.coordinate = coordinate
+        self.checked_at = checked_at
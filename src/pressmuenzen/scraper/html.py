@@ -0,0 +1,65 @@
+"""HTML parser backends for the forum adapter.
+
+``html.parser`` is the reference backend: the full document tree, built exactly
+as the original scraper did. ``lxml`` is the fast path: lxml's C tree builder,
+and for topic lists and threads only the subtrees the extraction reads (via
+``SoupStrainer``). Both must yield identical ``ScrapedMachine``/``TopicRef``
+output; ``tests/unit/test_html_backends.py`` and ``scripts/bench_parsers.py``
+check that against archived pages.
+
+Topic pages are always parsed whole: the section walk in
+``ElongatedCoinSource._gps_text`` follows ``.next`` in document order and may
+run past the first post, so a strained tree could change what it collects.
+
+:func:`parse_pool` provides the optional process pool the adapter hands page
+bytes to, so parsing large threads does not stall fetching and DB writes.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import re
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Literal, get_args
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+ParserBackend = Literal["html.parser", "lxml"]
+PARSER_BACKENDS: tuple[ParserBackend, ...] = get_args(ParserBackend)
+
+# Topic lists read the plain ``div.forumbg`` container and the first pagination
+# block. Announcement boxes (``forumbg announcement``) come along but are
+# filtered out by the exact-class lookup, as in the full tree.
+TOPIC_LIST_ONLY = SoupStrainer("div", class_=["forumbg", "pagination"])
+# Threads read every post div and the first pagination block.
+THREAD_ONLY = SoupStrainer("div", class_=re.compile(r"post bg[12].*|^pagination$"))
+
+
+def parse_html(
+    content: bytes, backend: ParserBackend, only: SoupStrainer | None = None
+) -> BeautifulSoup:
+    """Build a tree with ``backend``; ``only`` restricts the fast path to a subtree."""
+    if backend == "html.parser":
+        return BeautifulSoup(content, "html.parser")
+    return BeautifulSoup(content, "lxml", parse_only=only)
+
+
+@contextmanager
+def parse_pool(workers: int) -> Iterator[ProcessPoolExecutor | None]:
+    """A process pool for HTML parsing, or ``None`` (parse inline) if ``workers`` < 1.
+
+    Workers start via ``forkserver``: forking the running asyncio process (with
+    its event loop, DB pool and threads) is unsafe.
+    """
+    if workers < 1:
+        yield None
+        return
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("forkserver")
+    )
+    try:
+        yield pool
+    finally:
+        pool.shutdown(cancel_futures=True)
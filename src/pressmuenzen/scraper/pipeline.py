@@ -1,59 +1,207 @@
 """Scraper orchestration: fetch -> parse -> geocode -> upsert -> notify.
 
+New machines are written to the notification outbox in the same transaction
+that inserts them; the ``notify-worker`` role sends the watch notifications once
+the run has passed the canary, so a slow Telegram never holds the scrape open.
+
 Resilience is non-negotiable: per-topic failures are logged and counted, never
 fatal. A parse-rate canary aborts the run (keeping previous data) if the forum
-template appears to have drifted.
+template appears to have drifted; its rolling form watches the last topics
+during the crawl and stops fetching as soon as they stop parsing.
+
+``incremental`` runs only fetch topics whose topic-list activity (last-post time
+and reply count) differs from what was stored when the topic was last fetched;
+``full`` runs fetch every topic. phpBB does not bump a topic's activity when its
+first post is edited, so the periodic full sweep is what picks up such edits.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
-from datetime import UTC, datetime
+from collections.abc import Awaitable, Callable
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
 from hashlib import sha256
+from pathlib import Path
 
 import httpx
-from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from pressmuenzen.config import get_settings
 from pressmuenzen.db.engine import session_scope
 from pressmuenzen.db.models import Machine, ScrapeRun
+from pressmuenzen.db.repositories.checkpoints import ScrapeCheckpointRepository
 from pressmuenzen.db.repositories.corrections import ScrapeRunRepository
+from pressmuenzen.db.repositories.http_cache import HttpValidatorRepository
 from pressmuenzen.db.repositories.machines import MachineRepository
+from pressmuenzen.db.repositories.outbox import NotificationOutboxRepository
 from pressmuenzen.domain.gps_parser import parse_gps_text
 from pressmuenzen.domain.models import Coordinate, GpsSource
 from pressmuenzen.domain.name_geocode import name_geocode_queries
+from pressmuenzen.http_clients import http_clients
 from pressmuenzen.logging import configure_logging, get_logger
 from pressmuenzen.scraper import canary
+from pressmuenzen.scraper.archive import ArchiveTransport, PageArchive
+from pressmuenzen.scraper.checkpoint import RunCheckpoint
 from pressmuenzen.scraper.elongated_coin import ElongatedCoinSource
-from pressmuenzen.scraper.geocoding import Geocoder
-from pressmuenzen.scraper.source import ScrapedMachine, ScrapeStats, Source
+from pressmuenzen.scraper.geocoding import Geocoder, memory_cache
+from pressmuenzen.scraper.html import parse_pool
+from pressmuenzen.scraper.source import (
+    FetchedPage,
+    ScrapedMachine,
+    ScrapedRegion,
+    ScrapeStats,
+    Source,
+    TopicRef,
+)
+from pressmuenzen.services.notifications import KIND_NEW_MACHINE
 
 log = get_logger("scraper.pipeline")
 
 
+@dataclass(slots=True)
+class _RunState:
+    """Mutable per-run bookkeeping shared by the scrape stages."""
+
+    stats: ScrapeStats = field(default_factory=ScrapeStats)
+    new_machine_ids: list[int] = field(default_factory=list)
+    # source_url -> (last activity, reply count) as stored; empty in full mode.
+    known_activity: dict[str, tuple[datetime | None, int | None]] = field(default_factory=dict)
+    # Listed topics confirmed still on the forum (skipped, 304 or persisted);
+    # their last_seen_at is refreshed in one statement at finalize.
+    seen_urls: list[str] = field(default_factory=list)
+    # Validators of pages fully processed this run, stored only if the canary passes.
+    validators: dict[str, tuple[str | None, str | None]] = field(default_factory=dict)
+    # source_url -> (id, content_hash), preloaded and kept current by the persist stage.
+    machine_index: dict[str, tuple[int, str | None]] = field(default_factory=dict)
+    # Region forum_url -> id, filled lazily as batches need them.
+    region_ids: dict[str, int] = field(default_factory=dict)
+    # Outbox rows for new machines are tagged with the run; replays write none.
+    run_id: int | None = None
+    notify: bool = True
+    # Progress for ``scrape --resume``; None in replays.
+    checkpoint: RunCheckpoint | None = None
+    # Parse rate over the last topics; once tripped, nothing more is fetched.
+    rolling_canary: canary.RollingCanary | None = None
+
+
 def _content_hash(machine: ScrapedMachine) -> str:
     return sha256(machine.content_hash_input().encode("utf-8")).hexdigest()
 
 
-async def run_scrape(mode: str = "incremental") -> ScrapeStats:
+def _topic_unchanged(topic: TopicRef, known: dict[str, tuple[datetime | None, int | None]]) -> bool:
+    """True if the topic list shows no new activity since the topic was last fetched."""
+    if topic.last_activity is None or topic.url not in known:
+        return False
+    stored_activity, stored_replies = known[topic.url]
+    return stored_activity == topic.last_activity and stored_replies == topic.reply_count
+
+
+async def run_scrape(
+    mode: str = "incremental", replay: Path | None = None, *, resume: bool = False
+) -> ScrapeStats:
+    """Scrape the forum into the database.
+
+    With ``replay`` the pages come from a :class:`PageArchive` instead of the
+    network, with the forum rate limiter off: the parse and upsert path runs at
+    full speed for profiling. Replays send no notifications and leave the HTTP
+    validators and ``last_seen_at`` alone.
+
+    With ``resume`` the last unfinished run is continued from its checkpoints
+    (see :mod:`pressmuenzen.scraper.checkpoint`) in its own mode; the canary
+    then judges the counters of both runs together. Only a run that has not
+    checkpointed for ``SCRAPER_STALE_RUN_SECONDS`` is taken over, never a
+    replay.
+    """
     configure_logging()
-    stats = ScrapeStats()
-    new_machine_ids: list[int] = []
+    settings = get_settings()
+    checkpoint: RunCheckpoint | None = None
 
     async with session_scope() as session:
-        run = await ScrapeRunRepository(session).start(mode)
+        runs = ScrapeRunRepository(session)
+        stale_after = timedelta(seconds=settings.scraper_stale_run_seconds)
+        previous = await runs.last_unfinished(stale_after) if resume else None
+        if resume and previous is None:
+            log.info("no stale unfinished scrape run to resume, starting a new one")
+        if previous is not None:
+            mode = previous.mode
+        run = await runs.start(
+            mode, resumed_from=previous.id if previous else None, replay=replay is not None
+        )
         run_id = run.id
-        trailing = await ScrapeRunRepository(session).trailing_parse_rate()
-
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        source: Source = ElongatedCoinSource(client=client)
-        await _scrape_all(source, stats, new_machine_ids)
+        trailing = await runs.trailing_parse_rate()
+        if previous is not None:
+            checkpoints = ScrapeCheckpointRepository(session)
+            await checkpoints.adopt(previous.id, run_id)
+            checkpoint = RunCheckpoint.restore(
+                run_id, await checkpoints.load(run_id), interval=settings.scraper_checkpoint_seconds
+            )
+        elif not replay:
+            checkpoint = RunCheckpoint(run_id, interval=settings.scraper_checkpoint_seconds)
+        state = _RunState(
+            notify=replay is None,
+            run_id=run_id,
+            checkpoint=checkpoint,
+            rolling_canary=canary.RollingCanary.from_settings(trailing),
+        )
+        if checkpoint is not None:
+            state.stats = checkpoint.stats
+            state.new_machine_ids = checkpoint.new_machine_ids
+            state.seen_urls = list(checkpoint.seen_urls)
+            state.validators = dict(checkpoint.validators)
+        if mode == "incremental":
+            state.known_activity = await MachineRepository(session).topic_activity()
+        state.machine_index = await MachineRepository(session).url_index()
+        validators = {} if replay else await HttpValidatorRepository(session).load_all()
+    stats = state.stats
+    new_machine_ids = state.new_machine_ids
+
+    # Replay gets a private client over the archive; live runs share the pooled one.
+    replay_client = (
+        httpx.AsyncClient(transport=ArchiveTransport(PageArchive(replay))) if replay else None
+    )
+    archive = PageArchive(settings.scraper_archive_dir) if settings.scraper_archive_dir else None
+    with parse_pool(settings.scraper_parse_workers) as pool:
+        async with http_clients(), replay_client or nullcontext():
+            source = ElongatedCoinSource(
+                client=replay_client,
+                validators=validators,
+                archive=None if replay else archive,
+                rate_limited=replay is None,
+                executor=pool,
+            )
+            heartbeat = asyncio.create_task(checkpoint.keep_alive()) if checkpoint else None
+            try:
+                await _scrape_all(source, state)
+            finally:
+                if heartbeat is not None:
+                    heartbeat.cancel()
+            limiter = source.limiter
+    if limiter is not None:
+        stats.request_rate = limiter.stats.effective_rate
+        stats.rate_backoffs = limiter.stats.backoffs
 
     # Canary gate: refuse to finalize if parsing looks broken.
-    verdict = canary.check(stats.parse_rate, trailing, stats.topics_seen)
+    rolling = state.rolling_canary
+    verdict = (rolling.verdict if rolling is not None else None) or canary.check(
+        stats.parse_rate, trailing, stats.topics_seen
+    )
     status = "ok" if verdict.ok else "aborted"
 
     async with session_scope() as session:
+        if verdict.ok and not replay:
+            # Never persist validators from a run that may have mis-parsed: a
+            # later 304 would otherwise pin the bad result until the page changes.
+            await HttpValidatorRepository(session).store(state.validators)
+            # Likewise a broken run must not vouch for machines still existing.
+            await MachineRepository(session).touch_seen(state.seen_urls)
+        elif not verdict.ok:
+            # The new machines stay, but nobody is alerted about a suspect run.
+            await NotificationOutboxRepository(session).discard_run(run_id)
+        # A finished run is never resumed.
+        await ScrapeCheckpointRepository(session).clear(run_id)
         db_run = await session.get(ScrapeRun, run_id)
         if db_run is not None:
             db_run.finished_at = datetime.now(UTC)
@@ -63,6 +211,15 @@ async def run_scrape(mode: str = "incremental") -> ScrapeStats:
             db_run.machines_added = stats.machines_added
             db_run.machines_updated = stats.machines_updated
             db_run.machines_unchanged = stats.machines_unchanged
+            db_run.topics_skipped = stats.topics_skipped
+            db_run.http_cache_hits = stats.http_cache_hits
+            db_run.http_cache_misses = stats.http_cache_misses
+            db_run.http_not_modified = stats.http_not_modified
+            db_run.request_rate = stats.request_rate
+            db_run.rate_backoffs = stats.rate_backoffs
+            if rolling is not None and rolling.verdict is not None:
+                db_run.aborted_after_topics = rolling.tripped_after
+                db_run.abort_reason = rolling.verdict.reason
             db_run.errors_json = json.dumps(stats.errors[:200])
 
     log.info(
@@ -74,58 +231,595 @@ async def run_scrape(mode: str = "incremental") -> ScrapeStats:
         added=stats.machines_added,
         updated=stats.machines_updated,
         unchanged=stats.machines_unchanged,
+        skipped=stats.topics_skipped,
+        not_modified=stats.http_not_modified,
+        forum_limiter=limiter.stats.as_log() if limiter is not None else None,
         errors=len(stats.errors),
+        replay=str(replay) if replay else None,
+        geocode_cache=memory_cache().stats.as_log(),
     )
 
     if not verdict.ok:
-        await _alert_admins(f"Scrape aborted ({mode}): {verdict.reason}")
+        # A replay that trips the canary is a parser experiment, not an outage.
+        if not replay:
+            await _alert_admins(f"Scrape aborted ({mode}): {verdict.reason}")
         return stats
 
-    if new_machine_ids:
-        from pressmuenzen.services.notifications import (
-            notify_admins_machines_added,
-            notify_new_machines,
-        )
+    if new_machine_ids and not replay:
+        from pressmuenzen.services.notifications import notify_admins_machines_added
 
-        await notify_new_machines(new_machine_ids)
+        # Watch notifications are in the outbox, released by status "ok" above.
         # Admins always learn about catalogue growth, independent of any watch.
         await notify_admins_machines_added(new_machine_ids)
 
     return stats
 
 
-async def _scrape_all(source: Source, stats: ScrapeStats, new_machine_ids: list[int]) -> None:
-    regions = await source.discover_regions()
-    stats.pages_fetched += 1
+async def _scrape_all(source: Source, state: _RunState) -> None:
+    """Run the crawl as three stages joined by bounded queues.
+
+    topic listing -> [fetch] -> [parse] -> [persist/geocode, batched]
+
+    Each stage has its own worker count (``SCRAPER_*_CONCURRENCY``), so the
+    forum limiter keeps issuing requests while earlier pages are still being
+    parsed, upserted or geocoded. The bounded queues apply back-pressure: a
+    slow persist stage eventually pauses fetching instead of buffering pages.
+    Persist workers collect up to ``SCRAPER_PERSIST_BATCH_SIZE`` machines (or
+    whatever arrives within ``SCRAPER_PERSIST_LINGER_SECONDS``) per write.
+    """
+    settings = get_settings()
+    fetch_q: asyncio.Queue[tuple[ScrapedRegion, TopicRef]] = asyncio.Queue(
+        settings.scraper_queue_size
+    )
+    parse_q: asyncio.Queue[_FetchedTopic] = asyncio.Queue(settings.scraper_queue_size)
+    # ``None`` tells a persist worker to flush its partial batch right away.
+    persist_q: asyncio.Queue[_ParsedTopic | None] = asyncio.Queue(settings.scraper_queue_size)
+
+    def failed(stage: str) -> Callable[[Exception], None]:
+        # Per-topic failures are handled inside each stage; this catches what
+        # escapes anyway, so a worker never dies and the queue joins still return.
+        def record(exc: Exception) -> None:
+            state.stats.errors.append(f"{stage} stage: {exc}")
+            log.error("scrape stage failed", stage=stage, error=str(exc), exc_info=exc)
+
+        return record
+
+    async def fetch(item: tuple[ScrapedRegion, TopicRef]) -> None:
+        await _fetch_topic(source, *item, state, parse_q)
+
+    async def parse(item: _FetchedTopic) -> None:
+        await _parse_topic(source, item, state, persist_q)
+
+    async def persist(batch: list[_ParsedTopic]) -> None:
+        await _persist_batch(batch, state)
+
+    persist_workers = _spawn_batched(
+        settings.scraper_persist_concurrency,
+        persist_q,
+        settings.scraper_persist_batch_size,
+        settings.scraper_persist_linger_seconds,
+        persist,
+        failed("persist"),
+    )
+
+    workers = [
+        *_spawn(settings.scraper_fetch_concurrency, fetch_q, fetch, failed("fetch")),
+        *_spawn(
+            max(settings.scraper_parse_concurrency, settings.scraper_parse_workers),
+            parse_q,
+            parse,
+            failed("parse"),
+        ),
+        *persist_workers,
+    ]
+    try:
+        await _list_all_topics(source, state, fetch_q)
+        # Upstream queues drain first, so each join sees everything it will get.
+        await fetch_q.join()
+        await parse_q.join()
+        for _ in persist_workers:
+            await persist_q.put(None)
+        await persist_q.join()
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+@dataclass(frozen=True, slots=True)
+class _FetchedTopic:
+    region: ScrapedRegion
+    topic: TopicRef
+    page: FetchedPage
+
+
+@dataclass(frozen=True, slots=True)
+class _ParsedTopic:
+    machine: ScrapedMachine
+    page: FetchedPage
+
+
+def _spawn[T](
+    count: int,
+    inbox: asyncio.Queue[T],
+    handle: Callable[[T], Awaitable[None]],
+    on_error: Callable[[Exception], None],
+) -> list[asyncio.Task[None]]:
+    return [
+        asyncio.create_task(_stage_worker(inbox, handle, on_error)) for _ in range(max(1, count))
+    ]
+
+
+async def _stage_worker[T](
+    inbox: asyncio.Queue[T],
+    handle: Callable[[T], Awaitable[None]],
+    on_error: Callable[[Exception], None],
+) -> None:
+    while True:
+        item = await inbox.get()
+        try:
+            await handle(item)
+        except Exception as exc:  # noqa: BLE001 - a dead worker would hang the crawl
+            on_error(exc)
+        finally:
+            inbox.task_done()
+
+
+def _spawn_batched[T](
+    count: int,
+    inbox: asyncio.Queue[T | None],
+    size: int,
+    linger: float,
+    handle: Callable[[list[T]], Awaitable[None]],
+    on_error: Callable[[Exception], None],
+) -> list[asyncio.Task[None]]:
+    return [
+        asyncio.create_task(_batch_worker(inbox, max(1, size), linger, handle, on_error))
+        for _ in range(max(1, count))
+    ]
+
+
+async def _batch_worker[T](
+    inbox: asyncio.Queue[T | None],
+    size: int,
+    linger: float,
+    handle: Callable[[list[T]], Awaitable[None]],
+    on_error: Callable[[Exception], None],
+) -> None:
+    """Hand ``inbox`` items to ``handle`` in batches.
+
+    A batch closes when it is full, ``linger`` seconds after its first item, or
+    when a ``None`` flush marker arrives (upstream is done). An exception from
+    ``handle`` goes to ``on_error`` and the worker carries on.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        first = await inbox.get()
+        taken = 1
+        try:
+            if first is None:
+                continue
+            batch = [first]
+            deadline = loop.time() + linger
+            while len(batch) < size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(inbox.get(), remaining)
+                except TimeoutError:
+                    break
+                taken += 1
+                if item is None:
+                    break
+                batch.append(item)
+            await handle(batch)
+        except Exception as exc:  # noqa: BLE001 - a dead worker would hang the crawl
+            on_error(exc)
+        finally:
+            for _ in range(taken):
+                inbox.task_done()
+
+
+async def _list_all_topics(
+    source: Source, state: _RunState, fetch_q: asyncio.Queue[tuple[ScrapedRegion, TopicRef]]
+) -> None:
+    stats = state.stats
+    checkpoint = state.checkpoint
+    regions = checkpoint.regions if checkpoint is not None else None
+    if regions is None:
+        regions = await source.discover_regions()
+        stats.pages_fetched += 1
+        if checkpoint is not None:
+            checkpoint.found_regions(regions)
     for region in regions:
+        if _stopped(state):
+            return
+        known = checkpoint.listed.get(region.forum_url) if checkpoint is not None else None
+        if known is not None:
+            for topic in known:
+                await fetch_q.put((region, topic))
+            continue
+        # Topics go to the fetch stage as each list page arrives.
+        listed: list[TopicRef] = []
         try:
-            topics = await source.list_topics(region)
+            async for topic in source.list_topics(region):
+                if _stopped(state):
+                    return
+                listed.append(topic)
+                await fetch_q.put((region, topic))
         except Exception as exc:  # noqa: BLE001 - per-region isolation
             stats.errors.append(f"list_topics {region.name}: {exc}")
             log.warning("region listing failed", region=region.name, error=str(exc))
             continue
-        for topic in topics:
-            await _scrape_topic(source, region, topic, stats, new_machine_ids)
+        if checkpoint is not None:
+            checkpoint.listed_region(region, listed)
+            await checkpoint.maybe_flush()
 
 
-async def _scrape_topic(source, region, topic, stats, new_machine_ids) -> None:  # type: ignore[no-untyped-def]
-    stats.topics_seen += 1
+def _stopped(state: _RunState) -> bool:
+    """True once the rolling canary has tripped: nothing more is listed or fetched."""
+    return state.rolling_canary is not None and state.rolling_canary.tripped
+
+
+def _count_parse(state: _RunState, parsed: bool) -> None:
+    """Feed one fetched topic's outcome to the rolling canary."""
+    rolling = state.rolling_canary
+    if rolling is None or rolling.tripped:
+        return
+    rolling.record(parsed)
+    if rolling.verdict is not None:
+        log.warning(
+            "canary tripped, stopping the crawl",
+            reason=rolling.verdict.reason,
+            after_topics=rolling.tripped_after,
+        )
+
+
+async def _topic_done(
+    state: _RunState,
+    url: str,
+    *,
+    seen: bool = False,
+    validator: tuple[str | None, str | None] | None = None,
+) -> None:
+    """Checkpoint a topic that reached its final outcome in this run."""
+    if state.checkpoint is not None:
+        state.checkpoint.topic_done(url, seen=seen, validator=validator)
+        await state.checkpoint.maybe_flush()
+
+
+async def _fetch_topic(
+    source: Source,
+    region: ScrapedRegion,
+    topic: TopicRef,
+    state: _RunState,
+    parse_q: asyncio.Queue[_FetchedTopic],
+) -> None:
+    stats = state.stats
+    if state.checkpoint is not None and topic.url in state.checkpoint.resumed:
+        # Finished (and counted) by the run this one resumes.
+        return
+    if _stopped(state):
+        return
+    if _topic_unchanged(topic, state.known_activity):
+        # Not fetched, so it does not count toward the canary's parse rate.
+        stats.topics_skipped += 1
+        state.seen_urls.append(topic.url)
+        await _topic_done(state, topic.url, seen=True)
+        return
     try:
-        machine = await source.fetch_machine(topic, region)
+        page = await source.fetch_topic_page(topic)
     except Exception as exc:  # noqa: BLE001 - per-topic isolation
+        stats.topics_seen += 1
         stats.errors.append(f"fetch {topic.url}: {exc}")
         log.warning("topic fetch failed", url=topic.url, error=str(exc))
+        _count_parse(state, parsed=False)
+        await _topic_done(state, topic.url)
+        return
+    if page.conditional:
+        stats.http_cache_hits += 1
+    else:
+        stats.http_cache_misses += 1
+    if page.not_modified:
+        # 304: unchanged since the last healthy run -- no parse, no DB work.
+        stats.http_not_modified += 1
+        state.seen_urls.append(topic.url)
+        await _topic_done(state, topic.url, seen=True)
+        return
+    stats.topics_seen += 1
+    await parse_q.put(_FetchedTopic(region=region, topic=topic, page=page))
+
+
+async def _parse_topic(
+    source: Source,
+    fetched: _FetchedTopic,
+    state: _RunState,
+    persist_q: asyncio.Queue[_ParsedTopic | None],
+) -> None:
+    stats = state.stats
+    page = fetched.page
+    try:
+        machine = await source.parse_machine(page.content, fetched.topic, fetched.region)
+    except Exception as exc:  # noqa: BLE001 - per-topic isolation
+        stats.errors.append(f"parse {fetched.topic.url}: {exc}")
+        log.warning("topic parse failed", url=fetched.topic.url, error=str(exc))
+        _count_parse(state, parsed=False)
+        await _topic_done(state, page.url)
+        return
+    _count_parse(state, parsed=machine is not None and machine.is_location_entry)
+    if machine is None:
+        await _topic_done(state, page.url)
         return
-    if machine is None or not machine.is_location_entry:
+    if not machine.is_location_entry:
+        # Nothing to persist for e.g. announcement topics; done with this page.
+        state.validators[page.url] = (page.etag, page.last_modified)
+        await _topic_done(state, page.url, validator=state.validators[page.url])
         return
     stats.topics_parsed += 1
-    await _upsert_machine(machine, stats, new_machine_ids)
+    await persist_q.put(_ParsedTopic(machine=machine, page=page))
+
+
+async def _persist_batch(batch: list[_ParsedTopic], state: _RunState) -> None:
+    # A URL listed under two regions must see its first occurrence committed
+    # before the second is classified; defer repeats to a follow-up batch.
+    seen: set[str] = set()
+    current: list[_ParsedTopic] = []
+    repeats: list[_ParsedTopic] = []
+    for parsed in batch:
+        url = parsed.machine.source_url
+        (repeats if url in seen else current).append(parsed)
+        seen.add(url)
+
+    written = await _write_batch(current, state)
+    for parsed in written:
+        state.validators[parsed.page.url] = (parsed.page.etag, parsed.page.last_modified)
+        state.seen_urls.append(parsed.machine.source_url)
+    if state.checkpoint is not None:
+        persisted = {id(parsed) for parsed in written}
+        for parsed in current:
+            ok = id(parsed) in persisted
+            state.checkpoint.topic_done(
+                parsed.page.url,
+                seen=ok,
+                validator=(parsed.page.etag, parsed.page.last_modified) if ok else None,
+            )
+        await state.checkpoint.maybe_flush()
+    if repeats:
+        await _persist_batch(repeats, state)
+
+
+async def _persist_machine(parsed: _ParsedTopic, state: _RunState) -> bool:
+    machine = parsed.machine
+    try:
+        await _upsert_machine(machine, state)
+    except Exception as exc:  # noqa: BLE001 - per-topic isolation
+        # The transaction rolled back; the machine keeps its previous state.
+        state.stats.errors.append(f"persist {machine.source_url}: {exc}")
+        log.warning("topic persist failed", url=machine.source_url, error=str(exc))
+        return False
+    return True
+
+
+@dataclass(slots=True)
+class _Pending:
+    """One new or changed machine of a batch, with the candidates it will get."""
+
+    parsed: _ParsedTopic
+    content_hash: str
+    machine_id: int | None
+    forum_gps: Coordinate | None = None
+    name_candidate: tuple[GpsSource, Coordinate, str] | None = None
+    geocoded: bool = False
+
+
+async def _write_batch(batch: list[_ParsedTopic], state: _RunState) -> list[_ParsedTopic]:
+    """Upsert a batch of machines with a handful of set-based statements.
+
+    Classification uses the preloaded ``machine_index``: unchanged machines only
+    get their topic activity refreshed; new and changed ones are
+    written with their coordinate candidates and precedence recomputed. Name
+    geocoding runs first, per machine, outside the batch transaction: a
+    Nominatim error drops just that topic (its row keeps its previous state), as
+    the per-topic path always did. If the batch-level lookups or the batch commit
+    fail, the batch is retried one topic at a time. Returns the topics that were
+    persisted.
+    """
+    unchanged: list[tuple[_ParsedTopic, int]] = []
+    pending: list[_Pending] = []
+    for parsed in batch:
+        content_hash = _content_hash(parsed.machine)
+        known = state.machine_index.get(parsed.machine.source_url)
+        if known is not None and known[1] == content_hash:
+            unchanged.append((parsed, known[0]))
+        else:
+            pending.append(_Pending(parsed, content_hash, machine_id=known[0] if known else None))
+
+    try:
+        pending = await _prepare_coordinates(pending, state)
+    except Exception as exc:  # noqa: BLE001 - retried per topic below
+        # Batch-level lookups failed (a transient DB error, say); the per-topic
+        # path does its own lookups, one transaction per topic.
+        log.warning("batch prepare failed, retrying per topic", size=len(batch), error=str(exc))
+        return [parsed for parsed in batch if await _persist_machine(parsed, state)]
+    written = [parsed for parsed, _ in unchanged] + [p.parsed for p in pending]
+    try:
+        await _commit_batch(unchanged, pending, state)
+    except Exception as exc:  # noqa: BLE001 - retried per topic below
+        # The batch transaction rolled back as a whole; one transaction per topic
+        # isolates the failing topic again and lets the others through.
+        log.warning("batch persist failed, retrying per topic", size=len(written), error=str(exc))
+        return [parsed for parsed in written if await _persist_machine(parsed, state)]
+    return written
+
+
+async def _commit_batch(
+    unchanged: list[tuple[_ParsedTopic, int]], pending: list[_Pending], state: _RunState
+) -> None:
+    stats = state.stats
+    async with session_scope() as session:
+        repo = MachineRepository(session)
+        new = [p for p in pending if p.machine_id is None]
+        changed = [p for p in pending if p.machine_id is not None]
+        if new:
+            await _ensure_regions(repo, state, [p.parsed.machine.region for p in new])
+            for p, new_id in zip(new, await repo.allocate_ids(len(new)), strict=True):
+                p.machine_id = new_id
+            await repo.insert_many(
+                [
+                    {
+                        "id": p.machine_id,
+                        "source_url": p.parsed.machine.source_url,
+                        "name": p.parsed.machine.name,
+                        "region_id": state.region_ids[p.parsed.machine.region.forum_url],
+                        "description": p.parsed.machine.description,
+                        "entry_date_text": p.parsed.machine.entry_date_text,
+                        "is_limited": p.parsed.machine.region.is_limited_section,
+                        "content_hash": p.content_hash,
+                        "topic_last_activity_at": p.parsed.machine.topic_last_activity,
+                        "topic_reply_count": p.parsed.machine.topic_reply_count,
+                    }
+                    for p in new
+                ]
+            )
+            if state.notify:
+                await NotificationOutboxRepository(session).enqueue(
+                    [p.machine_id for p in new if p.machine_id is not None],
+                    KIND_NEW_MACHINE,
+                    state.run_id,
+                )
+            await _checkpoint_inserted(
+                session,
+                state,
+                [
+                    (
+                        p.machine_id,
+                        p.parsed.page.url,
+                        (p.parsed.page.etag, p.parsed.page.last_modified),
+                    )
+                    for p in new
+                    if p.machine_id is not None
+                ],
+            )
+        await repo.update_many(
+            [
+                {
+                    "id": p.machine_id,
+                    "name": p.parsed.machine.name,
+                    "description": p.parsed.machine.description,
+                    "entry_date_text": p.parsed.machine.entry_date_text,
+                    "content_hash": p.content_hash,
+                    "topic_last_activity_at": p.parsed.machine.topic_last_activity,
+                    "topic_reply_count": p.parsed.machine.topic_reply_count,
+                }
+                for p in changed
+            ]
+        )
+        await repo.update_many(
+            [
+                {
+                    "id": machine_id,
+                    "topic_last_activity_at": parsed.machine.topic_last_activity,
+                    "topic_reply_count": parsed.machine.topic_reply_count,
+                }
+                for parsed, machine_id in unchanged
+            ]
+        )
+        await _write_candidates(repo, pending)
 
+    for p in pending:
+        assert p.machine_id is not None, "ids are allocated before the batch commits"
+        state.machine_index[p.parsed.machine.source_url] = (p.machine_id, p.content_hash)
+    stats.machines_unchanged += len(unchanged)
+    stats.machines_updated += len(changed)
+    stats.machines_added += len(new)
+    state.new_machine_ids.extend(p.machine_id for p in new if p.machine_id is not None)
 
-async def _upsert_machine(
-    machine: ScrapedMachine, stats: ScrapeStats, new_machine_ids: list[int]
-) -> bool:
-    """Insert or update one machine. Returns True if newly inserted."""
+
+async def _checkpoint_inserted(
+    session: AsyncSession,
+    state: _RunState,
+    machines: list[tuple[int, str, tuple[str | None, str | None] | None]],
+) -> None:
+    """Checkpoint new machines in the transaction that inserts them."""
+    checkpoint = state.checkpoint
+    if checkpoint is not None and machines:
+        await ScrapeCheckpointRepository(session).save(
+            checkpoint.run_id, checkpoint.inserted(machines)
+        )
+
+
+async def _prepare_coordinates(pending: list[_Pending], state: _RunState) -> list[_Pending]:
+    """Parse forum GPS and name-geocode where needed; drop topics whose geocode failed."""
+    for p in pending:
+        if p.parsed.machine.gps_text:
+            parsed = parse_gps_text(p.parsed.machine.gps_text)
+            if parsed is not None:
+                p.forum_gps = Coordinate(lat=parsed.lat, lon=parsed.lon)
+
+    # A changed machine whose new GPS text does not parse keeps its old forum
+    # GPS candidate, and with it stays off the geocoder (as in _derive_coordinates).
+    changed_ids = [p.machine_id for p in pending if p.machine_id is not None and not p.forum_gps]
+    async with session_scope() as session:
+        has_forum = await MachineRepository(session).machines_with_source(
+            changed_ids, GpsSource.FORUM_GPS
+        )
+
+    kept: list[_Pending] = []
+    for p in pending:
+        if p.forum_gps is None and p.machine_id not in has_forum:
+            try:
+                async with session_scope() as session:
+                    p.name_candidate = await _name_candidate(
+                        Geocoder(session, batch=True), p.parsed.machine.name
+                    )
+            except Exception as exc:  # noqa: BLE001 - per-topic isolation
+                url = p.parsed.machine.source_url
+                state.stats.errors.append(f"persist {url}: {exc}")
+                log.warning("topic persist failed", url=url, error=str(exc))
+                continue
+            p.geocoded = True
+        kept.append(p)
+    return kept
+
+
+async def _ensure_regions(
+    repo: MachineRepository, state: _RunState, regions: list[ScrapedRegion]
+) -> None:
+    missing = {r.forum_url: r for r in regions if r.forum_url not in state.region_ids}
+    if missing:
+        state.region_ids.update(
+            await repo.region_ids(
+                [(r.forum_url, r.name, r.is_limited_section) for r in missing.values()]
+            )
+        )
+
+
+async def _write_candidates(repo: MachineRepository, pending: list[_Pending]) -> None:
+    clear: list[tuple[int, GpsSource]] = []
+    add: list[tuple[int, GpsSource, Coordinate, str | None]] = []
+    for p in pending:
+        assert p.machine_id is not None, "ids are allocated before the batch commits"
+        if p.forum_gps is not None:
+            clear.append((p.machine_id, GpsSource.FORUM_GPS))
+            add.append((p.machine_id, GpsSource.FORUM_GPS, p.forum_gps, p.parsed.machine.gps_text))
+        if p.geocoded:
+            clear.append((p.machine_id, GpsSource.FULL_NAME_GEOCODE))
+            clear.append((p.machine_id, GpsSource.PARTIAL_NAME_GEOCODE))
+        if p.name_candidate is not None:
+            source, coord, query = p.name_candidate
+            add.append((p.machine_id, source, coord, query))
+    await repo.clear_candidates_many(clear)
+    await repo.add_candidates(add)
+    await repo.recompute_geoms([p.machine_id for p in pending if p.machine_id is not None])
+
+
+async def _upsert_machine(machine: ScrapedMachine, state: _RunState) -> bool:
+    """Insert or update one machine in its own transaction. Returns True if newly inserted.
+
+    The per-topic path: used when a batch fails, to isolate the failing topic.
+    """
+    stats, new_machine_ids = state.stats, state.new_machine_ids
     content_hash = _content_hash(machine)
 
     async with session_scope() as session:
@@ -133,7 +827,8 @@ async def _upsert_machine(
         existing = await repo.get_by_url(machine.source_url)
 
         if existing is not None:
-            existing.last_seen_at = func.now()
+            existing.topic_last_activity_at = machine.topic_last_activity
+            existing.topic_reply_count = machine.topic_reply_count
             if existing.content_hash == content_hash:
                 stats.machines_unchanged += 1
                 return False
@@ -144,6 +839,7 @@ async def _upsert_machine(
             existing.content_hash = content_hash
             await session.flush()
             await _derive_coordinates(repo, session, existing.id, machine)
+            state.machine_index[machine.source_url] = (existing.id, content_hash)
             stats.machines_updated += 1
             return False
 
@@ -161,10 +857,19 @@ async def _upsert_machine(
                 entry_date_text=machine.entry_date_text,
                 is_limited=machine.region.is_limited_section,
                 content_hash=content_hash,
+                topic_last_activity_at=machine.topic_last_activity,
+                topic_reply_count=machine.topic_reply_count,
             )
         )
         await session.flush()
         await _derive_coordinates(repo, session, new_id, machine)
+        if state.notify:
+            await NotificationOutboxRepository(session).enqueue(
+                [new_id], KIND_NEW_MACHINE, state.run_id
+            )
+        # The per-topic path has no page validator; the regular flush adds it.
+        await _checkpoint_inserted(session, state, [(new_id, machine.source_url, None)])
+        state.machine_index[machine.source_url] = (new_id, content_hash)
         stats.machines_added += 1
         new_machine_ids.append(new_id)
         return True
@@ -214,23 +919,27 @@ async def _geocode_name(
     await repo.clear_candidates_of_source(machine_id, GpsSource.FULL_NAME_GEOCODE)
     await repo.clear_candidates_of_source(machine_id, GpsSource.PARTIAL_NAME_GEOCODE)
 
-    geocoder = Geocoder(session)
+    candidate = await _name_candidate(Geocoder(session, batch=True), name)
+    if candidate is not None:
+        source, coord, query = candidate
+        await repo.add_candidate(machine_id, source, coord, raw_text=query)
+
+
+async def _name_candidate(
+    geocoder: Geocoder, name: str
+) -> tuple[GpsSource, Coordinate, str] | None:
+    """The name-geocode candidate for ``name``: ``(source, coordinate, query)`` or None."""
     queries = name_geocode_queries(name)
 
     coord = await geocoder.geocode(queries.full)
     if coord is not None:
-        await repo.add_candidate(
-            machine_id, GpsSource.FULL_NAME_GEOCODE, coord, raw_text=queries.full
-        )
-        return
+        return GpsSource.FULL_NAME_GEOCODE, coord, queries.full
 
     for partial in queries.partials:
-        coord = await geocoder.geocode(partial)
+        coord = await geocoder.geocode(partial, place_name=True)
         if coord is not None:
-            await repo.add_candidate(
-                machine_id, GpsSource.PARTIAL_NAME_GEOCODE, coord, raw_text=partial
-            )
-            return
+            return GpsSource.PARTIAL_NAME_GEOCODE, coord, partial
+    return None
 
 
 async def _alert_admins(message: str) -> None:
@@ -6,6 +6,7 @@ source (or a forum data dump/API) is an additive change, not a rewrite.
 
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Protocol
@@ -27,6 +28,11 @@ class ScrapedMachine:
     gps_text: str | None = None
     entry_date_text: str | None = None
     is_location_entry: bool = True
+    # Topic-list activity at fetch time. Stored per machine so an incremental
+    # run can skip topics that saw no new post; deliberately excluded from
+    # content_hash_input (a new reply does not change the location entry).
+    topic_last_activity: datetime | None = None
+    topic_reply_count: int | None = None
 
     def content_hash_input(self) -> str:
         """Stable string used for change detection (content_hash)."""
@@ -44,7 +50,26 @@ class ScrapedMachine:
 class TopicRef:
     url: str
     name: str
+    # Last-post timestamp and reply count from the topic-list row. ``None`` when
+    # the row could not be read; such topics are always fetched.
     last_activity: datetime | None = None
+    reply_count: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class FetchedPage:
+    """A fetched topic page plus the HTTP validators needed to re-request it.
+
+    ``conditional`` means validators were sent; ``not_modified`` means the
+    server answered 304 and ``content`` is empty.
+    """
+
+    url: str
+    content: bytes
+    etag: str | None = None
+    last_modified: str | None = None
+    conditional: bool = False
+    not_modified: bool = False
 
 
 class Source(Protocol):
@@ -54,21 +79,43 @@ class Source(Protocol):
 
     async def discover_regions(self) -> list[ScrapedRegion]: ...
 
-    async def list_topics(self, region: ScrapedRegion) -> list[TopicRef]: ...
+    # Async generators: topics and posts are yielded as each page is read, so
+    # downstream work starts with the first page instead of after the last.
+    def list_topics(self, region: ScrapedRegion) -> AsyncIterator[TopicRef]: ...
+
+    def fetch_thread_text(self, topic_url: str) -> AsyncIterator[str]: ...
 
     async def fetch_machine(
         self, topic: TopicRef, region: ScrapedRegion
     ) -> ScrapedMachine | None: ...
 
+    # fetch_machine split in two, so the pipeline can fetch and parse in
+    # separate stages: fetch_machine == parse_machine(fetch_topic_page(topic)).
+    async def fetch_topic_page(self, topic: TopicRef) -> FetchedPage: ...
+
+    async def parse_machine(
+        self, page: bytes, topic: TopicRef, region: ScrapedRegion
+    ) -> ScrapedMachine | None: ...
+
 
 @dataclass(slots=True)
 class ScrapeStats:
     pages_fetched: int = 0
     topics_seen: int = 0
     topics_parsed: int = 0
+    # Incremental mode: listed topics not fetched because their activity is unchanged.
+    topics_skipped: int = 0
+    # Conditional GET on topic pages: a hit means stored validators were sent, a
+    # miss means none were known; not_modified counts the 304 answers.
+    http_cache_hits: int = 0
+    http_cache_misses: int = 0
+    http_not_modified: int = 0
     machines_added: int = 0
     machines_updated: int = 0
     machines_unchanged: int = 0
+    # Effective forum request rate (req/s) and limiter backoffs; None in replays.
+    request_rate: float | None = None
+    rate_backoffs: int = 0
     errors: list[str] = field(default_factory=list)
 
     @property
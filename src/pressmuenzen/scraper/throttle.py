@@ -0,0 +1,169 @@
+"""Adaptive request pacing for the forum.
+
+The forum used to get a fixed 1 req/s whatever its state. :class:`AdaptiveLimiter`
+paces requests at a rate that moves between a floor and a ceiling (AIMD):
+
+- every healthy response adds ``increase`` req/s, up to the ceiling;
+- a 429/5xx answer, a transport error or a response slower than
+  ``slow_seconds`` multiplies the rate by ``decrease``, down to the floor,
+  at most once per request interval so one burst of failures counts once;
+- ``Retry-After`` (seconds or an HTTP date) pauses every request until then.
+
+The pacing itself is a reservation: each request takes the next slot
+``1/rate`` after the previous one and sleeps until it. :class:`LimiterStats`
+records what the run actually got, including the effective request rate.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+from pressmuenzen.config import get_settings
+from pressmuenzen.logging import get_logger
+
+log = get_logger("scraper.throttle")
+
+# Statuses that mean "the server is struggling": back off, retry later.
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+@dataclass(slots=True)
+class LimiterStats:
+    requests: int = 0
+    backoffs: int = 0
+    retry_after_waits: int = 0
+    rate_min: float | None = None
+    rate_max: float | None = None
+    first_at: float | None = None
+    last_at: float | None = None
+
+    @property
+    def effective_rate(self) -> float | None:
+        """Requests per second between the first and the last slot handed out."""
+        if self.first_at is None or self.last_at is None or self.last_at <= self.first_at:
+            return None
+        return (self.requests - 1) / (self.last_at - self.first_at)
+
+    def as_log(self) -> dict[str, float | int | None]:
+        rate = self.effective_rate
+        return {
+            "requests": self.requests,
+            "backoffs": self.backoffs,
+            "retry_after_waits": self.retry_after_waits,
+            "rate_min": round(self.rate_min, 3) if self.rate_min is not None else None,
+            "rate_max": round(self.rate_max, 3) if self.rate_max is not None else None,
+            "effective_rate": round(rate, 3) if rate is not None else None,
+        }
+
+
+def retry_after_seconds(value: str | None, now: datetime | None = None) -> float | None:
+    """Seconds to wait for a ``Retry-After`` header value, ``None`` if unusable."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    return max(0.0, (when - (now or datetime.now(UTC))).total_seconds())
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        *,
+        floor: float,
+        ceiling: float,
+        start: float = 1.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        slow_seconds: float = 5.0,
+        max_pause: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0 < floor <= ceiling:
+            raise ValueError(f"need 0 < floor <= ceiling, got {floor} and {ceiling}")
+        self.floor = floor
+        self.ceiling = ceiling
+        self._rate = min(max(start, floor), ceiling)
+        self._increase = increase
+        self._decrease = decrease
+        self._slow_seconds = slow_seconds
+        self._max_pause = max_pause
+        self._clock = clock
+        self._next_at = 0.0
+        self._pause_until = 0.0
+        self._last_decrease = float("-inf")
+        self.stats = LimiterStats(rate_min=self._rate, rate_max=self._rate)
+
+    @classmethod
+    def from_settings(cls) -> AdaptiveLimiter:
+        settings = get_settings()
+        return cls(
+            floor=settings.scraper_rate_floor,
+            ceiling=settings.scraper_rate_ceiling,
+            slow_seconds=settings.scraper_slow_response_seconds,
+        )
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    async def wait(self) -> None:
+        """Sleep until this request's slot."""
+        now = self._clock()
+        at = max(now, self._next_at, self._pause_until)
+        self._next_at = at + 1.0 / self._rate
+        self.stats.requests += 1
+        if self.stats.first_at is None:
+            self.stats.first_at = at
+        self.stats.last_at = at
+        if at > now:
+            await asyncio.sleep(at - now)
+
+    def on_response(self, status: int, latency: float, retry_after: str | None = None) -> None:
+        """Adjust the rate from one response's status and latency."""
+        if status in THROTTLE_STATUSES or status >= 500:
+            self._back_off(f"status {status}")
+            pause = retry_after_seconds(retry_after)
+            if pause is not None:
+                self._pause(pause)
+        elif latency > self._slow_seconds:
+            self._back_off("slow response")
+        elif status < 400:
+            self._set_rate(self._rate + self._increase)
+
+    def on_error(self) -> None:
+        """A request failed without a response (timeout, connection reset)."""
+        self._back_off("transport error")
+
+    def _back_off(self, reason: str) -> None:
+        now = self._clock()
+        if now - self._last_decrease < 1.0 / self._rate:
+            return
+        self._last_decrease = now
+        self.stats.backoffs += 1
+        self._set_rate(self._rate * self._decrease)
+        log.info("forum rate backoff", reason=reason, rate=round(self._rate, 3))
+
+    def _pause(self, seconds: float) -> None:
+        seconds = min(seconds, self._max_pause)
+        self.stats.retry_after_waits += 1
+        self._pause_until = max(self._pause_until, self._clock() + seconds)
+        log.warning("forum asked to retry later", retry_after_s=seconds)
+
+    def _set_rate(self, rate: float) -> None:
+        self._rate = min(max(rate, self.floor), self.ceiling)
+        self.stats.rate_min = min(self.stats.rate_min or self._rate, self._rate)
+        self.stats.rate_max = max(self.stats.rate_max or self._rate, self._rate)
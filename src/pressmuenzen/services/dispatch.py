@@ -0,0 +1,289 @@
+"""Rate-aware dispatch of outgoing Telegram messages.
+
+Telegram lets a bot send about 30 messages per second overall and about one per
+second into a single chat; beyond that it answers ``RetryAfter`` (flood control)
+and the message is lost unless resent. :class:`TelegramDispatcher` puts every
+outgoing message through one queue served by a few sender tasks:
+
+- a global rate limit (the dispatcher's own aiolimiter bucket) caps messages
+  per second;
+- per-chat pacing keeps ``per_chat_interval`` between two messages to the same
+  chat, which also go out in submission order;
+- ``RetryAfter`` pauses *every* sender for as long as Telegram asks, then the
+  message is retried; network errors are retried with backoff; anything else
+  (bot blocked by the user, bad request) fails just that message.
+
+:class:`DispatchStats` counts what happened, including queue-to-send latency and
+throughput, and is logged when the dispatcher closes.
+
+:func:`telegram_dispatcher` is the process-wide instance: every send of a
+process shares its rate budget, whichever code path it comes from.
+
+Everything the bot sends on its own initiative (new-machine notifications,
+admin alerts) goes through here. Handler replies do not: each answers one
+incoming user message, so they cannot burst past the limits, and they carry
+reply markup the dispatcher does not.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import warnings
+from dataclasses import dataclass, field
+from datetime import timedelta
+from types import TracebackType
+from typing import Any, Protocol, Self
+
+from aiolimiter import AsyncLimiter
+from telegram.error import BadRequest, NetworkError, RetryAfter
+from telegram.warnings import PTBDeprecationWarning
+
+from pressmuenzen.config import get_settings
+from pressmuenzen.logging import get_logger
+
+log = get_logger("dispatch")
+
+
+class MessageBot(Protocol):
+    """The slice of ``telegram.Bot`` the dispatcher uses; tests pass a fake."""
+
+    async def send_message(self, chat_id: int, text: str) -> Any: ...
+
+
+@dataclass(slots=True)
+class DispatchStats:
+    submitted: int = 0
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    flood_waits: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+
+    @property
+    def latency_avg(self) -> float:
+        return self.latency_total / self.sent if self.sent else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Messages sent per second of dispatcher lifetime."""
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return self.sent / elapsed if elapsed > 0 else 0.0
+
+    def as_log(self) -> dict[str, float | int]:
+        return {
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "flood_waits": self.flood_waits,
+            "latency_avg_s": round(self.latency_avg, 3),
+            "latency_max_s": round(self.latency_max, 3),
+            "throughput_per_s": round(self.throughput, 2),
+        }
+
+
+@dataclass(slots=True)
+class _Outgoing:
+    chat_id: int
+    text: str
+    done: asyncio.Future[bool]
+    queued_at: float
+    attempts: int = 0
+
+
+def _retry_after_seconds(exc: RetryAfter) -> float:
+    with warnings.catch_warnings():
+        # PTB is moving retry_after from int seconds to timedelta; accept both.
+        warnings.simplefilter("ignore", PTBDeprecationWarning)
+        value = exc.retry_after
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class TelegramDispatcher:
+    """Queue + sender tasks honouring Telegram's flood limits.
+
+    Use as ``async with TelegramDispatcher(bot) as dispatcher:``; leaving the
+    block waits until every submitted message was sent or gave up.
+    """
+
+    def __init__(
+        self,
+        bot: MessageBot,
+        *,
+        rate: float = 25.0,
+        per_chat_interval: float = 1.0,
+        senders: int = 4,
+        retries: int = 3,
+        backoff: float = 1.0,
+    ) -> None:
+        self.bot = bot
+        self.stats = DispatchStats()
+        self._limiter = AsyncLimiter(max_rate=rate, time_period=1.0)
+        self._per_chat_interval = per_chat_interval
+        self._senders = max(1, senders)
+        self._retries = retries
+        self._backoff = backoff
+        self._queue: asyncio.Queue[_Outgoing] = asyncio.Queue()
+        self._chat_locks: dict[int, asyncio.Lock] = {}
+        self._chat_ready_at: dict[int, float] = {}
+        # Flood control applies to the whole bot: nobody sends before this.
+        self._resume_at = 0.0
+        self._tasks: list[asyncio.Task[None]] = []
+
+    @classmethod
+    def from_settings(cls, bot: MessageBot) -> TelegramDispatcher:
+        settings = get_settings()
+        return cls(
+            bot,
+            rate=settings.telegram_send_rate,
+            per_chat_interval=settings.telegram_per_chat_interval_seconds,
+            senders=settings.telegram_senders,
+            retries=settings.telegram_send_retries,
+        )
+
+    async def __aenter__(self) -> Self:
+        self.stats = DispatchStats()
+        self._start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    def _start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._sender()) for _ in range(self._senders)]
+
+    async def close(self) -> None:
+        """Wait until every submitted message was sent or gave up, then stop the senders."""
+        try:
+            await self._queue.join()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+            self.stats.finished_at = time.monotonic()
+            log.info("telegram dispatch finished", **self.stats.as_log())
+
+    def submit(self, chat_id: int, text: str) -> asyncio.Future[bool]:
+        """Queue a message; the future resolves to whether it was delivered.
+
+        The sender tasks start with the first message if the dispatcher is not
+        used as a context manager.
+        """
+        self._start()
+        done: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Outgoing(chat_id, text, done, queued_at=time.monotonic()))
+        self.stats.submitted += 1
+        return done
+
+    async def send(self, chat_id: int, text: str) -> bool:
+        """Queue a message and wait for its delivery."""
+        return await self.submit(chat_id, text)
+
+    async def _sender(self) -> None:
+        while True:
+            msg = await self._queue.get()
+            try:
+                await self._deliver(msg)
+            except Exception as exc:  # noqa: BLE001 - never let one message kill a sender
+                self._fail(msg, exc)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, msg: _Outgoing) -> None:
+        # The lock is taken in dequeue order, so one chat's messages stay in order.
+        async with self._chat_locks.setdefault(msg.chat_id, asyncio.Lock()):
+            while True:
+                await _sleep_until(max(self._resume_at, self._chat_ready_at.get(msg.chat_id, 0)))
+                async with self._limiter:
+                    if self._resume_at > time.monotonic():
+                        continue  # a flood wait started while this one waited for a slot
+                    try:
+                        await self.bot.send_message(chat_id=msg.chat_id, text=msg.text)
+                    except RetryAfter as exc:
+                        delay = _retry_after_seconds(exc)
+                        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                        self.stats.flood_waits += 1
+                        log.warning("telegram flood control", retry_after_s=delay)
+                        if not self._may_retry(msg, exc):
+                            return
+                        continue
+                    except BadRequest as exc:
+                        self._fail(msg, exc)
+                        return
+                    except NetworkError as exc:
+                        if not self._may_retry(msg, exc):
+                            return
+                        backoff = min(self._backoff * 2.0 ** (msg.attempts - 1), 30.0)
+                        self._chat_ready_at[msg.chat_id] = time.monotonic() + backoff
+                        continue
+                now = time.monotonic()
+                self._chat_ready_at[msg.chat_id] = now + self._per_chat_interval
+                latency = now - msg.queued_at
+                self.stats.sent += 1
+                self.stats.latency_total += latency
+                self.stats.latency_max = max(self.stats.latency_max, latency)
+                if not msg.done.done():
+                    msg.done.set_result(True)
+                return
+
+    def _may_retry(self, msg: _Outgoing, exc: Exception) -> bool:
+        msg.attempts += 1
+        if msg.attempts > self._retries:
+            self._fail(msg, exc)
+            return False
+        self.stats.retries += 1
+        return True
+
+    def _fail(self, msg: _Outgoing, exc: BaseException) -> None:
+        self.stats.failed += 1
+        log.warning("telegram send failed", chat_id=msg.chat_id, error=str(exc))
+        if not msg.done.done():
+            msg.done.set_result(False)
+
+
+_dispatcher: TelegramDispatcher | None = None
+_dispatcher_loop: asyncio.AbstractEventLoop | None = None
+
+
+def telegram_dispatcher() -> TelegramDispatcher:
+    """The process-wide dispatcher, so every send shares one rate budget.
+
+    Created on first use with a bot for ``TELEGRAM_TOKEN``; a new event loop
+    (``asyncio.run`` called again) gets a new one.
+    """
+    global _dispatcher, _dispatcher_loop
+    loop = asyncio.get_running_loop()
+    if _dispatcher is None or _dispatcher_loop is not loop:
+        from telegram import Bot
+
+        _dispatcher = TelegramDispatcher.from_settings(Bot(get_settings().telegram_token))
+        _dispatcher_loop = loop
+    return _dispatcher
+
+
+async def close_dispatcher() -> None:
+    """Drain and stop the process-wide dispatcher, if one was started (process shutdown)."""
+    global _dispatcher, _dispatcher_loop
+    dispatcher, _dispatcher, _dispatcher_loop = _dispatcher, None, None
+    if dispatcher is not None:
+        await dispatcher.close()
+        shutdown = getattr(dispatcher.bot, "shutdown", None)
+        if shutdown is not None:
+            await shutdown()
+
+
+async def _sleep_until(deadline: float) -> None:
+    delay = deadline - time.monotonic()
+    if delay > 0:
+        await asyncio.sleep(delay)
@@ -74,18 +74,23 @@ def _secret() -> bytes:
     return get_settings().map_token_secret.encode("utf-8")
 
 
+def _encode_token(payload: dict[str, Any], now: float | None) -> str:
+    """Sign ``payload`` with a 24h expiry as ``<body>.<signature>``."""
+    payload["exp"] = int((now or time.time()) + _TOKEN_TTL_SECONDS)
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    body = base64.urlsafe_b64encode(raw).rstrip(b"=")
+    sig = base64.urlsafe_b64encode(_sign(body)).rstrip(b"=")
+    return f"{body.decode()}.{sig.decode()}"
+
+
 def make_map_token(origin: Coordinate, mode: str, value: float, *, now: float | None = None) -> str:
     payload = {
         "lat": round(origin.lat, 6),
         "lon": round(origin.lon, 6),
         "mode": mode,  # "radius" | "nearest" | "all"
         "value": value,
-        "exp": int((now or time.time()) + _TOKEN_TTL_SECONDS),
     }
-    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
-    body = base64.urlsafe_b64encode(raw).rstrip(b"=")
-    sig = base64.urlsafe_b64encode(_sign(body)).rstrip(b"=")
-    return f"{body.decode()}.{sig.decode()}"
+    return _encode_token(payload, now)
 
 
 def make_diff_map_token(
@@ -101,15 +106,20 @@ def make_diff_map_token(
         "new_lat": round(new.lat, 6),
         "new_lon": round(new.lon, 6),
         "name": name,
-        "exp": int((now or time.time()) + _TOKEN_TTL_SECONDS),
     }
     if old is not None:
         payload["old_lat"] = round(old.lat, 6)
         payload["old_lon"] = round(old.lon, 6)
-    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
-    body = base64.urlsafe_b64encode(raw).rstrip(b"=")
-    sig = base64.urlsafe_b64encode(_sign(body)).rstrip(b"=")
-    return f"{body.decode()}.{sig.decode()}"
+    return _encode_token(payload, now)
+
+
+def make_digest_map_token(user_id: int, batch: int, *, now: float | None = None) -> str:
+    """Sign a token for the machines of one notification digest.
+
+    The machines are looked up server-side from ``notifications_sent``, so the
+    token stays the same few dozen bytes however many machines the digest has.
+    """
+    return _encode_token({"mode": "digest", "user": user_id, "batch": batch}, now)
 
 
 def parse_map_token(token: str, *, now: float | None = None) -> dict[str, Any] | None:
@@ -1,115 +1,381 @@
 """Watch matching + Telegram dispatch for newly added machines.
 
-After a scrape, find watches whose centre is within radius_km of a newly added
-machine (ST_DWithin), send one message per (user, machine), and record it in
-notifications_sent for idempotency.
+The scraper queues every new machine in ``notification_outbox``, in the
+transaction that inserts it; the ``notify-worker`` role drains that outbox. Per
+batch, one spatial join finds every (user, machine) pair where a new machine
+lies within radius_km of one of the user's watches (ST_DWithin, indexed). The
+pairs are recorded in notifications_sent for idempotency with one multi-row
+insert. A user with one new match gets one message; a user with several gets
+one digest listing them by distance, with a hosted map of the whole batch. A
+digest is kept within Telegram's message limit; its map link names the batch,
+and the hosted map looks the machines up here.
+
+Claiming and recording commit before anything is sent; each message then marks
+its pairs sent once Telegram took it. A worker that dies mid-batch leaves only
+its unsent pairs pending, and another worker sends those again after
+``NOTIFY_REDELIVER_SECONDS``.
 """
 
 from __future__ import annotations
 
-from typing import Any, cast
+import asyncio
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING
 
-from sqlalchemy import CursorResult, select
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Select,
+    and_,
+    any_,
+    bindparam,
+    delete,
+    func,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from pressmuenzen.bot import texts
 from pressmuenzen.config import get_settings
-from pressmuenzen.db.geo import distance_m, lat_expr, lon_expr
-from pressmuenzen.db.models import Machine, NotificationSent, User, Watch
-from pressmuenzen.domain.models import Coordinate
-from pressmuenzen.logging import get_logger
+from pressmuenzen.db.bulk import chunked
+from pressmuenzen.db.models import (
+    Machine,
+    NotificationSent,
+    User,
+    Watch,
+    notification_batch_seq,
+)
+from pressmuenzen.db.repositories.outbox import NotificationOutboxRepository
+from pressmuenzen.logging import configure_logging, get_logger
+from pressmuenzen.services.maps import make_digest_map_token
+
+if TYPE_CHECKING:
+    from pressmuenzen.services.dispatch import TelegramDispatcher
 
 log = get_logger("notifications")
 
 KIND_NEW_MACHINE = "new_machine"
 
+# Machines listed by name in a digest; the hosted map shows all of them.
+DIGEST_MAX_ITEMS = 20
 
-async def _machine_coord(
-    session: AsyncSession, machine_id: int
-) -> tuple[str, str, Coordinate] | None:
-    row = (
-        await session.execute(
-            select(
-                Machine.name, Machine.source_url, lat_expr(Machine.geom), lon_expr(Machine.geom)
-            ).where(Machine.id == machine_id, Machine.geom.isnot(None))
+# Telegram rejects longer texts; counted in UTF-16 code units.
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+@dataclass(frozen=True, slots=True)
+class WatchMatch:
+    """A new machine inside one of a user's watches, at its closest watch's distance."""
+
+    user_id: int
+    chat_id: int
+    machine_id: int
+    name: str
+    url: str
+    distance_km: float
+
+
+def _watch_matches_stmt(
+    machine_ids: Sequence[int], max_radius_km: float
+) -> Select[int, int, int, str, str, float]:
+    """Spatial join of ``machine_ids`` against every active watch of an unmuted user.
+
+    One row per (user, machine): ``DISTINCT ON`` keeps the closest of a user's
+    matching watches. Each watch has its own radius, and ``ST_DWithin`` against
+    a per-row distance cannot use an index; the constant ``max_radius_km``
+    prefilter can (``idx_watches_center_geog``), the exact per-watch check follows.
+    """
+    dist = func.ST_Distance(Watch.center_geog, Machine.geog)
+    ids = bindparam("machine_ids", list(machine_ids), type_=ARRAY(Integer))
+    return (
+        select(User.id, User.telegram_chat_id, Machine.id, Machine.name, Machine.source_url, dist)
+        .select_from(Machine)
+        .join(
+            Watch,
+            and_(
+                func.ST_DWithin(Watch.center_geog, Machine.geog, max_radius_km * 1000.0),
+                func.ST_DWithin(Watch.center_geog, Machine.geog, Watch.radius_km * 1000.0),
+            ),
         )
-    ).first()
-    if row is None or row[2] is None:
-        return None
-    return row[0], row[1], Coordinate(lat=row[2], lon=row[3])
-
-
-async def _matches_for_machine(
-    session: AsyncSession, coord: Coordinate
-) -> list[tuple[int, int, float]]:
-    """Return (user_id, chat_id, distance_km) for watches that cover ``coord``."""
-    dist = distance_m(Watch.center_geom, coord)
-    stmt = (
-        select(User.id, User.telegram_chat_id, dist)
         .join(User, Watch.user_id == User.id)
-        .where(
-            Watch.active.is_(True),
-            User.muted.is_(False),
-            dist <= Watch.radius_km * 1000.0,
+        .where(Machine.id == any_(ids), Watch.active.is_(True), User.muted.is_(False))
+        .distinct(User.id, Machine.id)
+        .order_by(User.id, Machine.id, dist)
+    )
+
+
+async def _max_watch_radius_km(session: AsyncSession) -> float | None:
+    """Largest radius of any active watch, or ``None`` if there is none."""
+    return (
+        await session.execute(select(func.max(Watch.radius_km)).where(Watch.active.is_(True)))
+    ).scalar_one()
+
+
+async def match_watches(session: AsyncSession, machine_ids: Sequence[int]) -> list[WatchMatch]:
+    """Every (user, machine) pair where a new machine lies inside a user's watch."""
+    if not machine_ids:
+        return []
+    max_radius_km = await _max_watch_radius_km(session)
+    if max_radius_km is None:
+        return []
+    rows = await session.execute(_watch_matches_stmt(machine_ids, max_radius_km))
+    return [
+        WatchMatch(uid, chat_id, mid, name, url, d / 1000.0)
+        for uid, chat_id, mid, name, url, d in rows.all()
+    ]
+
+
+async def _next_batch(session: AsyncSession) -> int:
+    return (await session.execute(select(notification_batch_seq.next_value()))).scalar_one()
+
+
+async def _record_many(
+    session: AsyncSession, pairs: Sequence[tuple[int, int]], batch: int | None = None
+) -> set[tuple[int, int]]:
+    """Insert notifications_sent rows for ``(user_id, machine_id)``; return the new ones."""
+    recorded: set[tuple[int, int]] = set()
+    for chunk in chunked(pairs):
+        stmt = (
+            insert(NotificationSent)
+            .values(
+                [
+                    {"user_id": uid, "machine_id": mid, "kind": KIND_NEW_MACHINE, "batch_id": batch}
+                    for uid, mid in chunk
+                ]
+            )
+            .on_conflict_do_nothing(constraint="uq_notification_idem")
+            .returning(NotificationSent.user_id, NotificationSent.machine_id)
         )
+        recorded.update((uid, mid) for uid, mid in (await session.execute(stmt)).all())
+    return recorded
+
+
+def _pair_filter(pairs: Sequence[tuple[int, int]]) -> ColumnElement[bool]:
+    return and_(
+        tuple_(NotificationSent.user_id, NotificationSent.machine_id).in_(list(pairs)),
+        NotificationSent.kind == KIND_NEW_MACHINE,
     )
-    rows = (await session.execute(stmt)).all()
-    # One alert per user even if several of their watches match.
-    best: dict[int, tuple[int, float]] = {}
-    for uid, chat_id, d in rows:
-        if uid not in best or d < best[uid][1]:
-            best[uid] = (chat_id, d / 1000.0)
-    return [(uid, chat_id, km) for uid, (chat_id, km) in best.items()]
-
-
-async def _record_once(session: AsyncSession, user_id: int, machine_id: int) -> bool:
-    """Insert a notifications_sent row; return False if it already existed."""
-    stmt = (
-        insert(NotificationSent)
-        .values(user_id=user_id, machine_id=machine_id, kind=KIND_NEW_MACHINE)
-        .on_conflict_do_nothing(constraint="uq_notification_idem")
+
+
+async def _mark_sent(session: AsyncSession, pairs: Sequence[tuple[int, int]]) -> None:
+    if pairs:
+        await session.execute(
+            update(NotificationSent).where(_pair_filter(pairs)).values(sent_at=func.now())
+        )
+
+
+async def _forget(session: AsyncSession, pairs: Sequence[tuple[int, int]]) -> None:
+    """Drop pending pairs that will not be sent (delivery gave up, or the watch is gone)."""
+    if pairs:
+        await session.execute(
+            delete(NotificationSent).where(_pair_filter(pairs), NotificationSent.sent_at.is_(None))
+        )
+
+
+async def digest_machine_ids(session: AsyncSession, user_id: int, batch: int) -> list[int]:
+    """The machines of one user's digest, for its hosted map."""
+    rows = await session.execute(
+        select(NotificationSent.machine_id)
+        .where(NotificationSent.user_id == user_id, NotificationSent.batch_id == batch)
+        .order_by(NotificationSent.machine_id)
     )
-    result = cast("CursorResult[Any]", await session.execute(stmt))
-    return result.rowcount > 0
+    return list(rows.scalars().all())
 
 
-async def notify_new_machines(machine_ids: list[int]) -> int:
-    """Dispatch notifications for the given new machines. Returns messages sent."""
-    settings = get_settings()
-    if not settings.telegram_token:
-        log.warning("no telegram token; skipping notifications", count=len(machine_ids))
-        return 0
+def _telegram_len(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _digest_text(matches: Sequence[WatchMatch], map_url: str) -> str:
+    """One message listing a user's new machines, closest first, plus a map of all of them.
+
+    At most ``DIGEST_MAX_ITEMS`` are listed, and fewer if more would not fit in
+    one Telegram message next to the "and N more" line and the map link.
+    """
+    ordered = sorted(matches, key=lambda m: (m.distance_km, m.machine_id))
+    header = texts.NOTIFY_DIGEST_HEADER.format(count=len(ordered))
+    footer = texts.NOTIFY_DIGEST_MAP.format(url=map_url)
+    items: list[str] = []
+    for m in ordered[:DIGEST_MAX_ITEMS]:
+        item = texts.NOTIFY_DIGEST_ITEM.format(
+            distance=round(m.distance_km, 1), name=m.name, url=m.url
+        )
+        more = texts.NOTIFY_DIGEST_MORE.format(count=len(ordered) - len(items) - 1)
+        if (
+            _telegram_len("\n\n".join([header, *items, item, more, footer]))
+            > TELEGRAM_MESSAGE_LIMIT
+        ):
+            break
+        items.append(item)
+    lines = [header, *items]
+    if len(items) < len(ordered):
+        lines.append(texts.NOTIFY_DIGEST_MORE.format(count=len(ordered) - len(items)))
+    lines.append(footer)
+    return "\n\n".join(lines)
 
-    from telegram import Bot
 
+def _messages(matches: Sequence[WatchMatch], batch: int) -> list[tuple[int, str]]:
+    """``(chat_id, text)`` per user: the single-machine text, or a digest for several."""
+    by_chat: dict[int, list[WatchMatch]] = {}
+    for match in matches:
+        by_chat.setdefault(match.chat_id, []).append(match)
+    messages = []
+    for chat_id, mine in by_chat.items():
+        if len(mine) == 1:
+            (match,) = mine
+            text = texts.NOTIFY_NEW_MACHINE.format(
+                distance=round(match.distance_km, 1), name=match.name, url=match.url
+            )
+        else:
+            token = make_digest_map_token(mine[0].user_id, batch)
+            text = _digest_text(mine, f"{get_settings().public_base_url_clean}/map/{token}")
+        messages.append((chat_id, text))
+    return messages
+
+
+async def _send_recorded(
+    dispatcher: TelegramDispatcher, matches: Sequence[WatchMatch], batch: int
+) -> int:
+    """Send the messages for recorded ``matches``, marking each delivered one sent."""
+    from pressmuenzen.db.engine import session_scope
+
+    pairs: dict[int, list[tuple[int, int]]] = {}
+    for match in matches:
+        pairs.setdefault(match.chat_id, []).append((match.user_id, match.machine_id))
+
+    async def send(chat_id: int, text: str) -> bool:
+        delivered = await dispatcher.submit(chat_id, text)
+        async with session_scope() as session:
+            if delivered:
+                await _mark_sent(session, pairs[chat_id])
+            else:
+                await _forget(session, pairs[chat_id])
+        return delivered
+
+    return sum(
+        await asyncio.gather(*(send(chat_id, text) for chat_id, text in _messages(matches, batch)))
+    )
+
+
+async def drain_outbox_batch(dispatcher: TelegramDispatcher, batch_size: int) -> int:
+    """Send the notifications of one batch of outbox rows. Returns rows claimed.
+
+    Claim and record happen in one short transaction, with the outbox rows
+    locked ``FOR UPDATE SKIP LOCKED`` so parallel workers take disjoint batches;
+    the rows are deleted in it too. Sending starts after the commit, so no lock
+    or transaction is held while Telegram is slow, and a failure halfway leaves
+    the messages already sent marked as such.
+    """
+    from pressmuenzen.db.engine import session_scope
+
+    async with session_scope() as session:
+        outbox = NotificationOutboxRepository(session)
+        claimed = await outbox.claim(batch_size)
+        if not claimed:
+            return 0
+        machine_ids = [mid for _, mid, kind in claimed if kind == KIND_NEW_MACHINE]
+        matches = await match_watches(session, machine_ids)
+        batch = await _next_batch(session)
+        recorded = await _record_many(session, [(m.user_id, m.machine_id) for m in matches], batch)
+        fresh = [m for m in matches if (m.user_id, m.machine_id) in recorded]
+        await outbox.remove([row_id for row_id, _, _ in claimed])
+    sent = await _send_recorded(dispatcher, fresh, batch)
+    log.info(
+        "notifications dispatched",
+        sent=sent,
+        matches=len(fresh),
+        machines=len(machine_ids),
+    )
+    return len(claimed)
+
+
+async def redeliver_abandoned(
+    dispatcher: TelegramDispatcher, older_than: timedelta, batch_size: int
+) -> int:
+    """Send again what a crashed worker recorded but never marked sent. Returns rows taken.
+
+    A pending row is taken once its ``claimed_at`` is ``older_than`` old and
+    claimed afresh, so workers running side by side take disjoint rows.
+    """
+    from pressmuenzen.db.engine import session_scope
+
+    async with session_scope() as session:
+        rows = await session.execute(
+            select(NotificationSent.id, NotificationSent.user_id, NotificationSent.machine_id)
+            .where(
+                NotificationSent.sent_at.is_(None),
+                NotificationSent.kind == KIND_NEW_MACHINE,
+                NotificationSent.claimed_at < func.now() - older_than,
+            )
+            .order_by(NotificationSent.claimed_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        pending = rows.all()
+        if not pending:
+            return 0
+        # A new batch: the re-sent digest's map lists exactly what it re-sends.
+        batch = await _next_batch(session)
+        await session.execute(
+            update(NotificationSent)
+            .where(NotificationSent.id.in_([row_id for row_id, _, _ in pending]))
+            .values(claimed_at=func.now(), batch_id=batch)
+        )
+        wanted = {(uid, mid) for _, uid, mid in pending}
+        matches = [
+            m
+            for m in await match_watches(session, sorted({mid for _, mid in wanted}))
+            if (m.user_id, m.machine_id) in wanted
+        ]
+        # The watch was removed or the user muted since: nothing to send any more.
+        await _forget(session, sorted(wanted - {(m.user_id, m.machine_id) for m in matches}))
+    sent = await _send_recorded(dispatcher, matches, batch)
+    log.warning("abandoned notifications sent again", rows=len(pending), sent=sent)
+    return len(pending)
+
+
+async def _sweep(dispatcher: TelegramDispatcher) -> None:
+    """Expire the outbox rows of dead scrape runs and re-send abandoned notifications."""
     from pressmuenzen.db.engine import session_scope
 
-    sent = 0
-    bot = Bot(settings.telegram_token)
-    async with bot:
-        for machine_id in machine_ids:
-            async with session_scope() as session:
-                info = await _machine_coord(session, machine_id)
-                if info is None:
-                    continue
-                name, url, coord = info
-                matches = await _matches_for_machine(session, coord)
-                for user_id, chat_id, distance_km in matches:
-                    if not await _record_once(session, user_id, machine_id):
-                        continue
-                    try:
-                        await bot.send_message(
-                            chat_id=chat_id,
-                            text=texts.NOTIFY_NEW_MACHINE.format(
-                                distance=round(distance_km, 1), name=name, url=url
-                            ),
-                        )
-                        sent += 1
-                    except Exception as exc:  # noqa: BLE001
-                        log.warning("notify send failed", chat_id=chat_id, error=str(exc))
-    log.info("notifications dispatched", sent=sent, machines=len(machine_ids))
-    return sent
+    settings = get_settings()
+    async with session_scope() as session:
+        expired = await NotificationOutboxRepository(session).expire_dead_runs(
+            timedelta(hours=settings.notify_dead_run_hours)
+        )
+    if expired:
+        log.warning("outbox rows of unfinished scrape runs expired", rows=expired)
+    older_than = timedelta(seconds=settings.notify_redeliver_seconds)
+    while await redeliver_abandoned(dispatcher, older_than, settings.notify_batch_size):
+        pass
+
+
+async def run_notify_worker(*, once: bool = False) -> None:
+    """The ``notify-worker`` role: drain the outbox, then poll it for more.
+
+    With ``once`` it stops as soon as the outbox is empty.
+    """
+    configure_logging()
+    settings = get_settings()
+    if not settings.telegram_token:
+        log.error("no telegram token; notify-worker cannot send")
+        raise SystemExit(1)
+
+    from pressmuenzen.services.dispatch import telegram_dispatcher
+
+    dispatcher = telegram_dispatcher()
+    while True:
+        await _sweep(dispatcher)
+        while await drain_outbox_batch(dispatcher, settings.notify_batch_size):
+            pass
+        if once:
+            return
+        await asyncio.sleep(settings.notify_poll_seconds)
 
 
 async def notify_admins(message: str) -> int:
@@ -117,24 +383,22 @@ async def notify_admins(message: str) -> int:
 
     Single funnel for all admin alerts (catalogue changes, scrape aborts) so the
     ``[Pressmuenzen]`` prefix and per-recipient error handling live in one place.
+    Messages go through the process-wide :class:`TelegramDispatcher`, so alerts
+    share its rate budget with everything else the process sends.
     """
     settings = get_settings()
     if not settings.telegram_token or not settings.admin_chat_ids:
         log.warning("cannot notify admins; token or ADMIN_CHAT_IDS missing", message=message)
         return 0
 
-    from telegram import Bot
-
-    sent = 0
-    bot = Bot(settings.telegram_token)
-    async with bot:
-        for chat_id in settings.admin_chat_ids:
-            try:
-                await bot.send_message(chat_id=chat_id, text=f"[Pressmuenzen] {message}")
-                sent += 1
-            except Exception as exc:  # noqa: BLE001
-                log.warning("admin notify failed", chat_id=chat_id, error=str(exc))
-    return sent
+    from pressmuenzen.services.dispatch import telegram_dispatcher
+
+    dispatcher = telegram_dispatcher()
+    deliveries = [
+        dispatcher.submit(chat_id, f"[Pressmuenzen] {message}")
+        for chat_id in settings.admin_chat_ids
+    ]
+    return sum(await asyncio.gather(*deliveries))
 
 
 async def notify_admins_machines_added(machine_ids: list[int]) -> int:
@@ -0,0 +1,63 @@
+"""Bulk precedence recompute, checked against the pure resolver.
+
+:meth:`MachineRepository.recompute_geoms` resolves precedence in SQL
+(``DISTINCT ON (machine_id) ... ORDER BY precedence``). :func:`resolve` stays
+the specification: :func:`precedence_mismatches` runs both over the same
+candidates and lists every machine on which they disagree.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from pressmuenzen.db.engine import session_scope
+from pressmuenzen.db.repositories.machines import MachineRepository
+from pressmuenzen.domain.precedence import resolve
+from pressmuenzen.logging import configure_logging, get_logger
+
+log = get_logger("recompute")
+
+
+async def precedence_mismatches(
+    repo: MachineRepository, machine_ids: Sequence[int] | None = None
+) -> list[int]:
+    """Machines whose SQL-resolved coordinate differs from ``resolve()`` (all by default)."""
+    in_sql = await repo.resolved_geoms(machine_ids)
+    candidates = await repo.candidates_by_machine(machine_ids)
+    return sorted(
+        machine_id
+        for machine_id, chosen in in_sql.items()
+        if chosen != resolve(candidates.get(machine_id, []))
+    )
+
+
+async def run_recompute(machine_ids: Sequence[int] | None = None) -> int:
+    """Recompute geom/gps_source for ``machine_ids`` (all machines if ``None``).
+
+    Returns the number of machines whose chosen coordinate changed.
+    """
+    configure_logging()
+    async with session_scope() as session:
+        repo = MachineRepository(session)
+        if machine_ids is None:
+            changed = await repo.recompute_all_geoms()
+        else:
+            changed = await repo.recompute_geoms(machine_ids)
+    log.info(
+        "recompute finished",
+        scope="all" if machine_ids is None else len(machine_ids),
+        changed=changed,
+    )
+    return changed
+
+
+async def run_check(machine_ids: Sequence[int] | None = None) -> list[int]:
+    """Compare the SQL resolver with ``resolve()`` without writing anything."""
+    configure_logging()
+    async with session_scope() as session:
+        mismatches = await precedence_mismatches(MachineRepository(session), machine_ids)
+    if mismatches:
+        log.error("precedence mismatch", count=len(mismatches), machine_ids=mismatches[:20])
+    else:
+        log.info("precedence check passed")
+    return mismatches
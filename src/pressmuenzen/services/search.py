@@ -24,5 +24,9 @@ class SearchService:
         radius_km = max(0.1, min(radius_km, 2000.0))
         return await self.repo.within_radius_km(origin, radius_km)
 
+    async def machines(self, machine_ids: list[int]) -> list[MachineHit]:
+        # Ids of one notification digest, at most NOTIFY_BATCH_SIZE: shown in full.
+        return await self.repo.hits_by_ids(machine_ids)
+
     async def all_machines(self) -> list[MachineHit]:
         return await self.repo.all_with_coords()
@@ -2,21 +2,30 @@
 
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from pressmuenzen.http_clients import http_clients
 from pressmuenzen.logging import configure_logging
 
 _BASE = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(_BASE / "templates"))
 
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    async with http_clients():
+        yield
+
+
 def create_app() -> FastAPI:
     configure_logging()
-    app = FastAPI(title="Pressmuenzen", docs_url=None, redoc_url=None)
+    app = FastAPI(title="Pressmuenzen", docs_url=None, redoc_url=None, lifespan=_lifespan)
     app.mount("/static", StaticFiles(directory=str(_BASE / "static")), name="static")
 
     from pressmuenzen.web.routes import admin, api, health
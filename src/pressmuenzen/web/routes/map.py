@@ -12,6 +12,7 @@ from pressmuenzen.db.engine import session_scope
 from pressmuenzen.db.repositories.machines import MachineRepository
 from pressmuenzen.domain.models import Coordinate
 from pressmuenzen.services.maps import machines_to_geojson, parse_map_token
+from pressmuenzen.services.notifications import digest_machine_ids
 from pressmuenzen.services.search import SearchService
 from pressmuenzen.web.app import templates
 
@@ -59,20 +60,22 @@ async def hosted_map(request: Request, token: str) -> HTMLResponse:
             },
         )
 
-    origin = Coordinate(lat=payload["lat"], lon=payload["lon"])
-    value = payload["value"]
-
     async with session_scope() as session:
         service = SearchService(MachineRepository(session))
-        if mode == "radius":
-            hits = await service.within_radius(origin, float(value))
-            show_origin: Coordinate | None = origin
-        elif mode == "nearest":
-            hits = await service.nearest(origin, int(value))
-            show_origin = origin
-        else:  # "all"
+        show_origin: Coordinate | None = None
+        if mode == "digest":  # a notification digest: the machines of one batch
+            ids = await digest_machine_ids(session, int(payload["user"]), int(payload["batch"]))
+            hits = await service.machines(ids)
+        elif mode in ("radius", "nearest"):
+            show_origin = Coordinate(lat=payload["lat"], lon=payload["lon"])
+            if mode == "radius":
+                hits = await service.within_radius(show_origin, float(payload["value"]))
+            else:
+                hits = await service.nearest(show_origin, int(payload["value"]))
+        elif mode == "all":
             hits = await service.all_machines()
-            show_origin = None
+        else:  # e.g. the id-list digest tokens of earlier releases
+            return HTMLResponse("Link ungültig oder abgelaufen.", status_code=404)
 
     geojson = machines_to_geojson(hits, origin=show_origin)
     return templates.TemplateResponse(
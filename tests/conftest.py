@@ -36,6 +36,7 @@ async def db_session(test_database_url: str) -> AsyncIterator[object]:
     engine = create_async_engine(test_database_url)
     async with engine.begin() as conn:
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
 
     maker = async_sessionmaker(engine, expire_on_commit=False)
@@ -2,14 +2,41 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
 from datetime import UTC, datetime, timedelta
 
 import pytest
-
-from pressmuenzen.db.models import Machine
-from pressmuenzen.db.repositories.machines import MachineRepository
+from sqlalchemy import ClauseElement, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from pressmuenzen.db.models import GeocodeCache, Machine, NotificationSent, ScrapeRun
+from pressmuenzen.db.rate_limit import SharedRateLimiter
+from pressmuenzen.db.repositories.checkpoints import ScrapeCheckpointRepository
+from pressmuenzen.db.repositories.corrections import ScrapeRunRepository
+from pressmuenzen.db.repositories.gazetteer import GazetteerRepository
+from pressmuenzen.db.repositories.http_cache import HttpValidatorRepository
+from pressmuenzen.db.repositories.machines import (
+    MachineRepository,
+    _nearest_stmt,
+    _within_radius_stmt,
+)
+from pressmuenzen.db.repositories.outbox import NotificationOutboxRepository
 from pressmuenzen.db.repositories.users import UserRepository
 from pressmuenzen.domain.models import Coordinate, GpsSource, MachineStatus
+from pressmuenzen.scraper.geocoding import Geocoder, memory_cache
+from pressmuenzen.services.notifications import (
+    KIND_NEW_MACHINE,
+    _forget,
+    _mark_sent,
+    _next_batch,
+    _record_many,
+    _watch_matches_stmt,
+    digest_machine_ids,
+    match_watches,
+)
+from pressmuenzen.services.recompute import precedence_mismatches
 
 pytestmark = pytest.mark.integration
 
@@ -37,6 +64,39 @@ async def test_recompute_geom_uses_precedence(db_session) -> None:  # type: igno
     assert hit.coordinate.lat == pytest.approx(KOELN.lat, abs=1e-6)
 
 
+async def test_set_based_recompute_agrees_with_resolve(db_session) -> None:  # type: ignore[no-untyped-def]
+    repo = MachineRepository(db_session)
+    for mid in range(1100, 1104):
+        await _make_machine(db_session, repo, mid, f"u{mid}")
+    await repo.add_candidates(
+        [
+            (1100, GpsSource.PARTIAL_NAME_GEOCODE, BERLIN, None),
+            (1100, GpsSource.CORRECTED, BONN, None),
+            (1100, GpsSource.FORUM_GPS, KOELN, None),
+            # Equal precedence: the older candidate wins, in SQL as in resolve().
+            (1101, GpsSource.FULL_NAME_GEOCODE, BONN, None),
+            (1101, GpsSource.FULL_NAME_GEOCODE, KOELN, None),
+            (1102, GpsSource.NONE, BERLIN, None),
+        ]
+    )  # 1103 has no candidate at all
+
+    assert await precedence_mismatches(repo, [1100, 1101, 1102, 1103]) == []
+    assert await repo.recompute_geoms([1100, 1101, 1102, 1103]) == 2
+    # Already resolved: nothing is rewritten.
+    assert await repo.recompute_all_geoms() == 0
+    db_session.expire_all()  # bulk statement bypasses the identity map
+
+    resolved = await repo.resolved_geoms([1100, 1101, 1102, 1103])
+    assert resolved[1100][1] is GpsSource.CORRECTED
+    assert resolved[1101][1] is GpsSource.FULL_NAME_GEOCODE
+    assert resolved[1102] == (None, GpsSource.NONE)
+    assert resolved[1103] == (None, GpsSource.NONE)
+    hit = await repo.get_hit(1101)
+    assert hit is not None
+    assert hit.coordinate.lat == pytest.approx(BONN.lat, abs=1e-6)
+    assert await repo.get_hit(1102) is None
+
+
 async def test_within_radius_and_nearest(db_session) -> None:  # type: ignore[no-untyped-def]
     repo = MachineRepository(db_session)
     await _make_machine(db_session, repo, 1000, "u1000")
@@ -53,6 +113,17 @@ async def test_within_radius_and_nearest(db_session) -> None:  # type: ignore[no
     assert nearest[0].id == 1000  # Bonn is closer than Berlin
 
 
+async def test_hits_by_ids_skips_unplaced_machines(db_session) -> None:  # type: ignore[no-untyped-def]
+    repo = MachineRepository(db_session)
+    for mid in (1050, 1051, 1052):
+        await _make_machine(db_session, repo, mid, f"u{mid}")
+    await repo.add_candidate(1050, GpsSource.FORUM_GPS, BONN)
+    await repo.add_candidate(1052, GpsSource.FORUM_GPS, BERLIN)
+    await repo.recompute_geoms([1050, 1051, 1052])
+
+    assert [h.id for h in await repo.hits_by_ids([1052, 1051, 1050, 9999])] == [1050, 1052]
+
+
 async def test_visited_roundtrip(db_session) -> None:  # type: ignore[no-untyped-def]
     repo = MachineRepository(db_session)
     await _make_machine(db_session, repo, 1000, "u1000")
@@ -64,6 +135,196 @@ async def test_visited_roundtrip(db_session) -> None:  # type: ignore[no-untyped
     assert await users.delete_visited(42, 1000) is True
 
 
+async def _plan(session, stmt: ClauseElement) -> str:  # type: ignore[no-untyped-def]
+    # A handful of test rows always favours a seq scan; switching it off shows
+    # whether an index *can* answer the query, which is what we care about.
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    rows = await session.execute(text(f"EXPLAIN {sql}"))
+    return "\n".join(row[0] for row in rows)
+
+
+async def test_radius_and_nearest_queries_use_the_geography_index(db_session) -> None:  # type: ignore[no-untyped-def]
+    repo = MachineRepository(db_session)
+    for mid, coord in ((1200, KOELN), (1201, BONN), (1202, BERLIN)):
+        await _make_machine(db_session, repo, mid, f"u{mid}")
+        await repo.add_candidate(mid, GpsSource.FORUM_GPS, coord)
+    await repo.recompute_geoms([1200, 1201, 1202])
+
+    assert "idx_machines_geog" in await _plan(db_session, _within_radius_stmt(KOELN, 50))
+    assert "idx_machines_geog" in await _plan(db_session, _nearest_stmt(KOELN, 5))
+    # Same results as before, now from the stored geography column.
+    assert [h.id for h in await repo.within_radius_km(KOELN, 50)] == [1200, 1201]
+
+
+async def test_watch_matching_is_one_indexed_join(db_session) -> None:  # type: ignore[no-untyped-def]
+    repo = MachineRepository(db_session)
+    for mid, coord in ((1300, KOELN), (1301, BERLIN), (1302, None)):
+        await _make_machine(db_session, repo, mid, f"u{mid}")
+        if coord is not None:
+            await repo.add_candidate(mid, GpsSource.FORUM_GPS, coord)
+    await repo.recompute_geoms([1300, 1301, 1302])
+    users = UserRepository(db_session)
+    await users.add_watch(42, BONN, 30)
+    await users.add_watch(42, KOELN, 5)  # closer watch of the same user
+    await users.add_watch(43, BERLIN, 5)
+    await users.add_watch(44, BONN, 10)  # Köln is ~27 km away: outside
+
+    assert "idx_watches_center_geog" in await _plan(
+        db_session, _watch_matches_stmt([1300, 1301, 1302], max_radius_km=30)
+    )
+    matches = await match_watches(db_session, [1300, 1301, 1302])
+    by_pair = {(m.user_id, m.machine_id): m for m in matches}
+    user_42 = (await users.get_or_create(42)).id
+    user_43 = (await users.get_or_create(43)).id
+    assert set(by_pair) == {(user_42, 1300), (user_43, 1301)}
+    # One row per user and machine, at the closest matching watch.
+    assert by_pair[(user_42, 1300)].distance_km == pytest.approx(0, abs=0.01)
+
+    pairs = list(by_pair)
+    assert await _record_many(db_session, pairs) == set(pairs)
+    assert await _record_many(db_session, pairs) == set()  # idempotent
+
+
+async def test_outbox_releases_rows_only_of_finished_runs(db_session) -> None:  # type: ignore[no-untyped-def]
+    for mid in (2200, 2201, 2202):
+        db_session.add(Machine(id=mid, source_url=f"u{mid}", name=f"M{mid}"))
+    running = ScrapeRun(mode="incremental", status="running")
+    aborted = ScrapeRun(mode="incremental", status="running")
+    db_session.add_all([running, aborted])
+    await db_session.flush()
+    outbox = NotificationOutboxRepository(db_session)
+    await outbox.enqueue([2200], KIND_NEW_MACHINE)  # no run: released at once
+    await outbox.enqueue([2201], KIND_NEW_MACHINE, scrape_run_id=running.id)
+    await outbox.enqueue([2202], KIND_NEW_MACHINE, scrape_run_id=aborted.id)
+
+    assert [mid for _, mid, _ in await outbox.claim(10)] == [2200]
+
+    running.status = "ok"
+    aborted.status = "aborted"
+    await db_session.flush()
+    assert await outbox.discard_run(aborted.id) == 1
+    claimed = await outbox.claim(10)
+    assert [(mid, kind) for _, mid, kind in claimed] == [
+        (2200, KIND_NEW_MACHINE),
+        (2201, KIND_NEW_MACHINE),
+    ]
+    assert len(await outbox.claim(1)) == 1
+
+    await outbox.remove([row_id for row_id, _, _ in claimed])
+    assert await outbox.claim(10) == []
+
+
+async def test_recorded_notifications_stay_pending_until_sent(db_session) -> None:  # type: ignore[no-untyped-def]
+    for mid in (2230, 2231):
+        db_session.add(Machine(id=mid, source_url=f"u{mid}", name=f"M{mid}"))
+    user_id = (await UserRepository(db_session).get_or_create(2230)).id
+    pairs = [(user_id, 2230), (user_id, 2231)]
+    await _record_many(db_session, pairs)
+
+    await _mark_sent(db_session, pairs[:1])
+    await _forget(db_session, pairs)  # only drops what is still pending
+
+    rows = await db_session.execute(
+        select(NotificationSent.machine_id, NotificationSent.sent_at).where(
+            NotificationSent.user_id == user_id
+        )
+    )
+    ((machine_id, sent_at),) = rows.all()
+    assert machine_id == 2230 and sent_at is not None
+    assert await _record_many(db_session, pairs) == {(user_id, 2231)}
+
+
+async def test_digest_map_resolves_the_machines_of_one_batch(db_session) -> None:  # type: ignore[no-untyped-def]
+    for mid in (2250, 2251, 2252):
+        db_session.add(Machine(id=mid, source_url=f"u{mid}", name=f"M{mid}"))
+    user_id = (await UserRepository(db_session).get_or_create(2250)).id
+    first, second = await _next_batch(db_session), await _next_batch(db_session)
+    await _record_many(db_session, [(user_id, 2251), (user_id, 2250)], first)
+    await _record_many(db_session, [(user_id, 2252)], second)
+
+    assert await digest_machine_ids(db_session, user_id, first) == [2250, 2251]
+    assert await digest_machine_ids(db_session, user_id + 1, first) == []
+
+
+async def test_outbox_rows_of_dead_runs_expire(db_session) -> None:  # type: ignore[no-untyped-def]
+    for mid in (2240, 2241):
+        db_session.add(Machine(id=mid, source_url=f"u{mid}", name=f"M{mid}"))
+    dead = ScrapeRun(
+        mode="full", status="running", started_at=datetime.now(UTC) - timedelta(days=3)
+    )
+    alive = ScrapeRun(mode="full", status="running")
+    db_session.add_all([dead, alive])
+    await db_session.flush()
+    outbox = NotificationOutboxRepository(db_session)
+    await outbox.enqueue([2240], KIND_NEW_MACHINE, scrape_run_id=dead.id)
+    await outbox.enqueue([2241], KIND_NEW_MACHINE, scrape_run_id=alive.id)
+
+    assert await outbox.expire_dead_runs(timedelta(hours=48)) == 1
+    assert await outbox.discard_run(alive.id) == 1
+
+
+async def test_resumed_run_adopts_checkpoints_and_notifications(db_session) -> None:  # type: ignore[no-untyped-def]
+    db_session.add(Machine(id=2210, source_url="u2210", name="M2210"))
+    runs = ScrapeRunRepository(db_session)
+    crashed = await runs.start("full")
+    checkpoints = ScrapeCheckpointRepository(db_session)
+    await checkpoints.save(crashed.id, {("topic", "u1"): None, ("stats", ""): '{"a": 1}'})
+    await checkpoints.save(crashed.id, {("stats", ""): '{"a": 2}'})
+    await NotificationOutboxRepository(db_session).enqueue(
+        [2210], KIND_NEW_MACHINE, scrape_run_id=crashed.id
+    )
+
+    # Just started and checkpointing: alive in another process, not adoptable.
+    assert (await runs.last_unfinished(timedelta(minutes=10))) is None
+    crashed.heartbeat_at = datetime.now(UTC) - timedelta(hours=1)
+    await db_session.flush()
+    assert (await runs.last_unfinished(timedelta(minutes=10))) is crashed
+    resumed = await runs.start("full", resumed_from=crashed.id)
+    await checkpoints.adopt(crashed.id, resumed.id)
+    await db_session.refresh(crashed)
+
+    assert crashed.status == "resumed"
+    assert (await runs.last_unfinished(timedelta(0))) is None
+    assert await checkpoints.load(crashed.id) == {}
+    assert await checkpoints.load(resumed.id) == {("topic", "u1"): None, ("stats", ""): '{"a": 2}'}
+    assert await NotificationOutboxRepository(db_session).discard_run(resumed.id) == 1
+
+    await checkpoints.clear(resumed.id)
+    assert await checkpoints.load(resumed.id) == {}
+
+
+async def test_resume_skips_replays_and_live_runs(db_session) -> None:  # type: ignore[no-untyped-def]
+    hour_ago = datetime.now(UTC) - timedelta(hours=1)
+    replay = ScrapeRun(mode="full", status="running", replay=True, started_at=hour_ago)
+    alive = ScrapeRun(mode="full", status="running", started_at=hour_ago)
+    db_session.add_all([replay, alive])
+    await db_session.flush()
+    runs = ScrapeRunRepository(db_session)
+    checkpoints = ScrapeCheckpointRepository(db_session)
+
+    await checkpoints.save(alive.id, {("stats", ""): "{}"})
+    assert (await runs.last_unfinished(timedelta(minutes=10))) is None
+
+    await db_session.execute(
+        update(ScrapeRun).where(ScrapeRun.id == alive.id).values(heartbeat_at=hour_ago)
+    )
+    await db_session.refresh(alive)
+    assert (await runs.last_unfinished(timedelta(minutes=10))) is alive
+
+
+async def test_trailing_parse_rate_ignores_replays(db_session) -> None:  # type: ignore[no-untyped-def]
+    db_session.add_all(
+        [
+            ScrapeRun(mode="full", status="ok", parse_success_rate=0.9),
+            ScrapeRun(mode="full", status="ok", parse_success_rate=0.1, replay=True),
+        ]
+    )
+    await db_session.flush()
+
+    assert await ScrapeRunRepository(db_session).trailing_parse_rate() == pytest.approx(0.9)
+
+
 async def test_stale_lists_only_old_active_and_mark_gone(db_session) -> None:  # type: ignore[no-untyped-def]
     repo = MachineRepository(db_session)
     old = datetime.now(UTC) - timedelta(days=90)
@@ -81,6 +342,21 @@ async def test_stale_lists_only_old_active_and_mark_gone(db_session) -> None:  #
     assert await repo.mark_gone(99999) is None
 
 
+async def test_touch_seen_takes_machines_off_the_stale_list(db_session) -> None:  # type: ignore[no-untyped-def]
+    repo = MachineRepository(db_session)
+    old = datetime.now(UTC) - timedelta(days=90)
+    db_session.add(Machine(id=2100, source_url="u2100", name="Seen", last_seen_at=old))
+    db_session.add(Machine(id=2101, source_url="u2100", name="Legacy twin", last_seen_at=old))
+    db_session.add(Machine(id=2102, source_url="u2102", name="Unseen", last_seen_at=old))
+    await db_session.flush()
+
+    # Every machine under a seen URL is refreshed; repeats in the list are harmless.
+    assert await repo.touch_seen(["u2100", "u2100", "u-unknown"]) == 2
+    db_session.expire_all()  # bulk statement bypasses the identity map
+    assert [m.id for m in await repo.stale(60)] == [2102]
+    assert await repo.touch_seen([]) == 0
+
+
 async def test_search_by_name_finds_offmap_and_flags_them(db_session) -> None:  # type: ignore[no-untyped-def]
     repo = MachineRepository(db_session)
     db_session.add(Machine(id=3000, source_url="u3000", name="Hamburger Dom"))
@@ -145,3 +421,137 @@ async def test_ungeocoded_respects_limit(db_session) -> None:  # type: ignore[no
 
     results = await repo.ungeocoded(3)
     assert len(results) == 3
+
+
+async def test_http_validators_roundtrip_and_update(db_session) -> None:  # type: ignore[no-untyped-def]
+    repo = HttpValidatorRepository(db_session)
+    await repo.store({"u1": ('"a"', None), "u2": (None, None)})
+    await repo.store({"u1": ('"b"', "Tue, 02 Jan 2024 12:00:00 GMT")})
+
+    assert await repo.load_all() == {"u1": ('"b"', "Tue, 02 Jan 2024 12:00:00 GMT")}
+
+
+async def test_bulk_writes_allocate_update_and_recompute(db_session) -> None:  # type: ignore[no-untyped-def]
+    repo = MachineRepository(db_session)
+    await _make_machine(db_session, repo, 7000, "u7000")
+    await repo.sync_id_sequence()
+
+    new_ids = await repo.allocate_ids(2)
+    assert new_ids == [7001, 7002]
+    regions = await repo.region_ids([("http://example.com/f=7", "NRW", False)])
+    await repo.insert_many(
+        [
+            {
+                "id": mid,
+                "source_url": f"u{mid}",
+                "name": f"M{mid}",
+                "region_id": regions["http://example.com/f=7"],
+            }
+            for mid in new_ids
+        ]
+    )
+    await repo.update_many(
+        [
+            {"id": 7000, "name": "Neu", "topic_reply_count": None},
+            {"id": 7001, "name": "M7001", "topic_reply_count": 4},
+        ]
+    )
+    await repo.add_candidates(
+        [
+            (7000, GpsSource.PARTIAL_NAME_GEOCODE, BERLIN, "Berlin"),
+            (7000, GpsSource.FORUM_GPS, KOELN, "50.9413, 6.9583"),
+            (7001, GpsSource.FULL_NAME_GEOCODE, BONN, "Bonn"),
+        ]
+    )
+    await repo.clear_candidates_many([(7001, GpsSource.FULL_NAME_GEOCODE)])
+    await repo.recompute_geoms([7000, 7001, 7002])
+    db_session.expire_all()  # bulk statements bypass the identity map
+
+    index = await repo.url_index()
+    assert index["u7001"][0] == 7001
+    first = await repo.get_hit(7000)
+    assert first is not None
+    assert first.name == "Neu"
+    assert first.gps_source is GpsSource.FORUM_GPS
+    assert await repo.get_hit(7001) is None  # its only candidate was cleared
+    assert await repo.machines_with_source([7000, 7001], GpsSource.FORUM_GPS) == {7000}
+
+
+async def test_geocoder_rechecks_expired_misses(db_session, monkeypatch) -> None:  # type: ignore[no-untyped-def]
+    answers: list[Coordinate | None] = [None, BONN]
+    fetched: list[str] = []
+
+    async def fetch(
+        self: Geocoder, query: str, urgent: asyncio.Event | None = None
+    ) -> Coordinate | None:
+        fetched.append(query)
+        return answers.pop(0)
+
+    monkeypatch.setattr(Geocoder, "_fetch", fetch)
+    memory_cache().clear()
+    geocoder = Geocoder(db_session)
+
+    assert await geocoder.geocode("Neuer Ort") is None
+    memory_cache().clear()
+    # A fresh miss comes from geocode_cache without asking Nominatim again.
+    assert await geocoder.geocode("Neuer Ort") is None
+    assert fetched == ["Neuer Ort"]
+
+    await db_session.execute(
+        update(GeocodeCache).values(checked_at=datetime.now(UTC) - timedelta(days=365))
+    )
+    memory_cache().clear()
+    assert await geocoder.geocode("Neuer Ort") == BONN
+    assert fetched == ["Neuer Ort", "Neuer Ort"]
+    # Now a hit, served from the process cache.
+    assert await geocoder.geocode("Neuer Ort") == BONN
+    assert len(fetched) == 2
+    memory_cache().clear()
+
+
+async def test_shared_rate_limit_spaces_requests_and_prefers_interactive(
+    db_session, test_database_url: str
+) -> None:  # type: ignore[no-untyped-def]
+    engine = create_async_engine(test_database_url)
+    try:
+        limiter = SharedRateLimiter("test", 0.1, engine=engine)
+        started = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        # The first slot is immediate, the next two 0.1 s apart.
+        assert time.monotonic() - started >= 0.19
+
+        order: list[str] = []
+
+        async def take(kind: str) -> None:
+            await limiter.acquire(batch=kind == "batch")
+            order.append(kind)
+
+        batch = asyncio.create_task(take("batch"))
+        await asyncio.sleep(0.01)  # the batch caller is waiting for the next slot
+        await asyncio.gather(take("interactive"), batch)
+        assert order == ["interactive", "batch"]
+    finally:
+        await engine.dispose()
+
+
+async def test_gazetteer_prefers_exact_then_prefix_then_similar_names(db_session) -> None:  # type: ignore[no-untyped-def]
+    gazetteer = GazetteerRepository(db_session)
+    frankfurt = Coordinate(lat=50.1109, lon=8.6821)
+    await gazetteer.replace_all(
+        [
+            (1, "Bonn", "P", "DE", 300_000, BONN),
+            (2, "Bonn", "S", "DE", 0, BERLIN),  # a building called Bonn
+            (3, "Frankfurt am Main", "P", "DE", 750_000, frankfurt),
+            (4, "Edinburgh", "P", "GB", 480_000, Coordinate(lat=55.9533, lon=-3.1883)),
+        ]
+    )
+
+    assert await gazetteer.lookup("  BONN ") == BONN
+    assert await gazetteer.lookup("Frankfurt") == frankfurt
+    edinburgh = await gazetteer.lookup("Edinburg")
+    assert edinburgh is not None
+    assert edinburgh.lat == pytest.approx(55.9533)
+    assert await gazetteer.lookup("Nirgendwo") is None
+    assert await gazetteer.replace_all([]) == 0
+    assert await gazetteer.lookup("Bonn") is None
@@ -0,0 +1,110 @@
+"""Unit tests for the adaptive forum limiter and how the forum source feeds it.
+
+Rates are scaled up (tens of requests per second) so pacing and Retry-After
+pauses are observable without slowing the suite.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import UTC, datetime
+
+import httpx
+import pytest
+
+from pressmuenzen.scraper.elongated_coin import ElongatedCoinSource
+from pressmuenzen.scraper.throttle import AdaptiveLimiter, retry_after_seconds
+
+
+def test_healthy_responses_raise_the_rate_up_to_the_ceiling() -> None:
+    limiter = AdaptiveLimiter(floor=0.5, ceiling=1.2, start=1.0, increase=0.1)
+    for _ in range(5):
+        limiter.on_response(200, latency=0.1)
+    assert limiter.rate == pytest.approx(1.2)
+    limiter.on_response(304, latency=0.1)
+    assert limiter.rate == pytest.approx(1.2)
+
+
+def test_errors_and_slow_responses_halve_the_rate_down_to_the_floor() -> None:
+    now = [0.0]
+    limiter = AdaptiveLimiter(floor=0.2, ceiling=2.0, start=2.0, clock=lambda: now[0])
+    limiter.on_response(503, latency=0.1)
+    assert limiter.rate == pytest.approx(1.0)
+    # A second failure within the same request interval is the same burst.
+    limiter.on_response(500, latency=0.1)
+    assert limiter.rate == pytest.approx(1.0)
+    now[0] += 1.0
+    limiter.on_response(200, latency=30.0)
+    assert limiter.rate == pytest.approx(0.5)
+    for _ in range(5):
+        now[0] += 10.0
+        limiter.on_error()
+    assert limiter.rate == pytest.approx(0.2)
+    assert limiter.stats.backoffs == 7
+    assert limiter.stats.rate_min == pytest.approx(0.2)
+    assert limiter.stats.rate_max == pytest.approx(2.0)
+
+
+def test_not_found_leaves_the_rate_alone() -> None:
+    limiter = AdaptiveLimiter(floor=0.5, ceiling=2.0, start=1.0)
+    limiter.on_response(404, latency=0.1)
+    assert limiter.rate == 1.0
+    assert limiter.stats.backoffs == 0
+
+
+async def test_requests_are_paced_at_the_current_rate() -> None:
+    limiter = AdaptiveLimiter(floor=10.0, ceiling=20.0, start=20.0)
+    started = time.monotonic()
+    for _ in range(5):
+        await limiter.wait()
+    # First slot is immediate, the next four 50 ms apart.
+    assert time.monotonic() - started >= 0.19
+    assert limiter.stats.requests == 5
+    assert limiter.stats.effective_rate == pytest.approx(20.0, rel=0.05)
+
+
+async def test_retry_after_pauses_the_next_request() -> None:
+    limiter = AdaptiveLimiter(floor=50.0, ceiling=100.0, start=100.0)
+    await limiter.wait()
+    limiter.on_response(429, latency=0.01, retry_after="0.2")
+    paused = time.monotonic()
+    await limiter.wait()
+    assert time.monotonic() - paused >= 0.18
+    assert limiter.stats.retry_after_waits == 1
+
+
+def test_retry_after_accepts_seconds_and_http_dates() -> None:
+    now = datetime(2026, 10, 18, 12, 0, tzinfo=UTC)
+    assert retry_after_seconds("120") == 120.0
+    assert retry_after_seconds("Sun, 18 Oct 2026 12:00:30 GMT", now) == 30.0
+    assert retry_after_seconds("Sun, 18 Oct 2026 11:00:00 GMT", now) == 0.0
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
+
+
+async def test_source_retries_throttled_pages_and_reports_them() -> None:
+    answers = [
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(503),
+        httpx.Response(200, content=b"<html></html>"),
+    ]
+    transport = httpx.MockTransport(lambda request: answers.pop(0))
+    limiter = AdaptiveLimiter(floor=50.0, ceiling=100.0, start=100.0)
+    source = ElongatedCoinSource(
+        client=httpx.AsyncClient(transport=transport, timeout=5.0), limiter=limiter
+    )
+
+    assert await source._fetch("http://example.com/t=1") == b"<html></html>"
+    assert not answers
+    assert limiter.stats.requests == 3
+    assert limiter.stats.backoffs >= 1
+
+
+async def test_source_gives_up_after_repeated_throttling() -> None:
+    transport = httpx.MockTransport(lambda request: httpx.Response(503))
+    source = ElongatedCoinSource(
+        client=httpx.AsyncClient(transport=transport, timeout=5.0),
+        limiter=AdaptiveLimiter(floor=50.0, ceiling=100.0, start=100.0),
+    )
+    with pytest.raises(httpx.HTTPStatusError):
+        await source._fetch("http://example.com/t=1")
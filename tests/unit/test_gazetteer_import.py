@@ -0,0 +1,40 @@
+"""GeoNames dump parsing for the offline gazetteer."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from scripts.import_gazetteer import read_places
+
+from pressmuenzen.db.repositories.gazetteer import place_key
+
+
+def _line(gid: int, name: str, cls: str, population: int) -> str:
+    cols = [str(gid), name, name, "", "50.7", "7.1", cls, "PPL", "DE"] + [""] * 5
+    cols += [str(population), "", "60", "Europe/Berlin", "2024-01-01"]
+    return "\t".join(cols)
+
+
+def test_reads_wanted_feature_classes_and_population(tmp_path: Path) -> None:
+    dump = tmp_path / "DE.txt"
+    dump.write_text(
+        "\n".join(
+            [
+                _line(1, "Bonn", "P", 300_000),
+                _line(2, "Weiler", "P", 10),
+                _line(3, "Bonner Straße", "R", 0),  # roads are not wanted
+                _line(4, "Drachenfels", "T", 0),  # landmarks have no population
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    places = list(read_places(dump, {"P", "T"}, min_population=100))
+
+    assert [(p[0], p[1], p[2]) for p in places] == [(1, "Bonn", "P"), (4, "Drachenfels", "T")]
+    assert places[0][5].lat == 50.7
+
+
+def test_place_key_folds_case_and_spacing() -> None:
+    assert place_key("  Frankfurt   am MAIN ") == "frankfurt am main"
+    assert place_key("STRASSE") == place_key("straße")
@@ -0,0 +1,40 @@
+"""Canonical geocode cache keys."""
+
+from __future__ import annotations
+
+import unicodedata
+
+import pytest
+
+from pressmuenzen.domain.geocode_key import geocode_key
+
+SAME_KEY = [
+    ("Bonn", "bonn ", "  BONN"),
+    ("Bonn, Germany", "„Bonn“ Germany", '"Bonn", Germany', "Bonn - Germany"),
+    ("Köln", unicodedata.normalize("NFD", "Köln"), "Koeln", "KÖLN"),
+    ("Straße", "Strasse", "STRASSE", "Straẞe"),
+    ("St. Peter's Kirche", "St Peters Kirche", "st. peter’s kirche"),
+    ("Ｂｏｎｎ", "Bonn"),  # full-width forms
+]
+
+
+@pytest.mark.parametrize("spellings", SAME_KEY, ids=[s[0] for s in SAME_KEY])
+def test_spellings_share_a_key(spellings: tuple[str, ...]) -> None:
+    assert len({geocode_key(s) for s in spellings}) == 1
+
+
+def test_key_shape() -> None:
+    assert geocode_key('Düsseldorf "Altstadt" (Rheinufer)') == "duesseldorf altstadt rheinufer"
+    assert geocode_key("  ,;  ") == ""
+
+
+@pytest.mark.parametrize(
+    "query", ["İstanbul", "Frankfurt (Oder)", "Saint-Étienne", "Bonn_Markt", "Ǆemal"]
+)
+def test_key_is_idempotent(query: str) -> None:
+    assert geocode_key(geocode_key(query)) == geocode_key(query)
+
+
+def test_different_places_keep_different_keys() -> None:
+    assert geocode_key("Baden-Baden") != geocode_key("Baden")
+    assert geocode_key("Saint-Étienne") != geocode_key("Saint-Etienne-de-Tinée")
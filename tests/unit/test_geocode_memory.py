@@ -0,0 +1,201 @@
+"""The in-process geocode LRU (bounds, per-kind TTLs, counters) and single flight."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+from pressmuenzen.domain.models import Coordinate
+from pressmuenzen.scraper.geocoding import Geocoder, MemoryCache, memory_cache
+
+BONN = Coordinate(lat=50.7374, lon=7.0982)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_hits_and_misses_are_counted() -> None:
+    cache = MemoryCache(8, ttl=60, negative_ttl=10, clock=Clock())
+    assert cache.get("Bonn") is None
+    cache.put("Bonn", BONN)
+    cache.put("Nirgendwo", None)
+
+    hit = cache.get("Bonn")
+    assert hit is not None
+    assert hit.coordinate == BONN
+    # A remembered miss is a hit with no coordinate, not a cache miss.
+    negative = cache.get("Nirgendwo")
+    assert negative is not None
+    assert negative.coordinate is None
+    assert (cache.stats.hits, cache.stats.misses) == (2, 1)
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = MemoryCache(2, ttl=60, negative_ttl=10, clock=Clock())
+    cache.put("a", BONN)
+    cache.put("b", BONN)
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", BONN)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+
+
+def test_misses_expire_before_hits() -> None:
+    clock = Clock()
+    cache = MemoryCache(8, ttl=60, negative_ttl=10, clock=clock)
+    cache.put("Bonn", BONN)
+    cache.put("Nirgendwo", None)
+
+    clock.now = 30.0
+    assert cache.get("Nirgendwo") is None
+    assert cache.get("Bonn") is not None
+    clock.now = 61.0
+    assert cache.get("Bonn") is None
+    assert cache.stats.expirations == 2
+    assert len(cache) == 0
+
+
+def test_zero_size_disables_the_cache() -> None:
+    cache = MemoryCache(0, ttl=60, negative_ttl=10, clock=Clock())
+    cache.put("Bonn", BONN)
+    assert cache.get("Bonn") is None
+
+
+class SlowGeocoder(Geocoder):
+    """A Geocoder with the database and Nominatim replaced by counters."""
+
+    fetches: list[str]
+    urgent: asyncio.Event | None
+
+    def __init__(
+        self,
+        answer: Coordinate | None = BONN,
+        error: Exception | None = None,
+        *,
+        batch: bool = False,
+    ) -> None:
+        self.fetches = []
+        self.urgent = None
+        self.batch = batch
+        self._answer = answer
+        self._error = error
+        self._negative_ttl = timedelta(days=30)
+        self._local = None
+
+    async def _from_cache(self, query: str) -> None:
+        return None
+
+    async def _fetch(self, query: str, urgent: asyncio.Event | None = None) -> Coordinate | None:
+        self.fetches.append(query)
+        self.urgent = urgent
+        await asyncio.sleep(0.02)
+        if self._error is not None:
+            raise self._error
+        return self._answer
+
+    async def _store(self, query: str, coord: Coordinate | None) -> None:
+        return None
+
+
+async def test_concurrent_identical_queries_share_one_lookup() -> None:
+    memory_cache().clear()
+    stats = memory_cache().stats
+    flights, coalesced = stats.flights, stats.coalesced
+    geocoder = SlowGeocoder()
+
+    # "[Automat 2]" is stripped, so all five are the same normalized query.
+    results = await asyncio.gather(
+        *(geocoder.geocode("Bonn Markt") for _ in range(4)),
+        geocoder.geocode("Bonn Markt [Automat 2]"),
+        geocoder.geocode("Köln"),
+    )
+
+    assert results == [BONN] * 6
+    assert sorted(geocoder.fetches) == ["Bonn Markt", "Köln"]
+    assert stats.flights - flights == 2
+    assert stats.coalesced - coalesced == 4
+    memory_cache().clear()
+
+
+async def test_a_failed_lookup_fails_its_followers_and_is_not_remembered() -> None:
+    memory_cache().clear()
+    geocoder = SlowGeocoder(error=RuntimeError("nominatim down"))
+
+    results = await asyncio.gather(
+        geocoder.geocode("Bonn"), geocoder.geocode("Bonn"), return_exceptions=True
+    )
+
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert geocoder.fetches == ["Bonn"]
+    geocoder._error = None
+    assert await geocoder.geocode("Bonn") == BONN
+    memory_cache().clear()
+
+
+async def test_an_interactive_follower_promotes_a_batch_lookup() -> None:
+    memory_cache().clear()
+    scraper = SlowGeocoder(batch=True)
+    bot = SlowGeocoder()
+
+    leader = asyncio.create_task(scraper.geocode("Bonn"))
+    await asyncio.sleep(0)
+    assert scraper.urgent is not None and not scraper.urgent.is_set()
+    assert await bot.geocode("Bonn") == BONN
+    assert scraper.urgent.is_set()
+    assert bot.fetches == []
+    await leader
+    memory_cache().clear()
+
+
+async def test_a_follower_taking_over_keeps_its_place_name_lookup() -> None:
+    memory_cache().clear()
+    gazetteer = CountingGazetteer(answer=None)
+    leader_geocoder = SlowGeocoder()
+    follower_geocoder = SlowGeocoder()
+    follower_geocoder._local = gazetteer
+
+    leader = asyncio.create_task(leader_geocoder.geocode("Bonn"))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(follower_geocoder.geocode("Bonn", place_name=True))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == BONN
+    assert follower_geocoder.fetches == ["Bonn"]
+    # Once on joining, once more on taking over the abandoned lookup.
+    assert gazetteer.lookups == ["Bonn", "Bonn"]
+    memory_cache().clear()
+
+
+class CountingGazetteer:
+    def __init__(self, answer: Coordinate | None = BONN) -> None:
+        self.lookups: list[str] = []
+        self._answer = answer
+
+    async def lookup(self, query: str) -> Coordinate | None:
+        self.lookups.append(query)
+        return self._answer
+
+
+async def test_place_names_check_the_lru_before_the_gazetteer() -> None:
+    memory_cache().clear()
+    gazetteer = CountingGazetteer()
+    geocoder = SlowGeocoder()
+    geocoder._local = gazetteer
+
+    first = await geocoder.geocode("Bonn", place_name=True)
+    second = await geocoder.geocode("Bonn", place_name=True)
+
+    assert first == second == BONN
+    assert gazetteer.lookups == ["Bonn"]
+    assert geocoder.fetches == []
+    memory_cache().clear()
@@ -0,0 +1,209 @@
+"""Equivalence of the HTML parser backends.
+
+Every backend must extract exactly what the reference ``html.parser`` backend
+extracts. The built-in pages mimic the prosilver markup of elongated-coin.de,
+including the sloppy bits (unclosed ``<p>``/``<li>``, a ``<div>`` inside a
+``<p>``, an announcement block, a first post whose GPS section runs to the end
+of the post). Set ``TEST_PAGE_ARCHIVE`` to a ``SCRAPER_ARCHIVE_DIR`` to also
+check every archived page. The process-pool path must match inline parsing.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from pressmuenzen.scraper.archive import PageArchive
+from pressmuenzen.scraper.elongated_coin import ElongatedCoinSource
+from pressmuenzen.scraper.html import PARSER_BACKENDS, ParserBackend, parse_pool
+from pressmuenzen.scraper.source import ScrapedRegion, TopicRef
+
+REGION = ScrapedRegion(forum_url="http://example.com/f=4", name="NRW", is_limited_section=False)
+TOPIC = TopicRef(url="http://example.com/viewtopic.php?t=1&start=0", name='Bonn "Markt"')
+
+_HEAD = """<!DOCTYPE html>
+<html dir="ltr" lang="de"><head><meta charset="utf-8" /><title>elongated-coin.de</title></head>
+<body id="phpbb" class="section-viewtopic ltr">
+<div id="wrap"><div id="page-header"><div class="navbar"><ul class="linklist">
+<li class="breadcrumbs"><a href="./index.php">Foren-Übersicht</a></li></ul></div></div>
+<div id="page-body">
+"""
+_FOOT = """
+<div class="jumpbox"><a href="./viewforum.php?f=4">Zurück zu „NRW“</a></div>
+</div><div id="page-footer">Powered by phpBB&reg; &copy; phpBB Limited</div></div>
+</body></html>
+"""
+_PAGINATION = '<div class="action-bar"><div class="pagination">{n} Beiträge &bull; Seite <strong>{page}</strong> von <strong>{of}</strong></div></div>'
+
+
+def _topic_page(first_content: str, *, page: int = 1, of: int = 1) -> bytes:
+    return (
+        _HEAD
+        + _PAGINATION.format(n=2, page=page, of=of)
+        + f"""
+<div id="p100" class="post bg2"><div class="inner">
+  <dl class="postprofile"><dt><a href="./memberlist.php?u=2">Max</a></dt>
+  <dd><strong>Beiträge:</strong> 1.234</dd></dl>
+  <div class="postbody">
+    <h3 class="first"><a href="#p100">Bonn "Markt"</a></h3>
+    <p class="author"><a href="#p100"><i class="icon"></i></a>von <strong>Max</strong> &raquo; Di 2. Jan 2024, 13:14 </p>
+    <div class="content">{first_content}</div>
+  </div>
+  <div class="back2top"><a href="#top">Nach oben</a></div>
+</div></div>
+<hr class="divider" />
+<div id="p101" class="post bg1"><div class="inner"><div class="postbody">
+  <p class="author">von <strong>Eva</strong> &raquo; Mi 3. Jan 2024, 10:00 </p>
+  <div class="content">Danke! Noch da.<br>Gruß</div>
+  <div class="signature">Eva &amp; Co</div>
+</div></div></div>
+"""
+        + _PAGINATION.format(n=2, page=page, of=of)
+        + _FOOT
+    ).encode()
+
+
+_SECTIONS = (
+    '<span style="font-weight: bold">Standortbeschreibung:</span><br>Markt 1<br>'
+    '<span style="text-decoration: line-through">Alte Adresse 3</span><br>53111 Bonn<br>'
+    "im Souvenirladen &amp; Café<br><br>"
+)
+
+TOPIC_PAGES = {
+    "gps then more sections": _topic_page(
+        _SECTIONS + "<span style=\"font-weight: bold\">GPS:</span> N 50° 44.112' E 7° 06.084'<br>"
+        '<span style="font-weight: bold">Prägungen:</span><br>3 Motive<p>offen<div>im p</div>'
+        "<ul><li>a<li>b</ul>"
+    ),
+    # The GPS walk runs off the end of the first post into the rest of the page.
+    "gps last": _topic_page(
+        _SECTIONS + '<span style="font-weight: bold">GPS:</span> 50.7352, 7.1014'
+    ),
+    "no gps": _topic_page(_SECTIONS),
+    "announcement": _topic_page("Bitte die Regeln lesen."),
+    "not a topic": b"<html><body><p>Die Seite existiert nicht.</p></body></html>",
+}
+
+
+def _row(t: int, name: str, replies: str, when: str) -> str:
+    return f"""
+    <li class="row bg{t % 2 + 1}"><dl class="icon">
+      <dt><a href="./viewtopic.php?f=4&amp;t={t}&amp;sid=abc" class="topictitle">{name}</a></dt>
+      <dd class="posts">{replies} <dfn>Antworten</dfn></dd>
+      <dd class="lastpost"><span><dfn>Letzter Beitrag </dfn>von <a href="#">Max</a><br />{when}</span></dd>
+    </dl></li>"""
+
+
+def _list_page(*, page: int, of: int) -> bytes:
+    return (
+        _HEAD
+        + _PAGINATION.format(n=61, page=page, of=of)
+        + '<div class="forumbg announcement"><ul class="topiclist topics">'
+        + _row(9, "Regeln", "0", "Mo 1. Jan 2024, 00:00")
+        + '</ul></div><div class="forumbg"><ul class="topiclist topics">'
+        + _row(1, 'Bonn "Markt"', "3", "Di 2. Jan 2024, 13:14")
+        + _row(2, "Köln Dom [Automat 2]", "1.204", "Heute, 10:00")
+        + _row(3, "Aachen &amp; Umgebung", "12", "Sa 13. Juli 2024, 10:15")
+        + "</ul></div>"
+        + _FOOT
+    ).encode()
+
+
+LIST_PAGES = {
+    "first of two": _list_page(page=1, of=2),
+    "last": _list_page(page=2, of=2),
+    "no container": _HEAD.encode() + _FOOT.encode(),
+}
+
+
+def _source(backend: ParserBackend) -> ElongatedCoinSource:
+    return ElongatedCoinSource(parser=backend)
+
+
+FAST_BACKENDS = [b for b in PARSER_BACKENDS if b != "html.parser"]
+
+
+@pytest.mark.parametrize("backend", FAST_BACKENDS)
+@pytest.mark.parametrize("page", TOPIC_PAGES.values(), ids=TOPIC_PAGES.keys())
+async def test_topic_page_extraction_matches_reference(backend: ParserBackend, page: bytes) -> None:
+    expected = await _source("html.parser").parse_machine(page, TOPIC, REGION)
+    assert await _source(backend).parse_machine(page, TOPIC, REGION) == expected
+
+
+@pytest.mark.parametrize("backend", FAST_BACKENDS)
+@pytest.mark.parametrize("page", TOPIC_PAGES.values(), ids=TOPIC_PAGES.keys())
+def test_thread_extraction_matches_reference(backend: ParserBackend, page: bytes) -> None:
+    expected = _source("html.parser").parse_thread_page(page)
+    assert _source(backend).parse_thread_page(page) == expected
+
+
+@pytest.mark.parametrize("backend", FAST_BACKENDS)
+@pytest.mark.parametrize("page", LIST_PAGES.values(), ids=LIST_PAGES.keys())
+def test_topic_list_extraction_matches_reference(backend: ParserBackend, page: bytes) -> None:
+    expected = _source("html.parser").parse_topic_list(page)
+    assert _source(backend).parse_topic_list(page) == expected
+
+
+def test_reference_extraction_of_fixtures() -> None:
+    # Guards the fixtures themselves: equivalence over empty results proves nothing.
+    topics, is_last = _source("html.parser").parse_topic_list(LIST_PAGES["first of two"])
+    assert [t.name for t in topics] == ['Bonn "Markt"', "Köln Dom [Automat 2]", "Aachen & Umgebung"]
+    assert is_last is False
+    posts, _ = _source("html.parser").parse_thread_page(TOPIC_PAGES["gps last"])
+    assert len(posts) == 2
+
+
+@pytest.fixture(scope="module")
+def archived_pages() -> list[tuple[str, bytes]]:
+    root = os.environ.get("TEST_PAGE_ARCHIVE")
+    if not root:
+        pytest.skip("TEST_PAGE_ARCHIVE not set; skipping archived-page equivalence")
+    archive = PageArchive(Path(root))
+    return [(url, archive.get(url) or b"") for url in archive.index()]
+
+
+@pytest.mark.parametrize("backend", FAST_BACKENDS)
+async def test_archived_pages_match_reference(
+    backend: ParserBackend, archived_pages: list[tuple[str, bytes]]
+) -> None:
+    reference, candidate = _source("html.parser"), _source(backend)
+    mismatches = []
+    for url, page in archived_pages:
+        if "viewtopic" in url:
+            topic = TopicRef(url=url, name=url)
+            same = await candidate.parse_machine(page, topic, REGION) == (
+                await reference.parse_machine(page, topic, REGION)
+            ) and candidate.parse_thread_page(page) == reference.parse_thread_page(page)
+        else:
+            same = candidate.parse_topic_list(page) == reference.parse_topic_list(page)
+        if not same:
+            mismatches.append(url)
+    assert mismatches == [], json.dumps(mismatches[:20])
+
+
+# --- process-pool parsing ---------------------------------------------------
+
+
+def test_inline_parsing_without_workers() -> None:
+    with parse_pool(0) as pool:
+        assert pool is None
+
+
+async def test_pool_parsing_matches_inline_parsing() -> None:
+    inline = _source("lxml")
+    with parse_pool(1) as pool:
+        pooled = ElongatedCoinSource(parser="lxml", executor=pool)
+        for page in TOPIC_PAGES.values():
+            assert await pooled.parse_machine(page, TOPIC, REGION) == (
+                await inline.parse_machine(page, TOPIC, REGION)
+            )
+        # Topic lists and threads go through the pool via the fetch helpers.
+        assert await pooled._offload(
+            ElongatedCoinSource._topics_on_page, LIST_PAGES["first of two"], "lxml", "http://x/"
+        ) == ElongatedCoinSource._topics_on_page(LIST_PAGES["first of two"], "lxml", "http://x/")
+        assert await pooled._offload(
+            ElongatedCoinSource._posts_on_page, TOPIC_PAGES["gps last"], "lxml"
+        ) == inline.parse_thread_page(TOPIC_PAGES["gps last"])
@@ -0,0 +1,66 @@
+"""Unit tests for the pooled HTTP client registry and its per-host counters."""
+
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from pressmuenzen import http_clients
+from pressmuenzen.http_clients import close_clients, get_client, host_stats
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats() -> None:
+    host_stats.clear()
+
+
+async def test_one_client_per_profile_until_closed() -> None:
+    forum = get_client("forum")
+    assert get_client("forum") is forum
+    assert get_client("nominatim") is not forum
+    assert "gzip" in forum.headers["Accept-Encoding"]
+
+    await close_clients()
+    assert forum.is_closed
+    reopened = get_client("forum")
+    assert reopened is not forum and not reopened.is_closed
+    await close_clients()
+
+
+def test_a_new_event_loop_gets_a_new_client() -> None:
+    first = asyncio.run(_client_of_this_loop())
+    second = asyncio.run(_client_of_this_loop())
+    assert first is not second
+
+
+async def _client_of_this_loop() -> httpx.AsyncClient:
+    return get_client("forum")
+
+
+async def test_responses_are_counted_per_host(monkeypatch: pytest.MonkeyPatch) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = 404 if request.url.path == "/missing" else 200
+        return httpx.Response(status, stream=httpx.ByteStream(b"x" * 100))
+
+    real_client = httpx.AsyncClient
+
+    def with_mock_transport(**kwargs: object) -> httpx.AsyncClient:
+        return real_client(transport=httpx.MockTransport(handler), **kwargs)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(http_clients.httpx, "AsyncClient", with_mock_transport)
+    client = get_client("counted")
+    try:
+        await client.get("https://forum.example/a")
+        await client.get("https://forum.example/missing")
+        await client.get("https://nominatim.example/search")
+    finally:
+        await close_clients()
+
+    forum = host_stats["forum.example"]
+    assert forum.requests == 2
+    assert forum.errors == 1
+    assert forum.bytes_received == 200
+    assert forum.latency_max >= forum.latency_avg >= 0
+    assert host_stats["nominatim.example"].requests == 1
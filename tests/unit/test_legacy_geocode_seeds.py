@@ -0,0 +1,70 @@
+"""Deriving geocode_cache seeds from the legacy name-geocoding results."""
+
+from __future__ import annotations
+
+from scripts.import_legacy_json import legacy_geocode_seeds
+
+from pressmuenzen.domain.geocode_key import geocode_key
+from pressmuenzen.domain.models import Coordinate
+
+BONN = Coordinate(lat=50.7374, lon=7.0982)
+BERLIN = Coordinate(lat=52.52, lon=13.405)
+
+
+def _db(*locs: dict[str, str]) -> dict[str, object]:
+    return {"cat_ID": 3, "http://forum/f=1": {"name": "NRW", "location_list": list(locs)}}
+
+
+def test_full_and_single_partial_results_become_entries() -> None:
+    seeds = legacy_geocode_seeds(
+        _db(
+            {"name": "Bonn Münsterplatz [Automat 2]", "full_name_gps": "50.7374,7.0982"},
+            {"name": 'Berlin "Souvenirshop"', "partial_name_gps": "52.52,13.405"},
+            {"name": 'Köln "Dom" (Shop)', "gps": "50.94,6.95"},  # no name answered
+        )
+    )
+
+    assert seeds == {
+        geocode_key("Bonn Münsterplatz"): BONN,
+        # The full name failed before the partial answered.
+        geocode_key('Berlin "Souvenirshop"'): None,
+        geocode_key("Berlin"): BERLIN,
+        geocode_key('Köln "Dom" (Shop)'): None,
+        geocode_key('Köln "Dom"'): None,
+        geocode_key("Köln (Shop)"): None,
+        geocode_key("Köln"): None,
+    }
+
+
+def test_ambiguous_partials_are_not_attributed() -> None:
+    # Two partials ("Berlin (IGA)" and "Berlin"): which one answered is unknown.
+    seeds = legacy_geocode_seeds(
+        _db({"name": 'Berlin "Shop" (IGA)', "partial_name_gps": "52.52,13.405"})
+    )
+    assert seeds == {geocode_key('Berlin "Shop" (IGA)'): None}
+
+
+def test_ambiguous_partials_are_resolved_by_another_machines_answer() -> None:
+    seeds = legacy_geocode_seeds(
+        _db(
+            {"name": 'Berlin "Shop" (IGA)', "partial_name_gps": "52.52,13.405"},
+            {"name": 'Berlin "Zoo"', "partial_name_gps": "52.52,13.405"},
+        )
+    )
+    # Partials in cascade order: "Berlin (IGA)", "Berlin "Shop"", "Berlin".
+    assert seeds[geocode_key("Berlin")] == BERLIN
+    assert seeds[geocode_key('Berlin "Shop"')] is None
+    assert seeds[geocode_key("Berlin (IGA)")] is None
+
+
+def test_found_place_beats_a_miss_and_the_majority_wins() -> None:
+    seeds = legacy_geocode_seeds(
+        _db(
+            {"name": 'Bonn "A"', "partial_name_gps": "50.7374,7.0982"},
+            {"name": 'Bonn "B"', "partial_name_gps": "50.7374,7.0982"},
+            {"name": 'Bonn "C"', "partial_name_gps": "52.52,13.405"},
+            {"name": 'Bonn "A"', "full_name_gps": "50.7374,7.0982"},
+        )
+    )
+    assert seeds[geocode_key("Bonn")] == BONN
+    assert seeds[geocode_key('Bonn "A"')] == BONN
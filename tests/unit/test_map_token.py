@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from pressmuenzen.domain.models import Coordinate
-from pressmuenzen.services.maps import make_map_token, parse_map_token
+from pressmuenzen.services.maps import make_digest_map_token, make_map_token, parse_map_token
 
 ORIGIN = Coordinate(lat=50.5, lon=8.5)
 
@@ -32,3 +32,11 @@ def test_tampered_token_rejected() -> None:
 
 def test_garbage_token_rejected() -> None:
     assert parse_map_token("not-a-token", now=1000.0) is None
+
+
+def test_digest_token_roundtrip() -> None:
+    token = make_digest_map_token(7, 42, now=1000.0)
+    payload = parse_map_token(token, now=1000.0)
+    assert payload is not None
+    assert payload["mode"] == "digest"
+    assert (payload["user"], payload["batch"]) == (7, 42)
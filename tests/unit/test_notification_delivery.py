@@ -0,0 +1,68 @@
+"""Delivery bookkeeping of the notify-worker: each sent message marks its pairs sent."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+
+import pytest
+from telegram.error import BadRequest
+
+from pressmuenzen.db import engine
+from pressmuenzen.services import notifications
+from pressmuenzen.services.dispatch import TelegramDispatcher
+from pressmuenzen.services.notifications import WatchMatch
+
+
+class FakeBot:
+    def __init__(self, rejected: set[int]) -> None:
+        self.rejected = rejected
+        self.sent: list[int] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        if chat_id in self.rejected:
+            raise BadRequest("Forbidden: bot was blocked by the user")
+        self.sent.append(chat_id)
+
+
+def _match(chat_id: int, machine_id: int) -> WatchMatch:
+    return WatchMatch(
+        user_id=chat_id,
+        chat_id=chat_id,
+        machine_id=machine_id,
+        name=f"M{machine_id}",
+        url=f"http://forum/t={machine_id}",
+        distance_km=1.0,
+    )
+
+
+async def test_delivered_pairs_are_marked_sent_and_rejected_ones_forgotten(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    marked: list[tuple[int, int]] = []
+    forgotten: list[tuple[int, int]] = []
+
+    @asynccontextmanager
+    async def no_session() -> AsyncIterator[None]:
+        yield None
+
+    async def mark_sent(session: None, pairs: Sequence[tuple[int, int]]) -> None:
+        marked.extend(pairs)
+
+    async def forget(session: None, pairs: Sequence[tuple[int, int]]) -> None:
+        forgotten.extend(pairs)
+
+    monkeypatch.setattr(engine, "session_scope", no_session)
+    monkeypatch.setattr(notifications, "_mark_sent", mark_sent)
+    monkeypatch.setattr(notifications, "_forget", forget)
+    bot = FakeBot(rejected={2})
+
+    async with TelegramDispatcher(bot, rate=1000, per_chat_interval=0) as dispatcher:
+        sent = await notifications._send_recorded(
+            dispatcher, [_match(1, 10), _match(1, 11), _match(2, 10)], batch=1
+        )
+
+    assert sent == 1
+    assert bot.sent == [1]
+    assert sorted(marked) == [(1, 10), (1, 11)]
+    assert forgotten == [(2, 10)]
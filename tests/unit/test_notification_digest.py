@@ -0,0 +1,65 @@
+"""Per-user grouping of watch matches into single messages and digests."""
+
+from __future__ import annotations
+
+from pressmuenzen.bot import texts
+from pressmuenzen.services.maps import parse_map_token
+from pressmuenzen.services.notifications import (
+    DIGEST_MAX_ITEMS,
+    TELEGRAM_MESSAGE_LIMIT,
+    WatchMatch,
+    _messages,
+)
+
+
+def _match(chat_id: int, machine_id: int, distance_km: float, name: str = "") -> WatchMatch:
+    return WatchMatch(
+        user_id=chat_id,
+        chat_id=chat_id,
+        machine_id=machine_id,
+        name=name or f"M{machine_id}",
+        url=f"http://forum/t={machine_id}",
+        distance_km=distance_km,
+    )
+
+
+def test_single_match_keeps_the_per_machine_message() -> None:
+    assert _messages([_match(1, 10, 4.04)], batch=5) == [
+        (1, texts.NOTIFY_NEW_MACHINE.format(distance=4.0, name="M10", url="http://forum/t=10"))
+    ]
+
+
+def test_several_matches_become_one_digest_sorted_by_distance() -> None:
+    matches = [_match(1, 10, 9.0), _match(2, 10, 1.0), _match(1, 11, 2.5), _match(1, 12, 5.0)]
+    messages = dict(_messages(matches, batch=5))
+
+    assert set(messages) == {1, 2}
+    digest = messages[1]
+    assert digest.startswith(texts.NOTIFY_DIGEST_HEADER.format(count=3))
+    assert digest.index("M11") < digest.index("M12") < digest.index("M10")
+    token = digest.rsplit("/map/", 1)[1]
+    payload = parse_map_token(token)
+    assert payload is not None
+    assert (payload["mode"], payload["user"], payload["batch"]) == ("digest", 1, 5)
+    # The other user still gets the plain single-machine message.
+    assert messages[2].startswith("Neuer Automat")
+
+
+def test_long_digest_lists_the_closest_and_counts_the_rest() -> None:
+    matches = [_match(1, mid, float(mid)) for mid in range(DIGEST_MAX_ITEMS + 5)]
+    ((_, digest),) = _messages(matches, batch=5)
+
+    assert f"M{DIGEST_MAX_ITEMS - 1}\n" in digest
+    assert f"M{DIGEST_MAX_ITEMS}\n" not in digest
+    assert texts.NOTIFY_DIGEST_MORE.format(count=5) in digest
+
+
+def test_digest_of_hundreds_of_long_entries_fits_one_message() -> None:
+    matches = [_match(1, mid, float(mid), name="Ä" * 250 + "🎢") for mid in range(200)]
+    ((_, digest),) = _messages(matches, batch=5)
+
+    assert len(digest.encode("utf-16-le")) // 2 <= TELEGRAM_MESSAGE_LIMIT
+    listed = digest.count("http://forum/t=")
+    assert 0 < listed < DIGEST_MAX_ITEMS
+    assert texts.NOTIFY_DIGEST_MORE.format(count=200 - listed) in digest
+    assert "/map/" in digest
@@ -0,0 +1,99 @@
+"""Unit tests for the raw page archive and offline replay through ArchiveTransport.
+
+Pages are recorded by a real ElongatedCoinSource talking to an
+httpx.MockTransport, then replayed into a second source with no network and the
+rate limiter off; both must see identical results.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import httpx
+
+from pressmuenzen.scraper.archive import ArchiveTransport, PageArchive
+from pressmuenzen.scraper.elongated_coin import ElongatedCoinSource
+from pressmuenzen.scraper.source import ScrapedRegion, TopicRef
+
+REGION = ScrapedRegion(forum_url="http://example.com/f=4", name="NRW", is_limited_section=False)
+
+_TOPIC_PAGE = b"""
+<html><body>
+<div class="post bg2">
+  <p class="author">von Max &raquo; Di 2. Jan 2024, 13:14</p>
+  <div class="content">
+    <span style="font-weight: bold">Standortbeschreibung:</span><br />Bonn, Markt 1<br />
+    <span style="font-weight: bold">GPS:</span> 50.7352, 7.1014<br />
+    <span style="font-weight: bold">Ende</span>
+  </div>
+</div>
+<div class="pagination">Seite 1 von 1</div>
+</body></html>
+"""
+
+
+def test_identical_pages_are_stored_once(tmp_path: Path) -> None:
+    archive = PageArchive(tmp_path)
+
+    first = archive.put("http://example.com/a", b"<html>same</html>")
+    second = archive.put("http://example.com/b", b"<html>same</html>")
+
+    assert first == second
+    assert len(list((tmp_path / "objects").rglob("*.html.gz"))) == 1
+    assert archive.get("http://example.com/b") == b"<html>same</html>"
+
+
+def test_latest_fetch_of_a_url_wins_across_instances(tmp_path: Path) -> None:
+    PageArchive(tmp_path).put("http://example.com/a", b"old")
+    PageArchive(tmp_path).put("http://example.com/a", b"new")
+
+    reopened = PageArchive(tmp_path)
+    assert reopened.get("http://example.com/a") == b"new"
+    assert reopened.get("http://example.com/missing") is None
+
+
+async def test_replay_drives_the_real_source_offline(tmp_path: Path) -> None:
+    topic = TopicRef(url="http://example.com/viewtopic.php?t=1&start=0", name="Bonn Markt")
+    live_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=_TOPIC_PAGE)),
+        timeout=5.0,
+    )
+    recorder = ElongatedCoinSource(client=live_client, archive=PageArchive(tmp_path))
+    live = await recorder.fetch_machine(topic, REGION)
+
+    replay_client = httpx.AsyncClient(transport=ArchiveTransport(PageArchive(tmp_path)))
+    replayer = ElongatedCoinSource(client=replay_client, rate_limited=False)
+    replayed = await replayer.fetch_machine(topic, REGION)
+
+    assert live is not None
+    assert replayed == live
+    assert replayed.gps_text == "50.7352, 7.1014"
+
+
+async def test_redirected_pages_are_archived_under_the_requested_url(tmp_path: Path) -> None:
+    topic = TopicRef(url="http://example.com/viewtopic.php?t=1&start=0", name="Bonn Markt")
+
+    def forum(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "example.com":
+            return httpx.Response(301, headers={"Location": "http://www.example.com/t/1"})
+        return httpx.Response(200, content=_TOPIC_PAGE)
+
+    live_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(forum), follow_redirects=True, timeout=5.0
+    )
+    recorder = ElongatedCoinSource(client=live_client, archive=PageArchive(tmp_path))
+    live = await recorder.fetch_machine(topic, REGION)
+
+    replay_client = httpx.AsyncClient(transport=ArchiveTransport(PageArchive(tmp_path)))
+    replayer = ElongatedCoinSource(client=replay_client, rate_limited=False)
+
+    assert live is not None
+    assert await replayer.fetch_machine(topic, REGION) == live
+
+
+async def test_replay_of_unarchived_url_is_a_404(tmp_path: Path) -> None:
+    client = httpx.AsyncClient(transport=ArchiveTransport(PageArchive(tmp_path)))
+
+    resp = await client.get("http://example.com/never-fetched")
+
+    assert resp.status_code == 404
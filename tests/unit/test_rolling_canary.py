@@ -0,0 +1,54 @@
+"""Unit tests for the rolling parse-rate canary (absolute floor is 85% by default)."""
+
+from __future__ import annotations
+
+import pytest
+
+from pressmuenzen.config import get_settings
+from pressmuenzen.scraper.canary import RollingCanary
+
+
+def test_waits_for_the_minimum_sample() -> None:
+    rolling = RollingCanary(None, window=10, min_topics=5)
+    for _ in range(4):
+        rolling.record(False)
+    assert not rolling.tripped
+    rolling.record(False)
+    assert rolling.tripped
+    assert rolling.tripped_after == 5
+    assert rolling.verdict is not None
+    assert "below absolute floor" in rolling.verdict.reason
+
+
+def test_judges_only_the_last_window() -> None:
+    rolling = RollingCanary(None, window=10, min_topics=10)
+    # A bad start followed by a long healthy stretch slides out of the window.
+    for parsed in [False] * 1 + [True] * 30:
+        rolling.record(parsed)
+    assert not rolling.tripped
+    assert rolling.rate == 1.0
+
+    for parsed in [False, False]:
+        rolling.record(parsed)
+    assert rolling.rate == 0.8
+    assert rolling.tripped
+    assert rolling.tripped_after == 33
+
+
+def test_drop_against_the_trailing_average_trips(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings(), "scraper_canary_min_parse_rate", 0.5)
+    rolling = RollingCanary(0.95, window=20, min_topics=20)
+    for i in range(20):
+        rolling.record(i % 4 != 0)  # 15 of 20: above the floor, 20pp below trailing
+    assert rolling.tripped
+    assert rolling.verdict is not None
+    assert "trailing average" in rolling.verdict.reason
+
+
+def test_stays_tripped() -> None:
+    rolling = RollingCanary(None, window=5, min_topics=5)
+    for parsed in [False] * 5 + [True] * 20:
+        rolling.record(parsed)
+    assert rolling.tripped
+    assert rolling.tripped_after == 5
+    assert rolling.recorded == 5
@@ -0,0 +1,432 @@
+"""Unit tests for the staged fetch -> parse -> persist scrape pipeline.
+
+A fake Source stands in for the forum and ``_upsert_machine`` is patched, so the
+stage wiring, per-topic isolation and ScrapeStats bookkeeping are tested without
+network or database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+
+import pytest
+
+from pressmuenzen.config import get_settings
+from pressmuenzen.scraper import checkpoint as checkpoint_module
+from pressmuenzen.scraper import pipeline
+from pressmuenzen.scraper.canary import RollingCanary
+from pressmuenzen.scraper.checkpoint import RunCheckpoint
+from pressmuenzen.scraper.source import (
+    FetchedPage,
+    ScrapedMachine,
+    ScrapedRegion,
+    TopicRef,
+)
+
+REGION = ScrapedRegion(forum_url="http://example.com/f=1", name="NRW", is_limited_section=False)
+
+
+class FakeSource:
+    source_id = "fake"
+
+    def __init__(
+        self,
+        topics: list[TopicRef],
+        *,
+        broken: frozenset[str] = frozenset(),
+        unmodified: frozenset[str] = frozenset(),
+        hanging: frozenset[str] = frozenset(),
+    ) -> None:
+        self.topics = topics
+        self.broken = broken
+        self.unmodified = unmodified
+        # Fetches of these never return, like a process that died mid-request.
+        self.hanging = hanging
+        self.fetched: list[str] = []
+        self.listed: list[str] = []
+
+    async def discover_regions(self) -> list[ScrapedRegion]:
+        self.listed.append("regions")
+        return [REGION]
+
+    async def list_topics(self, region: ScrapedRegion) -> AsyncIterator[TopicRef]:
+        self.listed.append(region.forum_url)
+        for topic in self.topics:
+            yield topic
+
+    async def fetch_thread_text(self, topic_url: str) -> AsyncIterator[str]:
+        yield topic_url
+
+    async def fetch_topic_page(self, topic: TopicRef) -> FetchedPage:
+        self.fetched.append(topic.url)
+        if topic.url in self.hanging:
+            await asyncio.Event().wait()
+        if topic.url in self.broken:
+            raise RuntimeError("boom")
+        if topic.url in self.unmodified:
+            return FetchedPage(url=topic.url, content=b"", conditional=True, not_modified=True)
+        return FetchedPage(url=topic.url, content=topic.name.encode(), etag=f'"{topic.url}"')
+
+    async def parse_machine(
+        self, page: bytes, topic: TopicRef, region: ScrapedRegion
+    ) -> ScrapedMachine | None:
+        is_entry = not page.startswith(b"Info")
+        return ScrapedMachine(
+            source_url=topic.url, name=topic.name, region=region, is_location_entry=is_entry
+        )
+
+    async def fetch_machine(self, topic: TopicRef, region: ScrapedRegion) -> ScrapedMachine | None:
+        page = await self.fetch_topic_page(topic)
+        return await self.parse_machine(page.content, topic, region)
+
+
+@pytest.fixture
+def persisted(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Stand in for the database: batches "commit" unless they hold a "Kaputt" topic."""
+    urls: list[str] = []
+
+    async def no_geocoding(
+        pending: list[pipeline._Pending], state: pipeline._RunState
+    ) -> list[pipeline._Pending]:
+        return pending
+
+    async def fake_commit(
+        unchanged: list[tuple[pipeline._ParsedTopic, int]],
+        pending: list[pipeline._Pending],
+        state: pipeline._RunState,
+    ) -> None:
+        if any(p.parsed.machine.name == "Kaputt" for p in pending):
+            raise RuntimeError("db down")
+        state.stats.machines_unchanged += len(unchanged)
+        for p in pending:
+            urls.append(p.parsed.machine.source_url)
+            state.stats.machines_added += 1
+            state.new_machine_ids.append(len(urls))
+            state.machine_index[p.parsed.machine.source_url] = (len(urls), p.content_hash)
+
+    async def fake_upsert(machine: ScrapedMachine, state: pipeline._RunState) -> bool:
+        if machine.name == "Kaputt":
+            raise RuntimeError("db down")
+        urls.append(machine.source_url)
+        state.stats.machines_added += 1
+        state.new_machine_ids.append(len(urls))
+        return True
+
+    monkeypatch.setattr(pipeline, "_prepare_coordinates", no_geocoding)
+    monkeypatch.setattr(pipeline, "_commit_batch", fake_commit)
+    monkeypatch.setattr(pipeline, "_upsert_machine", fake_upsert)
+    return urls
+
+
+def _topics(*names: str) -> list[TopicRef]:
+    return [TopicRef(url=f"u{i}", name=name) for i, name in enumerate(names)]
+
+
+async def test_every_topic_flows_through_all_stages(persisted: list[str]) -> None:
+    source = FakeSource(_topics(*(f"Automat {i}" for i in range(50))))
+    state = pipeline._RunState()
+
+    await pipeline._scrape_all(source, state)
+
+    assert sorted(persisted) == sorted(f"u{i}" for i in range(50))
+    assert state.stats.topics_seen == 50
+    assert state.stats.topics_parsed == 50
+    assert state.stats.machines_added == 50
+    assert len(state.new_machine_ids) == 50
+    assert state.stats.errors == []
+
+
+async def test_topics_are_fetched_while_the_listing_continues(persisted: list[str]) -> None:
+    first_fetched = asyncio.Event()
+
+    class GatedSource(FakeSource):
+        async def list_topics(self, region: ScrapedRegion) -> AsyncIterator[TopicRef]:
+            first, *rest = self.topics
+            yield first
+            # The next "list page" is only read once the first topic was fetched.
+            await first_fetched.wait()
+            for topic in rest:
+                yield topic
+
+        async def fetch_topic_page(self, topic: TopicRef) -> FetchedPage:
+            first_fetched.set()
+            return await super().fetch_topic_page(topic)
+
+    source = GatedSource(_topics("Bonn", "Köln"))
+    state = pipeline._RunState()
+
+    await asyncio.wait_for(pipeline._scrape_all(source, state), 5)
+
+    assert sorted(persisted) == ["u0", "u1"]
+
+
+async def test_tripped_rolling_canary_stops_the_crawl(persisted: list[str]) -> None:
+    # Template drift: from topic 10 on nothing is a location entry any more.
+    names = [f"Automat {i}" if i < 10 else f"Info {i}" for i in range(200)]
+    source = FakeSource(_topics(*names))
+    state = pipeline._RunState(
+        rolling_canary=RollingCanary(None, window=20, min_topics=20),
+    )
+
+    await pipeline._scrape_all(source, state)
+
+    rolling = state.rolling_canary
+    assert rolling is not None and rolling.tripped
+    # Judged from the 20th topic on; 10 of 20 parsed is far below the floor.
+    assert rolling.tripped_after == 20
+    # Only what was already queued or in flight gets fetched after that.
+    assert len(source.fetched) < 100
+
+
+async def test_failures_are_isolated_per_topic(persisted: list[str]) -> None:
+    source = FakeSource(_topics("Bonn", "Kaputt", "Info-Thread", "Köln"), broken=frozenset({"u0"}))
+    state = pipeline._RunState()
+
+    await pipeline._scrape_all(source, state)
+
+    assert persisted == ["u3"]
+    # Canary inputs keep their meaning: every fetch attempt is "seen", only
+    # location entries are "parsed" (a persist failure still parsed fine).
+    assert state.stats.topics_seen == 4
+    assert state.stats.topics_parsed == 2
+    assert sorted(e.split(" ")[0] for e in state.stats.errors) == ["fetch", "persist"]
+
+
+@pytest.mark.parametrize("stage", ["_fetch_topic", "_parse_topic", "_persist_batch"])
+async def test_crawl_finishes_when_a_stage_raises(
+    stage: str, persisted: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # A bug that escapes a stage's own per-topic handling must not kill its
+    # worker: the queues would never drain and the crawl would hang.
+    calls = 0
+    original = getattr(pipeline, stage)
+
+    async def failing_once(*args: object) -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("bug")
+        await original(*args)
+
+    monkeypatch.setattr(pipeline, stage, failing_once)
+    source = FakeSource(_topics(*(f"Automat {i}" for i in range(10))))
+    state = pipeline._RunState()
+
+    await asyncio.wait_for(pipeline._scrape_all(source, state), 5)
+
+    assert state.stats.errors == [f"{stage.split('_')[1]} stage: bug"]
+    assert len(persisted) < 10
+
+
+async def test_unchanged_topics_are_not_fetched(persisted: list[str]) -> None:
+    topics = _topics("Bonn", "Köln")
+    when = datetime(2024, 1, 1, tzinfo=UTC)
+    topics[0].last_activity, topics[0].reply_count = when, 2
+    source = FakeSource(topics)
+    state = pipeline._RunState(known_activity={"u0": (when, 2)})
+
+    await pipeline._scrape_all(source, state)
+
+    assert source.fetched == ["u1"]
+    # Skipped topics still count as seen for last_seen_at, as do persisted ones.
+    assert state.seen_urls == ["u0", "u1"]
+    assert state.stats.topics_skipped == 1
+    assert state.stats.topics_seen == 1
+
+
+async def test_not_modified_topics_skip_parse_and_persist(persisted: list[str]) -> None:
+    source = FakeSource(_topics("Bonn", "Köln", "Kaputt"), unmodified=frozenset({"u0"}))
+    state = pipeline._RunState()
+
+    await pipeline._scrape_all(source, state)
+
+    assert persisted == ["u1"]
+    # A 304 is seen; a topic whose persist failed is not.
+    assert sorted(state.seen_urls) == ["u0", "u1"]
+    assert state.stats.http_not_modified == 1
+    assert state.stats.http_cache_hits == 1
+    assert state.stats.http_cache_misses == 2
+    # A 304 is not a fetch for the canary's purposes.
+    assert state.stats.topics_seen == 2
+    # Only pages that made it all the way through keep their validators.
+    assert state.validators == {"u1": ('"u1"', None)}
+
+
+async def test_persist_writes_in_batches(
+    persisted: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    batch_sizes: list[int] = []
+    commit = pipeline._commit_batch
+
+    async def counting_commit(
+        unchanged: list[tuple[pipeline._ParsedTopic, int]],
+        pending: list[pipeline._Pending],
+        state: pipeline._RunState,
+    ) -> None:
+        batch_sizes.append(len(unchanged) + len(pending))
+        await commit(unchanged, pending, state)
+
+    monkeypatch.setattr(pipeline, "_commit_batch", counting_commit)
+    source = FakeSource(_topics(*(f"Automat {i}" for i in range(100))))
+    state = pipeline._RunState()
+
+    await pipeline._scrape_all(source, state)
+
+    assert sum(batch_sizes) == 100
+    assert len(batch_sizes) < 100
+
+
+async def test_failed_batch_prepare_falls_back_to_per_topic(
+    persisted: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def db_down(pending: list[pipeline._Pending], state: pipeline._RunState) -> None:
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(pipeline, "_prepare_coordinates", db_down)
+    source = FakeSource(_topics("Bonn", "Kaputt", "Köln"))
+    state = pipeline._RunState()
+
+    await asyncio.wait_for(pipeline._scrape_all(source, state), 5)
+
+    assert sorted(persisted) == ["u0", "u2"]
+    assert [e.split(" ")[:2] for e in state.stats.errors] == [["persist", "u1:"]]
+
+
+async def test_repeated_url_is_classified_after_first_commit(persisted: list[str]) -> None:
+    topics = [TopicRef(url="u0", name="Bonn"), TopicRef(url="u0", name="Bonn")]
+    state = pipeline._RunState()
+
+    await pipeline._persist_batch(
+        [
+            pipeline._ParsedTopic(
+                machine=ScrapedMachine(source_url=t.url, name=t.name, region=REGION),
+                page=FetchedPage(url=t.url, content=b""),
+            )
+            for t in topics
+        ],
+        state,
+    )
+
+    assert persisted == ["u0"]
+    assert state.stats.machines_added == 1
+    assert state.stats.machines_unchanged == 1
+
+
+async def test_batch_worker_flushes_on_size_linger_and_marker() -> None:
+    inbox: asyncio.Queue[int | None] = asyncio.Queue()
+    batches: list[list[int]] = []
+
+    async def handle(batch: list[int]) -> None:
+        batches.append(batch)
+
+    worker = asyncio.create_task(pipeline._batch_worker(inbox, 3, 0.05, handle, print))
+    for i in range(4):
+        inbox.put_nowait(i)
+    await asyncio.sleep(0.1)  # [0, 1, 2] by size, [3] after the linger
+    inbox.put_nowait(4)
+    inbox.put_nowait(None)  # flush marker: no waiting for the linger
+    await asyncio.wait_for(inbox.join(), 0.04)
+    worker.cancel()
+
+    assert batches == [[0, 1, 2], [3], [4]]
+
+
+@pytest.fixture
+def checkpoint_rows(monkeypatch: pytest.MonkeyPatch) -> dict[tuple[str, str], str | None]:
+    """Stand in for ``scrape_checkpoints``: flushed entries land in this dict."""
+    rows: dict[tuple[str, str], str | None] = {}
+
+    @asynccontextmanager
+    async def no_session() -> AsyncIterator[None]:
+        yield None
+
+    class FakeRepository:
+        def __init__(self, session: None) -> None:
+            pass
+
+        async def save(self, run_id: int, entries: Mapping[tuple[str, str], str | None]) -> None:
+            rows.update(entries)
+
+    monkeypatch.setattr(checkpoint_module, "session_scope", no_session)
+    monkeypatch.setattr(checkpoint_module, "ScrapeCheckpointRepository", FakeRepository)
+    return rows
+
+
+def _resumable_state(checkpoint: RunCheckpoint) -> pipeline._RunState:
+    return pipeline._RunState(
+        stats=checkpoint.stats,
+        new_machine_ids=checkpoint.new_machine_ids,
+        seen_urls=list(checkpoint.seen_urls),
+        validators=dict(checkpoint.validators),
+        checkpoint=checkpoint,
+    )
+
+
+async def test_checkpoint_records_every_final_topic_outcome(
+    persisted: list[str], checkpoint_rows: dict[tuple[str, str], str | None]
+) -> None:
+    topics = _topics("Bonn", "Kaputt", "Info-Thread", "Köln", "Aachen")
+    source = FakeSource(topics, broken=frozenset({"u0"}), unmodified=frozenset({"u4"}))
+    state = _resumable_state(RunCheckpoint(1, interval=0))
+
+    await pipeline._scrape_all(source, state)
+    restored = RunCheckpoint.restore(1, checkpoint_rows, interval=0)
+
+    assert restored.regions == [REGION]
+    assert [t.url for t in restored.listed[REGION.forum_url]] == [t.url for t in topics]
+    # Failures are final for this run too: a finished run would not retry them either.
+    assert restored.resumed == {"u0", "u1", "u2", "u3", "u4"}
+    assert sorted(restored.seen_urls) == sorted(state.seen_urls)
+    assert restored.validators == state.validators
+    assert restored.stats == state.stats
+    assert restored.new_machine_ids == state.new_machine_ids
+
+
+async def test_resumed_run_skips_finished_work_and_combines_stats(
+    persisted: list[str],
+    checkpoint_rows: dict[tuple[str, str], str | None],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(get_settings(), "scraper_persist_linger_seconds", 0.01)
+    topics = _topics(*(f"Automat {i}" for i in range(6)))
+    first = FakeSource(topics, hanging=frozenset({"u3", "u4", "u5"}))
+    state = _resumable_state(RunCheckpoint(1, interval=0))
+    crawl = asyncio.create_task(pipeline._scrape_all(first, state))
+    await asyncio.sleep(0.2)  # the first three are persisted, the rest hang
+    crawl.cancel()
+    await asyncio.gather(crawl, return_exceptions=True)
+    assert persisted == ["u0", "u1", "u2"]
+
+    second = FakeSource(topics)
+    resumed = _resumable_state(RunCheckpoint.restore(2, checkpoint_rows, interval=0))
+    await pipeline._scrape_all(second, resumed)
+
+    assert second.listed == []
+    assert second.fetched == ["u3", "u4", "u5"]
+    assert resumed.stats.topics_seen == 6
+    assert resumed.stats.topics_parsed == 6
+    assert resumed.stats.machines_added == 6
+    assert len(resumed.new_machine_ids) == 6
+    assert sorted(resumed.seen_urls) == [f"u{i}" for i in range(6)]
+
+
+async def test_machines_inserted_after_the_last_flush_still_count_as_added(
+    checkpoint_rows: dict[tuple[str, str], str | None],
+) -> None:
+    checkpoint = RunCheckpoint(1, interval=0)
+    checkpoint_rows.update(checkpoint.inserted([(10, "u0", None)]))
+    checkpoint.stats.machines_added = 1
+    checkpoint.new_machine_ids.append(10)
+    await checkpoint.flush()
+    # The process dies after inserting u1 but before the next flush.
+    checkpoint_rows.update(checkpoint.inserted([(11, "u1", ('"e1"', None))]))
+
+    restored = RunCheckpoint.restore(2, checkpoint_rows, interval=0)
+
+    assert restored.new_machine_ids == [10, 11]
+    assert restored.stats.machines_added == 2
+    assert restored.resumed == {"u0", "u1"}
+    assert restored.validators == {"u1": ('"e1"', None)}
@@ -1,4 +1,4 @@
-"""Unit tests for ElongatedCoinSource.fetch_thread_text().
+"""Unit tests for ElongatedCoinSource.fetch_thread_text() and join_thread().
 
 HTTP calls are intercepted with httpx.MockTransport so no network is required.
 The HTML fragments mirror the phpBB3 structure the parser actually targets.
@@ -9,7 +9,7 @@ from __future__ import annotations
 import httpx
 import pytest
 
-from pressmuenzen.scraper.elongated_coin import ElongatedCoinSource
+from pressmuenzen.scraper.elongated_coin import ElongatedCoinSource, join_thread
 
 
 def _phpbb_page(posts: list[tuple[str, str]], is_last: bool = True) -> bytes:
@@ -64,7 +64,9 @@ async def test_single_page_single_post() -> None:
     page = _phpbb_page([("Max Muster » 01.01.2024", "Automat steht am Bahnhof.")])
     source = _make_source([page])
 
-    text, count = await source.fetch_thread_text("http://example.com/viewtopic.php?t=1&start=0")
+    text, count = await join_thread(
+        source.fetch_thread_text("http://example.com/viewtopic.php?t=1&start=0")
+    )
 
     assert count == 1
     assert "Automat steht am Bahnhof." in text
@@ -81,7 +83,9 @@ async def test_single_page_multiple_posts() -> None:
     )
     source = _make_source([page])
 
-    text, count = await source.fetch_thread_text("http://example.com/viewtopic.php?t=1&start=0")
+    text, count = await join_thread(
+        source.fetch_thread_text("http://example.com/viewtopic.php?t=1&start=0")
+    )
 
     assert count == 3
     assert "Erster Beitrag." in text
@@ -103,7 +107,9 @@ async def test_multi_page_concatenates_all_posts() -> None:
     )
     source = _make_source([page1, page2])
 
-    text, count = await source.fetch_thread_text("http://example.com/viewtopic.php?t=1&start=0")
+    text, count = await join_thread(
+        source.fetch_thread_text("http://example.com/viewtopic.php?t=1&start=0")
+    )
 
     assert count == 2
     assert "Seite 1 Post." in text
@@ -115,7 +121,9 @@ async def test_empty_page_returns_empty_string_and_zero() -> None:
     page = _phpbb_page([])
     source = _make_source([page])
 
-    text, count = await source.fetch_thread_text("http://example.com/viewtopic.php?t=1&start=0")
+    text, count = await join_thread(
+        source.fetch_thread_text("http://example.com/viewtopic.php?t=1&start=0")
+    )
 
     assert count == 0
     assert text == ""
@@ -130,7 +138,9 @@ async def test_multi_page_without_start_param_does_not_loop() -> None:
     source = _make_source([page1, page2])
 
     # URL has no start= parameter — as stored for some machines in the DB.
-    text, count = await source.fetch_thread_text("http://example.com/viewtopic.php?t=1")
+    text, count = await join_thread(
+        source.fetch_thread_text("http://example.com/viewtopic.php?t=1")
+    )
 
     assert count == 2
     assert "Erster Post." in text
@@ -142,6 +152,8 @@ async def test_author_included_in_output() -> None:
     page = _phpbb_page([("Hans Mustermann » 15.06.2024", "Inhalt des Beitrags.")])
     source = _make_source([page])
 
-    text, _ = await source.fetch_thread_text("http://example.com/viewtopic.php?t=1&start=0")
+    text, _ = await join_thread(
+        source.fetch_thread_text("http://example.com/viewtopic.php?t=1&start=0")
+    )
 
     assert "Hans Mustermann" in text
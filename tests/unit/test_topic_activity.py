@@ -0,0 +1,157 @@
+"""Unit tests for topic-list activity parsing and the incremental skip decision.
+
+The topic-list HTML mirrors the phpBB3 rows the scraper reads: a ``topictitle``
+link, a ``dd.posts`` reply count and a ``dd.lastpost`` timestamp (either a
+``<time datetime>`` element or the German date text of older templates).
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import httpx
+
+from pressmuenzen.scraper.elongated_coin import ElongatedCoinSource
+from pressmuenzen.scraper.pipeline import _topic_unchanged
+from pressmuenzen.scraper.source import ScrapedRegion, TopicRef
+from pressmuenzen.scraper.throttle import AdaptiveLimiter
+
+_ROW_TEXT_DATE = """
+<li class="row bg1"><dl class="icon">
+  <dt><a href="./viewtopic.php?f=4&amp;t=1&amp;sid=abc" class="topictitle">Bonn "Bonnshop"</a></dt>
+  <dd class="posts">3 <dfn>Antworten</dfn></dd>
+  <dd class="lastpost"><span><dfn>Letzter Beitrag </dfn>von <a href="#">Max</a>
+    <br />Di 2. Jan 2024, 13:14</span></dd>
+</dl></li>
+"""
+
+_ROW_TIME_TAG = """
+<li class="row bg2"><dl class="icon">
+  <dt><a href="./viewtopic.php?f=4&amp;t=2&amp;sid=abc" class="topictitle">Köln Dom</a></dt>
+  <dd class="posts">1.204 <dfn>Antworten</dfn></dd>
+  <dd class="lastpost"><span>von <a href="#">Eva</a><br />
+    <time datetime="2024-03-05T08:30:00+00:00">Di 5. Mär 2024, 09:30</time></span></dd>
+</dl></li>
+"""
+
+_ROW_RELATIVE = """
+<li class="row bg1"><dl class="icon">
+  <dt><a href="./viewtopic.php?f=4&amp;t=3&amp;sid=abc" class="topictitle">Heute</a></dt>
+  <dd class="lastpost"><span>von <a href="#">Max</a><br />Heute, 10:00</span></dd>
+</dl></li>
+"""
+
+REGION = ScrapedRegion(forum_url="http://example.com/f=4", name="NRW", is_limited_section=False)
+
+
+def _list_page(rows: str, pagination: str = "Seite 1 von 1") -> bytes:
+    return f"""
+    <html><body>
+    <div class="forumbg"><ul class="topiclist topics">{rows}</ul></div>
+    <div class="pagination">{pagination}</div>
+    </body></html>
+    """.encode()
+
+
+def _source(page: bytes) -> ElongatedCoinSource:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=page))
+    return ElongatedCoinSource(client=httpx.AsyncClient(transport=transport, timeout=5.0))
+
+
+async def test_list_topics_reads_text_date_and_reply_count() -> None:
+    topics = [t async for t in _source(_list_page(_ROW_TEXT_DATE)).list_topics(REGION)]
+
+    assert len(topics) == 1
+    topic = topics[0]
+    assert topic.name == 'Bonn "Bonnshop"'
+    assert topic.reply_count == 3
+    assert topic.last_activity is not None
+    # Board time is Europe/Berlin (CET in January).
+    assert topic.last_activity.astimezone(UTC) == datetime(2024, 1, 2, 12, 14, tzinfo=UTC)
+
+
+async def test_list_topics_yields_each_page_before_reading_the_next() -> None:
+    requested: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        if "start=30" in str(request.url):
+            return httpx.Response(200, content=_list_page(_ROW_TIME_TAG, "Seite 2 von 2"))
+        return httpx.Response(200, content=_list_page(_ROW_TEXT_DATE, "Seite 1 von 2"))
+
+    source = ElongatedCoinSource(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=5.0),
+        limiter=AdaptiveLimiter(floor=50.0, ceiling=100.0, start=100.0),
+    )
+    topics = source.list_topics(REGION)
+
+    first = await anext(topics)
+    assert first.name == 'Bonn "Bonnshop"'
+    assert len(requested) == 1
+    assert [t.name for t in [t async for t in topics]] == ["Köln Dom"]
+    assert requested[1].endswith("start=30")
+
+
+async def test_list_topics_prefers_time_element_and_strips_thousands_separator() -> None:
+    topics = [t async for t in _source(_list_page(_ROW_TIME_TAG)).list_topics(REGION)]
+
+    assert topics[0].reply_count == 1204
+    assert topics[0].last_activity == datetime(2024, 3, 5, 8, 30, tzinfo=UTC)
+
+
+async def test_relative_dates_are_left_unknown() -> None:
+    topics = [t async for t in _source(_list_page(_ROW_RELATIVE)).list_topics(REGION)]
+
+    assert topics[0].last_activity is None
+    assert topics[0].reply_count is None
+
+
+# --- _topic_unchanged -------------------------------------------------------
+
+WHEN = datetime(2024, 1, 2, 12, 14, tzinfo=UTC)
+
+
+def _topic(activity: datetime | None = WHEN, replies: int | None = 3) -> TopicRef:
+    return TopicRef(url="u1", name="Bonn", last_activity=activity, reply_count=replies)
+
+
+def test_unchanged_when_activity_and_replies_match() -> None:
+    assert _topic_unchanged(_topic(), {"u1": (WHEN, 3)}) is True
+
+
+def test_changed_when_new_reply() -> None:
+    assert _topic_unchanged(_topic(replies=4), {"u1": (WHEN, 3)}) is False
+
+
+def test_changed_when_never_fetched() -> None:
+    assert _topic_unchanged(_topic(), {}) is False
+    assert _topic_unchanged(_topic(), {"u1": (None, None)}) is False
+
+
+def test_unknown_activity_is_always_fetched() -> None:
+    assert _topic_unchanged(_topic(activity=None, replies=None), {"u1": (None, None)}) is False
+
+
+# --- conditional topic GETs -------------------------------------------------
+
+
+async def test_topic_page_sends_stored_validators_and_honours_304() -> None:
+    seen: list[httpx.Headers] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=b"<html></html>", headers={"ETag": '"v1"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=5.0)
+    topic = TopicRef(url="http://example.com/t=1", name="Bonn")
+
+    first = await ElongatedCoinSource(client=client).fetch_topic_page(topic)
+    assert (first.conditional, first.not_modified, first.etag) == (False, False, '"v1"')
+    assert "if-none-match" not in seen[0]
+
+    source = ElongatedCoinSource(client=client, validators={topic.url: ('"v1"', None)})
+    second = await source.fetch_topic_page(topic)
+    assert (second.conditional, second.not_modified) == (True, True)
+    assert await source.fetch_machine(topic, REGION) is None